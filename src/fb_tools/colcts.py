@@ -14,6 +14,13 @@ from __future__ import absolute_import
 
 # Standard modules
 import logging
+import marshal
+import sys
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 
 try:
     from collections.abc import Mapping, MutableMapping
@@ -28,14 +35,42 @@ except ImportError:
 from .common import is_sequence
 from .errors import FbError
 from .obj import FbGenericBaseObject
-from .xlate import XLATOR
+from .xlate import XLATOR, format_list
 
-__version__ = "2.0.3"
+__version__ = "2.2.0"
 LOG = logging.getLogger(__name__)
 
 _ = XLATOR.gettext
 ngettext = XLATOR.ngettext
 
+# Ordering policies for iterating over FrozenCIStringSet and CIStringSet objects:
+# * ORDER_SORTED:    sorted by the folded items, the sorted view is cached
+#                    until the set of items is changed
+# * ORDER_INSERTION: in the order, the items were inserted the first time
+# * ORDER_UNSORTED:  no guaranteed order, the internal storage is iterated
+#                    directly, so the set may not be changed during iteration
+ORDER_SORTED = "sorted"
+ORDER_INSERTION = "insertion"
+ORDER_UNSORTED = "unsorted"
+VALID_ORDERS = (ORDER_SORTED, ORDER_INSERTION, ORDER_UNSORTED)
+
+# Maximum number of memoised keys of the expensive key normalisers
+KEY_FOLD_CACHE_SIZE = 16384
+
+# Maximum number of keys, which are inserted into or removed from an existing prefix or
+# suffix index of a CIStringSet one by one, on more keys the index is dropped and rebuilt
+# on the next query.
+INDEX_INSORT_LIMIT = 64
+
+# Header of the binary format of to_bytes() and from_bytes(): the magic, the format
+# version and the kind of the collection (b"S" for sets, b"D" for dicts), followed by
+# the marshalled data (marshal format version 4).
+CI_BYTES_MAGIC = b"FBCI"
+CI_BYTES_VERSION = 1
+CI_BYTES_KIND_SET = b"S"
+CI_BYTES_KIND_DICT = b"D"
+CI_MARSHAL_VERSION = 4
+
 
 # =============================================================================
 class FbCollectionsError(FbError):
@@ -173,6 +208,135 @@ class CIInitfromTupleError(IndexError, FbCollectionsError):
         return msg.format(ex=self.expected, i=self.item, m=self.emesg)
 
 
+# =============================================================================
+class CISerialisationError(ValueError, FbCollectionsError):
+    """Exeception if a collection could not be serialised or deserialised."""
+
+    # -------------------------------------------------------------------------
+    def __init__(self, cls_name, emesg):
+        """Initialise a CISerialisationError exception."""
+        self.cls_name = cls_name
+        self.emesg = emesg
+        super(CISerialisationError, self).__init__()
+
+    # -------------------------------------------------------------------------
+    def __str__(self):
+        """Typecast into str."""
+        msg = _("Could not (de)serialise a {c} object: {m}")
+        return msg.format(c=self.cls_name, m=self.emesg)
+
+
+# =============================================================================
+def _to_bytes(obj, kind, data):
+    """Return the binary format of the given data of a collection."""
+    try:
+        payload = marshal.dumps(data, CI_MARSHAL_VERSION)
+    except ValueError as e:
+        raise CISerialisationError(obj.__class__.__name__, str(e))
+    return CI_BYTES_MAGIC + bytes((CI_BYTES_VERSION,)) + kind + payload
+
+
+# =============================================================================
+def _from_bytes(cls, kind, data):
+    """Return the unmarshalled data of a collection from its binary format."""
+    header_len = len(CI_BYTES_MAGIC) + 2
+    header = bytes(data[:header_len])
+    if len(header) < header_len:
+        raise CISerialisationError(cls.__name__, _("Truncated header."))
+    if header[: len(CI_BYTES_MAGIC)] != CI_BYTES_MAGIC:
+        raise CISerialisationError(cls.__name__, _("Wrong magic header."))
+    if header[len(CI_BYTES_MAGIC)] != CI_BYTES_VERSION:
+        msg = _("Unsupported format version {}.").format(header[len(CI_BYTES_MAGIC)])
+        raise CISerialisationError(cls.__name__, msg)
+    if header[header_len - 1:] != kind:
+        raise CISerialisationError(cls.__name__, _("Wrong kind of collection."))
+    try:
+        return marshal.loads(data[header_len:])
+    except (ValueError, EOFError, TypeError) as e:
+        raise CISerialisationError(cls.__name__, str(e))
+
+
+# =============================================================================
+@lru_cache(maxsize=KEY_FOLD_CACHE_SIZE)
+def nfkc_casefold_key(key):
+    """Return the NFKC normalised and casefolded notation of the given key.
+
+    Compatibility characters (e.g. fullwidth letters or the Kelvin sign) are mapped
+    to their canonical form, so they are matching their plain notation.
+    The result is memoised and interned.
+    """
+    folded = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", key).casefold())
+    return sys.intern(folded)
+
+
+# =============================================================================
+@lru_cache(maxsize=KEY_FOLD_CACHE_SIZE)
+def idna_key(key):
+    """Return the IDNA normalised notation of the given key, which should be a FQDN.
+
+    All labels are converted into their ASCII compatible encoding (e.g. 'xn--...'),
+    so the Unicode and the ACE notation of a domain are matching. If the key is not
+    a valid IDNA domain name, it is NFKC normalised and casefolded instead.
+    The result is memoised and interned.
+    """
+    try:
+        folded = str.encode(key, "idna").decode("ascii").lower()
+    except UnicodeError:
+        return nfkc_casefold_key(key)
+    return sys.intern(folded)
+
+
+# Available key normalisers for the case insensitive collections. The normaliser
+# of a collection class is set by its class property fold_key, e.g.:
+#
+#   class FqdnSet(CIStringSet):
+#       fold_key = staticmethod(idna_key)
+#
+# str.lower and str.casefold are not memoised, because they are cheaper than
+# a cache lookup.
+KEY_NORMALISERS = {
+    "lower": str.lower,
+    "casefold": str.casefold,
+    "nfkc_casefold": nfkc_casefold_key,
+    "idna": idna_key,
+}
+
+
+# =============================================================================
+def _fold_all(items, fold=str.lower, error_class=WrongItemTypeError):
+    """Return a list of the folded notation of all given items.
+
+    The items are folded in one pass. If one of the items is not a str,
+    an exception of the given error class is raised.
+
+    @param items: the items to fold, must be iterable multiple times
+    @type items: list or tuple
+    @param fold: the key normaliser to use
+    @type fold: callable
+    @param error_class: the exception class to raise on a non-str item
+    @type error_class: type
+
+    @return: the folded items in the same order
+    @rtype: list
+    """
+    try:
+        return list(map(fold, items))
+    except TypeError:
+        for item in items:
+            if not isinstance(item, str):
+                raise error_class(item)
+        raise
+
+
+# =============================================================================
+def _items_of_iterable(iterable):
+    """Return all items of the given iterable as a list, but reject strings."""
+    if isinstance(iterable, (str, bytes)) or not hasattr(iterable, "__iter__"):
+        msg = _("Parameter {p!r} is not an iterable type, but a {c!r} object instead.")
+        raise TypeError(msg.format(p="iterable", c=iterable.__class__.__qualname__))
+    return list(iterable)
+
+
 # =============================================================================
 class FrozenCIStringSet(Set, FbGenericBaseObject):
     """
@@ -180,12 +344,38 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
 
     The items MUST be of type string!
     It works like a set.
+
+    The items are compared by their notation folded by the key normaliser in the
+    class property fold_key (str.lower by default), see KEY_NORMALISERS.
     """
 
+    default_order = ORDER_SORTED
+    fold_key = staticmethod(str.lower)
+
     # -------------------------------------------------------------------------
-    def __init__(self, iterable=None):
-        """Initialise a FrozenCIStringSet object."""
+    def __init__(self, iterable=None, order=None):
+        """Initialise a FrozenCIStringSet object.
+
+        @param iterable: the initial items of the set
+        @type iterable: sequence or FrozenCIStringSet
+        @param order: the ordering policy on iterating, one of the values of VALID_ORDERS,
+                      if not given, the class property default_order is used.
+        @type order: str
+        """
         self._items = {}
+        self._sorted_keys = None
+        self._shared = False
+        self._prefix_index = None
+        self._suffix_index = None
+        self._hash_value = None
+
+        if order is None:
+            order = self.default_order
+        if order not in VALID_ORDERS:
+            msg = _("Invalid ordering policy {o!r}, valid policies are: {v}.")
+            raise ValueError(msg.format(o=order, v=format_list(VALID_ORDERS, do_repr=True)))
+        self._order = order
+
         if iterable is not None:
             ok = False
             if is_sequence(iterable):
@@ -197,12 +387,29 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
                 msg = msg.format(p="iterable", c=iterable.__class__.__qualname__)
                 raise TypeError(msg)
 
-            for item in iterable:
+            values = list(iterable)
+            self._items = dict(zip(_fold_all(values, self.fold_key), values))
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_iterable(cls, iterable, order=None):
+        """Create a new set from all items of the given iterable.
+
+        In contrast to the constructor any iterable (e.g. a generator or a set)
+        may be given, all items are validated and folded in one pass.
 
-                if not isinstance(item, str):
-                    raise WrongItemTypeError(item)
-                ival = item.lower()
-                self._items[ival] = item
+        @param iterable: the items of the new set
+        @type iterable: iterable
+        @param order: the ordering policy of the new set
+        @type order: str
+
+        @return: the new set
+        @rtype: FrozenCIStringSet
+        """
+        values = _items_of_iterable(iterable)
+        new_set = cls(order=order)
+        new_set._items = dict(zip(_fold_all(values, cls.fold_key), values))
+        return new_set
 
     # -------------------------------------------------------------------------
     # Mandatory methods (ABC methods)
@@ -213,16 +420,19 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(value, str):
             raise WrongItemTypeError(value)
 
-        ival = value.lower()
+        ival = self.fold_key(value)
         if ival in self._items:
             return True
         return False
 
     # -------------------------------------------------------------------------
     def __iter__(self):
-        """Return an iterator over all entries."""
-        for key in sorted(self._items.keys()):
-            yield self._items[key]
+        """Return an iterator over all entries in the order given by the ordering policy."""
+        if self._order == ORDER_SORTED:
+            return map(self._items.__getitem__, self._get_sorted_keys())
+        if self._order == ORDER_INSERTION:
+            return iter(tuple(self._items.values()))
+        return iter(self._items.values())
 
     # -------------------------------------------------------------------------
     def __len__(self):
@@ -232,17 +442,124 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
     # -------------------------------------------------------------------------
     # Nice to have methods
 
+    # -------------------------------------------------------------------------
+    @property
+    def order(self):
+        """Return the ordering policy on iterating over the set."""
+        return self._order
+
+    # -------------------------------------------------------------------------
+    def _get_sorted_keys(self):
+        """Return the cached sorted list of the folded items."""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._items)
+        return self._sorted_keys
+
+    # -------------------------------------------------------------------------
     def real_value(self, item):
         """Return the item with the original case."""
         if not isinstance(item, str):
             raise WrongItemTypeError(item)
 
-        ival = item.lower()
+        ival = self.fold_key(item)
         if ival not in self._items:
             raise KeyError(item)
 
         return self._items[ival]
 
+    # -------------------------------------------------------------------------
+    def _get_prefix_index(self):
+        """Return the sorted list of the folded items, which is built on demand.
+
+        In contrast to the sorted view it is not shared with snapshots and it is
+        maintained by single changes of a CIStringSet.
+        """
+        if self._prefix_index is None:
+            self._prefix_index = sorted(self._items)
+        return self._prefix_index
+
+    # -------------------------------------------------------------------------
+    def _get_suffix_index(self):
+        """Return the sorted list of the reversed folded items, which is built on demand."""
+        if self._suffix_index is None:
+            self._suffix_index = sorted(key[::-1] for key in self._items)
+        return self._suffix_index
+
+    # -------------------------------------------------------------------------
+    def startswith(self, prefix):
+        """Return all items starting with the given prefix.
+
+        The query is done by a binary search in the prefix index in O(log n + k).
+
+        @param prefix: the prefix to search for, it is folded by the key normaliser
+        @type prefix: str
+
+        @return: the found items in original notation, sorted by their folded notation
+        @rtype: list
+        """
+        if not isinstance(prefix, str):
+            raise WrongItemTypeError(prefix)
+
+        fprefix = self.fold_key(prefix)
+        index = self._get_prefix_index()
+        keys = []
+        for key in islice(index, bisect_left(index, fprefix), None):
+            if not key.startswith(fprefix):
+                break
+            keys.append(key)
+        return list(map(self._items.__getitem__, keys))
+
+    # -------------------------------------------------------------------------
+    def endswith(self, suffix):
+        """Return all items ending with the given suffix, e.g. all hosts of a domain.
+
+        The query is done by a binary search in the suffix index in O(log n + k).
+
+        @param suffix: the suffix to search for, it is folded by the key normaliser
+        @type suffix: str
+
+        @return: the found items in original notation, sorted by their reversed folded notation
+        @rtype: list
+        """
+        if not isinstance(suffix, str):
+            raise WrongItemTypeError(suffix)
+
+        rsuffix = self.fold_key(suffix)[::-1]
+        index = self._get_suffix_index()
+        keys = []
+        for rkey in islice(index, bisect_left(index, rsuffix), None):
+            if not rkey.startswith(rsuffix):
+                break
+            keys.append(rkey[::-1])
+        return list(map(self._items.__getitem__, keys))
+
+    # -------------------------------------------------------------------------
+    def between(self, start=None, stop=None):
+        """Return all items, which are in the given range of folded items.
+
+        The query is done by a binary search in the prefix index in O(log n + k).
+
+        @param start: the lower limit of the range (inclusive), None for no limit
+        @type start: str or None
+        @param stop: the upper limit of the range (exclusive), None for no limit
+        @type stop: str or None
+
+        @return: the found items in original notation, sorted by their folded notation
+        @rtype: list
+        """
+        index = self._get_prefix_index()
+        lower = 0
+        upper = len(index)
+        if start is not None:
+            if not isinstance(start, str):
+                raise WrongItemTypeError(start)
+            lower = bisect_left(index, self.fold_key(start))
+        if stop is not None:
+            if not isinstance(stop, str):
+                raise WrongItemTypeError(stop)
+            upper = bisect_left(index, self.fold_key(stop))
+        return list(map(self._items.__getitem__, index[lower:upper]))
+
     # -------------------------------------------------------------------------
     def __bool__(self):
         """Typecast into a boolean type."""
@@ -257,11 +574,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        for item in self._items:
-            if item not in other:
-                return False
-
-        return True
+        return self._items.keys() <= self._items_of(other).keys()
 
     # -------------------------------------------------------------------------
     def __le__(self, other):
@@ -275,18 +588,15 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        ret = True
-        for item in self._items:
-            if item not in other:
-                ret = False
-        if ret:
-            if len(self) != len(other):
-                return True
-        return False
+        return self._items.keys() < self._items_of(other).keys()
 
     # -------------------------------------------------------------------------
     def __eq__(self, other):
-        """Return the '==' operator."""
+        """Return the '==' operator.
+
+        Sets with different key normalisers are never equal, because their equality
+        would depend on the normaliser used for comparing and would not match the hash.
+        """
         if not isinstance(other, FrozenCIStringSet):
             return False
 
@@ -297,14 +607,28 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
             if isinstance(other, CIStringSet):
                 return False
 
+        if other.fold_key is not self.fold_key:
+            return False
+
         if len(self) != len(other):
             return False
 
-        for item in self._items:
-            if item not in other:
+        if self._hash_value is not None and other._hash_value is not None:
+            if self._hash_value != other._hash_value:
                 return False
 
-        return True
+        return self._items.keys() == other._items.keys()
+
+    # -------------------------------------------------------------------------
+    def __hash__(self):
+        """Return the hash value of the set.
+
+        It is computed from the folded items on the first call and then cached,
+        because the set is immutable.
+        """
+        if self._hash_value is None:
+            self._hash_value = hash(frozenset(self._items))
+        return self._hash_value
 
     # -------------------------------------------------------------------------
     def __ne__(self, other):
@@ -320,15 +644,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        ret = True
-        for item in other._items:
-            if item not in self:
-                ret = False
-        if ret:
-            if len(self) != len(other):
-                return True
-
-        return False
+        return self._items.keys() > self._items_of(other).keys()
 
     # -------------------------------------------------------------------------
     def __ge__(self, other):
@@ -337,21 +653,36 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        for item in other._items:
-            if item not in self:
-                return False
-        return True
+        return self._items.keys() >= self._items_of(other).keys()
 
     # -------------------------------------------------------------------------
     def __copy__(self):
         """Return a copy of the current set."""
-        new_set = self.__class__()
-        for item in self:
-            ival = item.lower()
-            new_set._items[ival] = item
+        return self.snapshot()
+
+    # -------------------------------------------------------------------------
+    def snapshot(self):
+        """Return a copy of the current set, which shares the storage with it.
+
+        Creating a snapshot is O(1), the storage is copied not before the first
+        change of one of both sets (copy-on-write).
+        """
+        new_set = self.__class__(order=self._order)
+        new_set._items = self._items
+        new_set._sorted_keys = self._sorted_keys
+        new_set._hash_value = self._hash_value
+        new_set._shared = True
+        self._shared = True
 
         return new_set
 
+    # -------------------------------------------------------------------------
+    def _detach(self):
+        """Take a private copy of the storage before changing it, if it is shared."""
+        if self._shared:
+            self._items = dict(self._items)
+            self._shared = False
+
     # -------------------------------------------------------------------------
     def copy(self):
         """Return a copy of the current set."""
@@ -390,14 +721,71 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
             if not isinstance(other, FrozenCIStringSet):
                 raise WrongCompareSetClassError(other, cls)
 
-        new_set = self.__copy__()
-        for other in others:
-            for item in other:
-                ival = item.lower()
-                new_set._items[ival] = item
+        return self._new_from_items(self._union_items(others))
+
+    # -------------------------------------------------------------------------
+    def _items_of(self, other):
+        """Return the storage dict of the other set with keys folded by the own normaliser.
 
+        If both sets are using the same key normaliser, the storage of the other set is
+        returned unchanged, else its items are folded again.
+        """
+        if other.fold_key is self.fold_key:
+            return other._items
+        values = list(other._items.values())
+        return dict(zip(_fold_all(values, self.fold_key), values))
+
+    # -------------------------------------------------------------------------
+    def _new_from_items(self, items):
+        """Return a new set of the same class and ordering policy with the given storage."""
+        new_set = self.__class__(order=self._order)
+        new_set._items = items
         return new_set
 
+    # -------------------------------------------------------------------------
+    def _union_items(self, others):
+        """Return the storage dict of the union with the other sets.
+
+        All set operations are done on the folded keys of the storage dicts, so they
+        are performed by the set algebra of the dict views. The items keep the notation of
+        the last set containing it and the order of this set, followed by the new items
+        of the other sets.
+        """
+        items = dict(self._items)
+        for other in others:
+            items.update(self._items_of(other))
+        return items
+
+    # -------------------------------------------------------------------------
+    def _intersection_items(self, others):
+        """Return the storage dict of the intersection with the other sets."""
+        if not others:
+            return dict(self._items)
+        keys = self._items.keys()
+        last_items = None
+        for other in others:
+            last_items = self._items_of(other)
+            keys = keys & last_items.keys()
+        return {key: last_items[key] for key in self._items if key in keys}
+
+    # -------------------------------------------------------------------------
+    def _difference_items(self, others):
+        """Return the storage dict of the difference to the other sets."""
+        keys = self._items.keys()
+        for other in others:
+            keys = keys - self._items_of(other).keys()
+        return {key: value for (key, value) in self._items.items() if key in keys}
+
+    # -------------------------------------------------------------------------
+    def _symmetric_difference_items(self, other):
+        """Return the storage dict of the symmetric difference with the other set."""
+        other_items = self._items_of(other)
+        items = {key: value for (key, value) in self._items.items() if key not in other_items}
+        for (key, value) in other_items.items():
+            if key not in self._items:
+                items[key] = value
+        return items
+
     # -------------------------------------------------------------------------
     def __or__(self, *others):
         """Return the '|' operator."""
@@ -411,20 +799,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
             if not isinstance(other, FrozenCIStringSet):
                 raise WrongCompareSetClassError(other, cls)
 
-        new_set = self.__class__()
-        for item in self:
-            do_add = True
-            value = item
-            for other in others:
-                if item in other:
-                    value = other.real_value(item)
-                else:
-                    do_add = False
-            if do_add:
-                ival = item.lower()
-                new_set._items[ival] = value
-
-        return new_set
+        return self._new_from_items(self._intersection_items(others))
 
     # -------------------------------------------------------------------------
     def __and__(self, *others):
@@ -439,17 +814,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
             if not isinstance(other, FrozenCIStringSet):
                 raise WrongCompareSetClassError(other, cls)
 
-        new_set = self.__class__()
-        for item in self:
-            do_add = True
-            for other in others:
-                if item in other:
-                    do_add = False
-            if do_add:
-                ival = item.lower()
-                new_set._items[ival] = item
-
-        return new_set
+        return self._new_from_items(self._difference_items(others))
 
     # -------------------------------------------------------------------------
     def __sub__(self, *others):
@@ -463,19 +828,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        new_set = self.__class__()
-
-        for item in self:
-            if item not in other:
-                ival = item.lower()
-                new_set._items[ival] = item
-
-        for item in other:
-            if item not in self:
-                ival = item.lower()
-                new_set._items[ival] = item
-
-        return new_set
+        return self._new_from_items(self._symmetric_difference_items(other))
 
     # -------------------------------------------------------------------------
     def __xor__(self, other):
@@ -489,15 +842,7 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
         if not isinstance(other, FrozenCIStringSet):
             raise WrongCompareSetClassError(other, cls)
 
-        for item in self:
-            if item in other:
-                return False
-
-        for item in other:
-            if item in self:
-                return False
-
-        return True
+        return self._items.keys().isdisjoint(self._items_of(other).keys())
 
     # -------------------------------------------------------------------------
     def as_dict(self, short=True):
@@ -519,11 +864,65 @@ class FrozenCIStringSet(Set, FbGenericBaseObject):
     # -------------------------------------------------------------------------
     def as_list(self):
         """Typecast into a list."""
-        ret = []
-        for item in self:
-            ret.append(item)
+        return list(self)
 
-        return ret
+    # -------------------------------------------------------------------------
+    def __getstate__(self):
+        """Return the state for pickling: the ordering policy and a list of all items.
+
+        The folded keys are not stored, they are rebuilt on unpickling.
+        """
+        return (self._order, list(self._items.values()))
+
+    # -------------------------------------------------------------------------
+    def __setstate__(self, state):
+        """Restore the set from a pickled state.
+
+        The plain instance dict, which was pickled by former versions, is accepted as well.
+        """
+        if isinstance(state, dict):
+            order = self.default_order
+            values = list(state["_items"].values())
+        else:
+            order, values = state
+        self._order = order
+        self._items = dict(zip(_fold_all(values, self.fold_key), values))
+        self._sorted_keys = None
+        self._shared = False
+        self._prefix_index = None
+        self._suffix_index = None
+        self._hash_value = None
+
+    # -------------------------------------------------------------------------
+    def to_bytes(self):
+        """Return a compact binary representation of the set, e.g. for on-disk caches.
+
+        @return: the binary representation, which can be restored by from_bytes()
+        @rtype: bytes
+        """
+        return _to_bytes(self, CI_BYTES_KIND_SET, self.__getstate__())
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a new set from the binary representation created by to_bytes().
+
+        @raise CISerialisationError: if the data could not be deserialised
+
+        @param data: the binary representation of a set
+        @type data: bytes
+
+        @return: the new set
+        @rtype: FrozenCIStringSet
+        """
+        state = _from_bytes(cls, CI_BYTES_KIND_SET, data)
+        try:
+            order, values = state
+            new_set = cls(order=order)
+            new_set._items = dict(zip(_fold_all(values, cls.fold_key), values))
+        except (TypeError, ValueError) as e:
+            raise CISerialisationError(cls.__name__, str(e))
+        return new_set
 
 
 # =============================================================================
@@ -535,6 +934,64 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
     It works like a set.
     """
 
+    frozen_class = FrozenCIStringSet
+
+    # A mutable set is not hashable
+    __hash__ = None
+
+    # -------------------------------------------------------------------------
+    def freeze(self):
+        """Return an immutable view of the current set as an object of frozen_class.
+
+        The frozen set shares the storage with the current set, it is copied not before
+        the next change of the current set. If frozen_class uses another key normaliser,
+        the items have to be folded again.
+        """
+        frozen_class = self.frozen_class
+        if frozen_class.fold_key is not self.fold_key:
+            return frozen_class.from_iterable(self._items.values(), order=self._order)
+
+        frozen = frozen_class(order=self._order)
+        frozen._items = self._items
+        frozen._sorted_keys = self._sorted_keys
+        frozen._shared = True
+        self._shared = True
+
+        return frozen
+
+    # -------------------------------------------------------------------------
+    def _index_insert(self, keys):
+        """Insert the given new folded keys into the existing prefix and suffix indexes."""
+        if len(keys) > INDEX_INSORT_LIMIT:
+            self._drop_indexes()
+            return
+        if self._prefix_index is not None:
+            for key in keys:
+                insort(self._prefix_index, key)
+        if self._suffix_index is not None:
+            for key in keys:
+                insort(self._suffix_index, key[::-1])
+
+    # -------------------------------------------------------------------------
+    def _index_remove(self, keys):
+        """Remove the given folded keys from the existing prefix and suffix indexes."""
+        if len(keys) > INDEX_INSORT_LIMIT:
+            self._drop_indexes()
+            return
+        if self._prefix_index is not None:
+            for key in keys:
+                del self._prefix_index[bisect_left(self._prefix_index, key)]
+        if self._suffix_index is not None:
+            for key in keys:
+                rkey = key[::-1]
+                del self._suffix_index[bisect_left(self._suffix_index, rkey)]
+
+    # -------------------------------------------------------------------------
+    def _drop_indexes(self):
+        """Drop the prefix and suffix indexes after a bulk change, they are rebuilt on demand."""
+        self._prefix_index = None
+        self._suffix_index = None
+
     # -------------------------------------------------------------------------
     def add(self, value, keep=False):
         """Add a string to the current set, if it does not exists."""
@@ -546,15 +1003,24 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
         else:
             vals = [value]
 
-        for val in vals:
-            if not isinstance(val, str):
-                raise WrongItemTypeError(val)
+        self._detach()
+        new_keys = []
+        try:
+            for val in vals:
+                if not isinstance(val, str):
+                    raise WrongItemTypeError(val)
 
-            if keep and val in self:
-                continue
+                if keep and val in self:
+                    continue
 
-            ival = val.lower()
-            self._items[ival] = val
+                ival = self.fold_key(val)
+                if ival not in self._items:
+                    self._sorted_keys = None
+                    new_keys.append(ival)
+                self._items[ival] = val
+        finally:
+            if new_keys:
+                self._index_insert(new_keys)
 
     # -------------------------------------------------------------------------
     def discard(self, value):
@@ -567,13 +1033,21 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
         else:
             vals = [value]
 
-        for val in vals:
-            if not isinstance(val, str):
-                raise WrongItemTypeError(val)
+        self._detach()
+        removed_keys = []
+        try:
+            for val in vals:
+                if not isinstance(val, str):
+                    raise WrongItemTypeError(val)
 
-            ival = val.lower()
-            if ival in self._items:
-                del self._items[ival]
+                ival = self.fold_key(val)
+                if ival in self._items:
+                    del self._items[ival]
+                    self._sorted_keys = None
+                    removed_keys.append(ival)
+        finally:
+            if removed_keys:
+                self._index_remove(removed_keys)
 
     # -------------------------------------------------------------------------
     def update(self, *others):
@@ -583,14 +1057,36 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
                 cls = self.__class__.__name__
                 raise WrongCompareSetClassError(other, cls)
 
+        self._detach()
+        old_len = len(self._items)
         for other in others:
-            for item in other:
-                self.add(item)
+            self._items.update(self._items_of(other))
+        if len(self._items) != old_len:
+            self._sorted_keys = None
+            self._drop_indexes()
+
+    # -------------------------------------------------------------------------
+    def update_many(self, *iterables):
+        """Add all items of the given iterables to the current set.
+
+        Any iterable (e.g. a list, a generator or a set) may be given, the items of each
+        iterable are validated and folded in one pass, before the set is changed.
+        """
+        for iterable in iterables:
+            values = _items_of_iterable(iterable)
+            keys = _fold_all(values, self.fold_key)
+            self._detach()
+            old_len = len(self._items)
+            self._items.update(zip(keys, values))
+            if len(self._items) != old_len:
+                self._sorted_keys = None
+                self._drop_indexes()
 
     # -------------------------------------------------------------------------
     def __ior__(self, *others):
         """Return the '|=' operator."""
         self.update(*others)
+        return self
 
     # -------------------------------------------------------------------------
     def intersection_update(self, *others):
@@ -600,21 +1096,18 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
                 cls = self.__class__.__name__
                 raise WrongCompareSetClassError(other, cls)
 
-        for item in self:
-            for other in others:
-                value = item
-                if item in other:
-                    value = other.real_value(item)
-                else:
-                    self.discard(item)
-                    break
-                if value != item:
-                    self.add(value)
+        items = self._intersection_items(others)
+        if len(items) != len(self._items):
+            self._sorted_keys = None
+            self._drop_indexes()
+        self._items = items
+        self._shared = False
 
     # -------------------------------------------------------------------------
     def __iand__(self, *others):
         """Return the '&=' operator."""
         self.intersection_update(*others)
+        return self
 
     # -------------------------------------------------------------------------
     def difference_update(self, *others):
@@ -624,16 +1117,18 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
                 cls = self.__class__.__name__
                 raise WrongCompareSetClassError(other, cls)
 
-        for item in self:
-            for other in others:
-                if item in other:
-                    self.discard(item)
-                    break
+        items = self._difference_items(others)
+        if len(items) != len(self._items):
+            self._sorted_keys = None
+            self._drop_indexes()
+        self._items = items
+        self._shared = False
 
     # -------------------------------------------------------------------------
     def __isub__(self, *others):
         """Return the '-=' operator."""
         self.difference_update(*others)
+        return self
 
     # -------------------------------------------------------------------------
     def symmetric_difference_update(self, other):
@@ -642,18 +1137,16 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
             cls = self.__class__.__name__
             raise WrongCompareSetClassError(other, cls)
 
-        for item in self:
-            if item in other:
-                self.discard(item)
-
-        for item in other:
-            if item not in self:
-                self.add(item)
+        self._items = self._symmetric_difference_items(other)
+        self._sorted_keys = None
+        self._shared = False
+        self._drop_indexes()
 
     # -------------------------------------------------------------------------
     def __ixor__(self, other):
         """Return the '^=' operator."""
         self.symmetric_difference_update(other)
+        return self
 
     # -------------------------------------------------------------------------
     def remove(self, value):
@@ -666,15 +1159,23 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
         else:
             vals = [value]
 
-        for val in vals:
-            if not isinstance(val, str):
-                raise WrongItemTypeError(val)
-
-            ival = val.lower()
-            if ival in self._items:
-                del self._items[ival]
-            else:
-                raise KeyError(value)
+        self._detach()
+        removed_keys = []
+        try:
+            for val in vals:
+                if not isinstance(val, str):
+                    raise WrongItemTypeError(val)
+
+                ival = self.fold_key(val)
+                if ival in self._items:
+                    del self._items[ival]
+                    self._sorted_keys = None
+                    removed_keys.append(ival)
+                else:
+                    raise KeyError(value)
+        finally:
+            if removed_keys:
+                self._index_remove(removed_keys)
 
     # -------------------------------------------------------------------------
     def pop(self):
@@ -682,9 +1183,10 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
         if len(self) == 0:
             raise IndexError("pop() from empty list")
 
-        key = self._items.keys()[0]
-        value = self._items[key]
-        del self._items[key]
+        self._detach()
+        key, value = self._items.popitem()
+        self._sorted_keys = None
+        self._index_remove([key])
 
         return value
 
@@ -692,6 +1194,9 @@ class CIStringSet(MutableSet, FrozenCIStringSet):
     def clear(self):
         """Remove all elements from the set."""
         self._items = {}
+        self._sorted_keys = None
+        self._shared = False
+        self._drop_indexes()
 
 
 # =============================================================================
@@ -701,15 +1206,25 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
 
     The keys MUST be of type string!
     It works like a dict.
+
+    The keys are compared by their notation folded by the key normaliser in the
+    class property fold_key (str.lower by default), see KEY_NORMALISERS.
     """
 
+    fold_key = staticmethod(str.lower)
+
     # -------------------------------------------------------------------------
     def __init__(self, first_param=None, **kwargs):
         """Initialise a FrozenCIDict object.
 
-        Use the object dict.
+        The entries are stored in two parallel dicts, both indexed by the
+        folded key: self._map holds the values and self._real_keys holds
+        the keys in their original notation.
         """
         self._map = {}
+        self._real_keys = {}
+        self._shared = False
+        self._hash_value = None
 
         if first_param is not None:
 
@@ -728,21 +1243,66 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
         if kwargs:
             self._update_from_mapping(kwargs)
 
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Create a new dict from the given key-value pairs.
+
+        @param pairs: a mapping or an iterable (e.g. a list or a generator) of key-value pairs,
+                      the keys and values are taken in one pass.
+        @type pairs: Mapping or iterable
+
+        @return: the new dict
+        @rtype: FrozenCIDict
+        """
+        new_dict = cls()
+        new_dict._update_from_any(pairs)
+        return new_dict
+
+    # -------------------------------------------------------------------------
+    def _update_from_any(self, other):
+        """Update the entries from a mapping or from any iterable of key-value pairs."""
+        if isinstance(other, Mapping):
+            self._update_from_mapping(other)
+            return
+        if isinstance(other, (str, bytes)) or not hasattr(other, "__iter__"):
+            raise WrongUpdateClassError(other)
+        self._update_from_sequence(list(other))
+
+    # -------------------------------------------------------------------------
+    def _update_from_lists(self, keys, values):
+        """Update the entries from a list of keys and a list of according values."""
+        lkeys = _fold_all(keys, self.fold_key, WrongKeyTypeError)
+        self._real_keys.update(zip(lkeys, keys))
+        self._map.update(zip(lkeys, values))
+
     # -------------------------------------------------------------------------
     def _update_from_mapping(self, mapping):
 
-        for key in mapping.keys():
-            if not isinstance(key, str):
-                raise WrongKeyTypeError(key)
-            lkey = key.lower()
-            self._map[lkey] = {
-                "key": key,
-                "val": mapping[key],
-            }
+        if isinstance(mapping, FrozenCIDict) and mapping.fold_key is self.fold_key:
+            self._real_keys.update(mapping._real_keys)
+            self._map.update(mapping._map)
+            return
+
+        keys = list(mapping.keys())
+        self._update_from_lists(keys, list(map(mapping.__getitem__, keys)))
 
     # -------------------------------------------------------------------------
     def _update_from_sequence(self, sequence):
 
+        try:
+            keys = list(map(itemgetter(0), sequence))
+            values = list(map(itemgetter(1), sequence))
+        except (TypeError, IndexError):
+            # Going through all tokens to raise the appropriate exception
+            self._update_from_tokens(sequence)
+            return
+
+        self._update_from_lists(keys, values)
+
+    # -------------------------------------------------------------------------
+    def _update_from_tokens(self, sequence):
+
         for token in sequence:
             try:
                 key = token[0]
@@ -753,20 +1313,42 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
                 raise CIInitfromTupleError(token, str(e), self.__class__.__name__)
             if not isinstance(key, str):
                 raise WrongKeyTypeError(key)
-            lkey = key.lower()
-            self._map[lkey] = {
-                "key": key,
-                "val": value,
-            }
+            lkey = self.fold_key(key)
+            self._real_keys[lkey] = key
+            self._map[lkey] = value
 
     # -------------------------------------------------------------------------
     def __copy__(self):
-        """Return a copy of the current set."""
-        return self.__class__(self.dict())
+        """Return a copy of the current dict."""
+        return self.snapshot()
+
+    # -------------------------------------------------------------------------
+    def snapshot(self):
+        """Return a copy of the current dict, which shares the storage with it.
+
+        Creating a snapshot is O(1), the storage is copied not before the first
+        change of one of both dicts (copy-on-write).
+        """
+        new_dict = self.__class__()
+        new_dict._map = self._map
+        new_dict._real_keys = self._real_keys
+        new_dict._hash_value = self._hash_value
+        new_dict._shared = True
+        self._shared = True
+
+        return new_dict
+
+    # -------------------------------------------------------------------------
+    def _detach(self):
+        """Take a private copy of the storage before changing it, if it is shared."""
+        if self._shared:
+            self._map = dict(self._map)
+            self._real_keys = dict(self._real_keys)
+            self._shared = False
 
     # -------------------------------------------------------------------------
     def copy(self):
-        """Return a copy of the current set."""
+        """Return a copy of the current dict."""
         return self.__copy__()
 
     # -------------------------------------------------------------------------
@@ -774,11 +1356,10 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
         """Return an arbitrary item by the key."""
         if not isinstance(key, str):
             raise WrongKeyTypeError(key)
-        lkey = key.lower()
-        if lkey in self._map:
-            return self._map[lkey]["val"]
-
-        raise CaseInsensitiveKeyError(key)
+        try:
+            return self._map[self.fold_key(key)]
+        except KeyError:
+            raise CaseInsensitiveKeyError(key) from None
 
     # -------------------------------------------------------------------------
     def get(self, key):
@@ -854,17 +1435,82 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
         """Typecast into a regular dict."""
         return self.as_dict(pure=True)
 
+    # -------------------------------------------------------------------------
+    def __getstate__(self):
+        """Return the state for pickling: a list of the original keys and a list of values.
+
+        The folded keys are not stored, they are rebuilt on unpickling.
+        """
+        return (list(self._real_keys.values()), list(self._map.values()))
+
+    # -------------------------------------------------------------------------
+    def __setstate__(self, state):
+        """Restore the dict from a pickled state.
+
+        The plain instance dict, which was pickled by former versions, is accepted as well.
+
+        @raise CISerialisationError: if the numbers of keys and values differ
+        """
+        if isinstance(state, dict):
+            entries = list(state["_map"].values())
+            keys = [entry["key"] for entry in entries]
+            values = [entry["val"] for entry in entries]
+        else:
+            keys, values = state
+        if len(keys) != len(values):
+            msg = _("Got {k} keys, but {v} values.").format(k=len(keys), v=len(values))
+            raise CISerialisationError(self.__class__.__name__, msg)
+        self._map = {}
+        self._real_keys = {}
+        self._shared = False
+        self._hash_value = None
+        self._update_from_lists(keys, values)
+
+    # -------------------------------------------------------------------------
+    def to_bytes(self):
+        """Return a compact binary representation of the dict, e.g. for on-disk caches.
+
+        The values must be of types supported by the marshal module (e.g. None, bool,
+        numbers, str, bytes, tuples, lists, sets and dicts of them).
+
+        @raise CISerialisationError: if a value could not be serialised
+
+        @return: the binary representation, which can be restored by from_bytes()
+        @rtype: bytes
+        """
+        return _to_bytes(self, CI_BYTES_KIND_DICT, self.__getstate__())
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a new dict from the binary representation created by to_bytes().
+
+        @raise CISerialisationError: if the data could not be deserialised
+
+        @param data: the binary representation of a dict
+        @type data: bytes
+
+        @return: the new dict
+        @rtype: FrozenCIDict
+        """
+        state = _from_bytes(cls, CI_BYTES_KIND_DICT, data)
+        new_dict = cls()
+        try:
+            new_dict.__setstate__(state)
+        except (TypeError, ValueError) as e:
+            raise CISerialisationError(cls.__name__, str(e))
+        return new_dict
+
     # -------------------------------------------------------------------------
     def real_key(self, key):
         """Return the original notation of the given key."""
         if not isinstance(key, str):
             raise WrongKeyTypeError(key)
 
-        lkey = key.lower()
-        if lkey in self._map:
-            return self._map[lkey]["key"]
-
-        raise CaseInsensitiveKeyError(key)
+        try:
+            return self._real_keys[self.fold_key(key)]
+        except KeyError:
+            raise CaseInsensitiveKeyError(key) from None
 
     # -------------------------------------------------------------------------
     def __bool__(self):
@@ -879,14 +1525,14 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
         if not isinstance(key, str):
             raise WrongKeyTypeError(key)
 
-        if key.lower() in self._map:
+        if self.fold_key(key) in self._map:
             return True
         return False
 
     # -------------------------------------------------------------------------
     def keys(self):
         """Return a list with all keys in original notation."""
-        return list(map(lambda x: self._map[x]["key"], sorted(self._map.keys())))  # noqa: C417
+        return list(map(self._real_keys.__getitem__, sorted(self._real_keys)))
 
     # -------------------------------------------------------------------------
     def items(self):
@@ -894,23 +1540,23 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
 
         An item is a tuple, with the key in original notation and the value.
         """
-        item_list = []
-
-        for lkey in sorted(self._map.keys()):
-            key = self._map[lkey]["key"]
-            value = self._map[lkey]["val"]
-            item_list.append((key, value))
-
-        return item_list
+        lkeys = sorted(self._map)
+        return list(
+            zip(map(self._real_keys.__getitem__, lkeys), map(self._map.__getitem__, lkeys))
+        )
 
     # -------------------------------------------------------------------------
     def values(self):
         """Return a list with all values of the current dict."""
-        return list(map(lambda x: self._map[x]["val"], sorted(self._map.keys())))  # noqa: C417
+        return list(map(self._map.__getitem__, sorted(self._map)))
 
     # -------------------------------------------------------------------------
     def __eq__(self, other):
-        """Return the equality of current dict with another (the '=='-operator)."""
+        """Return the equality of current dict with another (the '=='-operator).
+
+        Dicts with different key normalisers are never equal, because their equality
+        would depend on the normaliser used for comparing and would not match the hash.
+        """
         if not isinstance(other, FrozenCIDict):
             return False
 
@@ -920,28 +1566,28 @@ class FrozenCIDict(Mapping, FbGenericBaseObject):
         if not isinstance(self, CIDict) and isinstance(other, CIDict):
             return False
 
-        if len(self) != len(other):
+        if other.fold_key is not self.fold_key:
             return False
 
-        # First compare keys
-        my_keys = []
-        other_keys = []
-
-        for key in self.keys():
-            my_keys.append(key.lower())
-
-        for key in other.keys():
-            other_keys.append(key.lower())
-
-        if my_keys != other_keys:
+        if len(self) != len(other):
             return False
 
-        # Now compare values
-        for key in self.keys():
-            if self[key] != other[key]:
+        if self._hash_value is not None and other._hash_value is not None:
+            if self._hash_value != other._hash_value:
                 return False
 
-        return True
+        return self._map == other._map
+
+    # -------------------------------------------------------------------------
+    def __hash__(self):
+        """Return the hash value of the dict.
+
+        It is computed from the folded keys and the values on the first call and then
+        cached, because the dict is immutable. All values must be hashable.
+        """
+        if self._hash_value is None:
+            self._hash_value = hash(frozenset(self._map.items()))
+        return self._hash_value
 
     # -------------------------------------------------------------------------
     def __ne__(self, other):
@@ -961,6 +1607,31 @@ class CIDict(MutableMapping, FrozenCIDict):
     It works like a dict.
     """
 
+    frozen_class = FrozenCIDict
+
+    # A mutable dict is not hashable
+    __hash__ = None
+
+    # -------------------------------------------------------------------------
+    def freeze(self):
+        """Return an immutable view of the current dict as an object of frozen_class.
+
+        The frozen dict shares the storage with the current dict, it is copied not before
+        the next change of the current dict. If frozen_class uses another key normaliser,
+        the keys have to be folded again.
+        """
+        frozen_class = self.frozen_class
+        if frozen_class.fold_key is not self.fold_key:
+            return frozen_class.from_pairs(self)
+
+        frozen = frozen_class()
+        frozen._map = self._map
+        frozen._real_keys = self._real_keys
+        frozen._shared = True
+        self._shared = True
+
+        return frozen
+
     # -------------------------------------------------------------------------
     # The next two methods are requirements of the ABC.
 
@@ -970,11 +1641,10 @@ class CIDict(MutableMapping, FrozenCIDict):
         if not isinstance(key, str):
             raise WrongKeyTypeError(key)
 
-        lkey = key.lower()
-        self._map[lkey] = {
-            "key": key,
-            "val": value,
-        }
+        lkey = self.fold_key(key)
+        self._detach()
+        self._real_keys[lkey] = key
+        self._map[lkey] = value
 
     # -------------------------------------------------------------------------
     def set(self, key, value):  # noqa: A003
@@ -990,11 +1660,13 @@ class CIDict(MutableMapping, FrozenCIDict):
         if not isinstance(key, str):
             raise WrongKeyTypeError(key)
 
-        lkey = key.lower()
+        lkey = self.fold_key(key)
         if lkey not in self._map:
             raise CaseInsensitiveKeyError(key)
 
+        self._detach()
         del self._map[lkey]
+        del self._real_keys[lkey]
 
     # -------------------------------------------------------------------------
     # The next methods aren't required, but nice for different purposes:
@@ -1011,16 +1683,15 @@ class CIDict(MutableMapping, FrozenCIDict):
             )
             raise TypeError(msg)
 
-        lkey = key.lower()
+        lkey = self.fold_key(key)
         if lkey not in self._map:
             if args:
                 return args[0]
             raise CaseInsensitiveKeyError(key)
 
-        val = self._map[lkey]["val"]
-        del self._map[lkey]
-
-        return val
+        self._detach()
+        del self._real_keys[lkey]
+        return self._map.pop(lkey)
 
     # -------------------------------------------------------------------------
     def popitem(self):
@@ -1028,16 +1699,16 @@ class CIDict(MutableMapping, FrozenCIDict):
         if not len(self._map):
             return None
 
-        key = self.keys()[0]
-        lkey = key.lower()
-        value = self[key]
-        del self._map[lkey]
-        return (key, value)
+        lkey = min(self._map)
+        self._detach()
+        return (self._real_keys.pop(lkey), self._map.pop(lkey))
 
     # -------------------------------------------------------------------------
     def clear(self):
         """Remove all items from the dict."""
         self._map = {}
+        self._real_keys = {}
+        self._shared = False
 
     # -------------------------------------------------------------------------
     def setdefault(self, key, default=None):
@@ -1054,6 +1725,7 @@ class CIDict(MutableMapping, FrozenCIDict):
     # -------------------------------------------------------------------------
     def update(self, other):
         """Update the current dict with the items of the other dict."""
+        self._detach()
         if isinstance(other, Mapping):
             self._update_from_mapping(other)
         elif other.__class__.__name__ == "zip":
@@ -1061,7 +1733,18 @@ class CIDict(MutableMapping, FrozenCIDict):
         elif is_sequence(other):
             self._update_from_sequence(other)
         else:
-            WrongUpdateClassError(other)
+            raise WrongUpdateClassError(other)
+
+    # -------------------------------------------------------------------------
+    def update_many(self, *others):
+        """Update the current dict with the entries of all given objects.
+
+        Each object may be a mapping or any iterable (e.g. a list or a generator) of
+        key-value pairs. The keys and values of each object are taken in one pass.
+        """
+        self._detach()
+        for other in others:
+            self._update_from_any(other)
 
 
 # =============================================================================
@@ -1 +0,0 @@
-colcts.py
\ No newline at end of file
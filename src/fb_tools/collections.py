@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@summary: An alias of the module fb_tools.colcts for backward compatibility.
+
+All names are resolved lazily (PEP 562) from fb_tools.colcts, so the collection classes
+are the same objects in both modules and the implementation is loaded only once.
+
+@author: Frank Brehm
+@contact: frank@brehm-online.com
+@copyright: © 2018 - 2026 by Frank Brehm, Berlin
+"""
+
+from __future__ import absolute_import
+
+# Standard modules
+import importlib
+
+
+# -----------------------------------------------------------------------------
+def _canonical_module():
+    """Return the canonical module fb_tools.colcts, it is imported on first access."""
+    return importlib.import_module(".colcts", __package__)
+
+
+# -----------------------------------------------------------------------------
+def __getattr__(name):
+    """Return the attribute of the given name from fb_tools.colcts."""
+    module = _canonical_module()
+    if name == "__all__":
+        value = [x for x in vars(module) if not x.startswith("_")]
+    else:
+        try:
+            value = getattr(module, name)
+        except AttributeError:
+            msg = "module {m!r} has no attribute {n!r}".format(m=__name__, n=name)
+            raise AttributeError(msg) from None
+    globals()[name] = value
+    return value
+
+
+# -----------------------------------------------------------------------------
+def __dir__():
+    """Return the names of all attributes of fb_tools.colcts."""
+    return sorted(set(globals()) | set(dir(_canonical_module())))
+
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4 list
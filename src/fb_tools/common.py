@@ -21,6 +21,7 @@ import re
 import shutil
 import string
 import sys
+from functools import lru_cache
 
 try:
     import pathlib
@@ -40,7 +41,7 @@ from . import DEFAULT_TERMINAL_HEIGHT, DEFAULT_TERMINAL_WIDTH
 from .errors import InvalidTimeIntervalError
 from .xlate import XLATOR
 
-__version__ = "2.2.0"
+__version__ = "2.3.0"
 
 _ = XLATOR.gettext
 
@@ -58,6 +59,11 @@ RE_DOT_AT_END = re.compile(r"(\.)*$")
 RE_DECIMAL = re.compile(r"^\d+$")
 RE_IPV4_PTR = re.compile(r"\.in-addr\.arpa\.$", re.IGNORECASE)
 RE_IPV6_PTR = re.compile(r"\.ip6\.arpa\.$", re.IGNORECASE)
+# A label of a FQDN starting with digits for fqdn_sort_key()
+RE_FQDN_LABEL_NUMBER = re.compile(r"(\d+)(.*)", re.DOTALL)
+
+# Maximum number of memoised results of fqdn_sort_key()
+FQDN_SORT_KEY_CACHE_SIZE = 2**16
 
 RE_MAC_ADRESS = re.compile(r"^(?:[0-9a-f]{2}:){5}[0-9a-f]{2}$", re.IGNORECASE)
 
@@ -96,6 +102,14 @@ RE_UNIT_EIBYTES = re.compile(r"^\s*Ei(?:B(?:yte)?)?\s*$", re.IGNORECASE)
 RE_UNIT_ZBYTES = re.compile(r"^\s*Z(?:B(?:yte)?)?\s*$", re.IGNORECASE)
 RE_UNIT_ZIBYTES = re.compile(r"^\s*Zi(?:B(?:yte)?)?\s*$", re.IGNORECASE)
 
+# All units of human2mbytes() in one pattern, the exponent of the factor is taken
+# from H2MB_UNIT_EXPONENTS by the lowercased prefix
+RE_UNIT_HUMAN = re.compile(r"^\s*([kmgtpez])?(i)?(?:b(?:yte)?)?\s*$", re.IGNORECASE)
+H2MB_UNIT_EXPONENTS = {"k": 1, "m": 2, "g": 3, "t": 4, "p": 5, "e": 6, "z": 7}
+
+B2H_PREFIXES_BIN = ("KiB", "MiB", "GiB", "TiB", "PiB", "EiB", "ZiB", "YiB")
+B2H_PREFIXES_SI = ("kB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
+
 DEBUG_TIMEINTERVAL2DELTA = False
 
 RE_UNIT_TIME_SECOND = re.compile(
@@ -110,6 +124,26 @@ RE_UNIT_TIME_WEEK = re.compile(r"\s*(\d+(?:\.\d*)?)\s*w(?:eeks?)?(?:\s*,)?", re.
 RE_UNIT_TIME_MONTH = re.compile(r"\s*(\d+(?:\.\d*)?)\s*mon(?:ths?)?(?:\s*,)?", re.IGNORECASE)
 RE_UNIT_TIME_YEAR = re.compile(r"\s*(\d+(?:\.\d*)?)\s*y(?:ears?)?(?:\s*,)?", re.IGNORECASE)
 
+# One token of a time interval for timeinterval2delta() with the units of the RE_UNIT_TIME_*
+# patterns above as groups 2 to 8, a token without a unit means seconds
+RE_TIME_INTERVAL_TOKEN = re.compile(
+    r"\s*(\d+(?:\.\d*)?)\s*(?:(y(?:ears?)?)|(mon(?:ths?)?)|(w(?:eeks?)?)|(d(?:ays?)?)"
+    r"|(h(?:ours?)?)|(m(?:in(?:utes?)?)?)|(s(?:ec(?:onds?)?)?))?(?:\s*,)?",
+    re.IGNORECASE,
+)
+# The names and the seconds of the units of RE_TIME_INTERVAL_TOKEN in the order of the groups
+TIME_INTERVAL_UNITS = (
+    ("years", 3600 * 24 * 365),
+    ("months", 3600 * 24 * 30),
+    ("weeks", 3600 * 24 * 7),
+    ("days", 3600 * 24),
+    ("hours", 3600),
+    ("minutes", 60),
+    ("seconds", 1),
+)
+# Maximum number of memoised results of timeinterval2delta()
+TIME_INTERVAL_CACHE_SIZE = 1024
+
 
 # =============================================================================
 def pp(
@@ -363,16 +397,15 @@ def is_sequence(arg):
 
 
 # =============================================================================
-def caller_search_path(*additional_paths):
-    """Build a search path for executables.
+def search_path_candidates(*additional_paths):
+    """Return all candidate directories of the search path for executables.
 
-    Builds a search path for executables from environment $PATH
-    including some standard paths.
+    These are the directories, which are checked by caller_search_path(), regardless
+    of whether they are existing or not, in the same order and without duplicates.
 
-    @return: all existing search paths
-    @rtype: list
+    @return: all candidate directories, as given, not resolved
+    @rtype: list of pathlib.Path
     """
-    path_list = []
     search_path = os.environ["PATH"]
     if not search_path:
         search_path = os.defpath
@@ -414,7 +447,22 @@ def caller_search_path(*additional_paths):
         if p not in search_path_list:
             search_path_list.append(p)
 
-    for d in search_path_list:
+    return search_path_list
+
+
+# =============================================================================
+def caller_search_path(*additional_paths):
+    """Build a search path for executables.
+
+    Builds a search path for executables from environment $PATH
+    including some standard paths.
+
+    @return: all existing search paths
+    @rtype: list
+    """
+    path_list = []
+
+    for d in search_path_candidates(*additional_paths):
         if not d.exists():
             continue
         if not d.is_dir():
@@ -428,7 +476,10 @@ def caller_search_path(*additional_paths):
 
 # =============================================================================
 def compare_fqdn(x, y):
-    """Compare FQDN-like objects."""
+    """Compare FQDN-like objects.
+
+    For sorting many FQDNs use fqdn_sort_key() as the key function instead.
+    """
     # LOG.debug("Comparing {!r} <=> {!r}.".format(x, y))
 
     # First check for None values
@@ -451,8 +502,8 @@ def compare_fqdn(x, y):
         return 1
 
     # Ensure a dot at end
-    xs = RE_DOT_AT_END.sub(".", xs)
-    ys = RE_DOT_AT_END.sub(".", ys)
+    xs = RE_DOT_AT_END.sub(".", xs, 1)
+    ys = RE_DOT_AT_END.sub(".", ys, 1)
 
     if xs == ys:
         return 0
@@ -512,59 +563,183 @@ def compare_fqdn_tokens(xs, ys):
     return 0
 
 
+# =============================================================================
+def fqdn_sort_key(name):
+    """
+    Return a key for sorting FQDN-like objects in the same order like compare_fqdn().
+
+    None values are sorted first, then empty FQDNs, then reverse IPv4 zones, then reverse
+    IPv6 zones and then all other FQDNs. They are compared by their labels from the last
+    to the first label, numeric labels are compared by their integer values.
+
+    Other than compare_fqdn() labels with leading digits (e.g. '10a') are compared by
+    the number first and then by the rest of the label, so the order is always
+    consistent. The keys are memoised in an LRU cache with FQDN_SORT_KEY_CACHE_SIZE
+    entries.
+
+    Usage: sorted(names, key=fqdn_sort_key)
+
+    @param name: the FQDN-like object to get the key for
+    @type name: str or object or None
+
+    @return: the sort key
+    @rtype: tuple
+    """
+    if name is None:
+        return (0,)
+    return _fqdn_sort_key(str(name).strip().lower())
+
+
+# =============================================================================
+@lru_cache(maxsize=FQDN_SORT_KEY_CACHE_SIZE)
+def _fqdn_sort_key(name):
+    """Return the sort key of the given stripped and lowercased FQDN."""
+    if name == "":
+        return (1,)
+
+    name = RE_DOT_AT_END.sub(".", name, 1)
+    if RE_IPV4_PTR.search(name):
+        zone_type = 0
+    elif RE_IPV6_PTR.search(name):
+        zone_type = 1
+    else:
+        zone_type = 2
+
+    labels = name.split(".")
+    labels.reverse()
+    keys = []
+    for label in labels[1:]:
+        m = RE_FQDN_LABEL_NUMBER.fullmatch(label)
+        if m:
+            keys.append((1, int(m[1]), m[2]))
+        elif label < "0":
+            keys.append((0, 0, label))
+        else:
+            keys.append((2, 0, label))
+
+    return (2, zone_type, tuple(keys))
+
+
+# =============================================================================
+def _ldap_value_str(value):
+    """Return the lowercased string of a single value of an LDAP attribute."""
+    if value.__class__ is str:
+        return value.lower()
+    if is_sequence(value):
+        if not len(value):
+            return ""
+        value = value[0]
+    if is_general_string(value):
+        return to_str(value).lower()
+    return str(value).lower()
+
+
+# =============================================================================
+def normalize_ldap_value(value):
+    """
+    Return the canonical form of a value of an LDAP attribute for comparing.
+
+    All values are converted into lowercased strings, the values of a multi-valued
+    attribute are sorted, so the order of them is not relevant. A single value and
+    a list with only this value have the same canonical form.
+
+    The result is hashable, so it can be used in sets or as a key of a dict,
+    e.g. for caching the canonical forms of often compared values.
+
+    @param value: the value of an LDAP attribute
+    @type value: str or bytes or object or list
+
+    @return: the sorted normalised values
+    @rtype: tuple of str
+    """
+    if value.__class__ is str:
+        return (value.lower(),)
+    if is_sequence(value):
+        return tuple(sorted([_ldap_value_str(val) for val in value]))
+    return (_ldap_value_str(value),)
+
+
 # =============================================================================
 def compare_ldap_values(first, second):
     """Compare objects, which are originated as values of LDAP entries."""
+    return normalize_ldap_value(first) == normalize_ldap_value(second)
 
-    def _to_str_single(value):
-
-        if is_sequence(value):
-            if is_general_string(value[0]):
-                return to_str(value[0]).lower()
-            return str(value[0]).lower()
-        if is_general_string(value):
-            return to_str(value).lower()
-        return str(value).lower()
-
-    if is_sequence(first) and not is_sequence(second):
-        if len(first) == 1:
-            str_first = _to_str_single(first)
-            str_second = _to_str_single(second)
-            if str_first == str_second:
-                return True
-        return False
 
-    if is_sequence(second) and not is_sequence(first):
-        if len(second) == 1:
-            str_first = _to_str_single(first)
-            str_second = _to_str_single(second)
-            if str_first == str_second:
-                return True
-        return False
+# =============================================================================
+def diff_ldap_entries(old, new):
+    """
+    Return all changed attributes between two LDAP entries.
 
-    if not is_sequence(first):
-        # second is also not an array at this point
-        str_first = _to_str_single(first)
-        str_second = _to_str_single(second)
-        if str_first == str_second:
-            return True
-        return False
+    The names of the attributes are compared case insensitive, the values like by
+    compare_ldap_values(). A missing attribute or a value of None are equal
+    to an empty list of values.
 
-    # Both parameters are arays
-    if len(first) != len(second):
-        return False
-    first_array = []
-    for val in first:
-        first_array.append(_to_str_single(val))
-    first_array.sort()
-    second_array = []
-    for val in second:
-        second_array.append(_to_str_single(val))
-    second_array.sort()
-
-    if first_array == second_array:
-        return True
-    return False
+    @param old: the attributes of the old entry, None for a new entry
+    @type old: dict or None
+    @param new: the attributes of the new entry, None for a removed entry
+    @type new: dict or None
+
+    @return: the changed attributes with the name of the new entry (or of the old one,
+             if removed) as the key and a tuple of the old and the new value
+             (None if missing) as the value.
+    @rtype: dict
+    """
+    def _normalize(value):
+        if value is None:
+            return ()
+        return normalize_ldap_value(value)
+
+    old_attributes = {}
+    if old is not None:
+        for (name, value) in old.items():
+            old_attributes[name.lower()] = (name, value)
+
+    changes = {}
+    if new is not None:
+        for (name, value) in new.items():
+            (old_name, old_value) = old_attributes.pop(name.lower(), (name, None))
+            if _normalize(old_value) != _normalize(value):
+                changes[name] = (old_value, value)
+
+    for (name, value) in old_attributes.values():
+        if _normalize(value):
+            changes[name] = (value, None)
+
+    return changes
+
+
+# =============================================================================
+def _update_locale_data():
+    """Update the locale dependend patterns of human2mbytes() and bytes2human().
+
+    The current decimal radix and separator character for thousands are checked,
+    the patterns are compiled again only after a change of the locale settings.
+    """
+    global CUR_RADIX
+    global H2MB_PAT
+    global H2MB_RE
+    global RADIX_RE
+    global CUR_THOUSEP
+    global THOUSEP_RE
+
+    c_radix = locale.nl_langinfo(locale.RADIXCHAR)
+    c_thousep = locale.nl_langinfo(locale.THOUSEP)
+    if c_thousep != CUR_THOUSEP:
+        CUR_THOUSEP = c_thousep
+        # log.debug("Current separator character for thousands is now %r.",
+        #         CUR_THOUSEP)
+        THOUSEP_RE = re.compile(re.escape(CUR_THOUSEP))
+
+    if c_radix != CUR_RADIX:
+        CUR_RADIX = c_radix
+        # log.debug("Current decimal radix is now %r.", CUR_RADIX)
+        H2MB_PAT = r"^\s*\+?(\d+(?:" + re.escape(CUR_RADIX) + r"\d*)?)\s*(\S+)?"
+        if CUR_THOUSEP:
+            H2MB_PAT = r"^\s*\+?(\d+(?:" + re.escape(CUR_THOUSEP) + r"\d+)*(?:"
+            H2MB_PAT += re.escape(CUR_RADIX) + r"\d*)?)\s*(\S+)?"
+        H2MB_RE = re.compile(H2MB_PAT)
+        RADIX_RE = re.compile(re.escape(CUR_RADIX))
+    # log.debug("Current pattern: %r", H2MB_PAT)
 
 
 # =============================================================================
@@ -598,48 +773,62 @@ def human2mbytes(value, si_conform=False, as_float=False):
     @rtype:  int or float
 
     """
-    if value is None:
-        msg = _("Given value is {!r}.").format(None)
-        raise ValueError(msg)
+    _update_locale_data()
+    return _human2mbytes(value, si_conform=si_conform, as_float=as_float)
 
-    radix = "."
-    radix = re.escape(radix)
 
-    c_radix = locale.nl_langinfo(locale.RADIXCHAR)
-    global CUR_RADIX
-    global H2MB_PAT
-    global H2MB_RE
-    global RADIX_RE
-    global CUR_THOUSEP
-    global THOUSEP_RE
+# =============================================================================
+def human2mbytes_many(values, si_conform=False, as_float=False, as_array=False):
+    """
+    Convert all given human readable byte values (e.g. the sizes of a df output).
 
-    c_thousep = locale.nl_langinfo(locale.THOUSEP)
-    if c_thousep != CUR_THOUSEP:
-        CUR_THOUSEP = c_thousep
-        # log.debug("Current separator character for thousands is now %r.",
-        #         CUR_THOUSEP)
-        THOUSEP_RE = re.compile(re.escape(CUR_THOUSEP))
+    It's the same like human2mbytes() for every value, but the locale settings are
+    evaluated only once.
 
-    if c_radix != CUR_RADIX:
-        CUR_RADIX = c_radix
-        # log.debug("Current decimal radix is now %r.", CUR_RADIX)
-        H2MB_PAT = r"^\s*\+?(\d+(?:" + re.escape(CUR_RADIX) + r"\d*)?)\s*(\S+)?"
-        if CUR_THOUSEP:
-            H2MB_PAT = r"^\s*\+?(\d+(?:" + re.escape(CUR_THOUSEP) + r"\d+)*(?:"
-            H2MB_PAT += re.escape(CUR_RADIX) + r"\d*)?)\s*(\S+)?"
-        H2MB_RE = re.compile(H2MB_PAT)
-        RADIX_RE = re.compile(re.escape(CUR_RADIX))
-    # log.debug("Current pattern: %r", H2MB_PAT)
+    @raise ValueError: on an invalid value
+
+    @param values: the values to convert
+    @type values: iterable of str
+    @param si_conform: use factor 1000 instead of 1024 for kB a.s.o.
+    @type si_conform: bool
+    @param as_float: flag to gives back the values as float values
+                     instead of integer values
+    @type as_float: bool
+    @param as_array: gives back a numpy array instead of a list, numpy must be installed
+    @type as_array: bool
+
+    @return: amounts of MibiBytes
+    @rtype:  list or numpy.ndarray
+
+    """
+    if as_array:
+        try:
+            import numpy
+        except ImportError:
+            msg = _("Module {!r} is not installed.").format("numpy")
+            raise RuntimeError(msg)
+
+    _update_locale_data()
+    result = [_human2mbytes(value, si_conform=si_conform, as_float=as_float) for value in values]
+
+    if as_array:
+        return numpy.array(result)
+    return result
+
+
+# =============================================================================
+def _human2mbytes(value, si_conform=False, as_float=False):
+    """Convert the given human readable byte value with the current locale patterns."""
+    if value is None:
+        msg = _("Given value is {!r}.").format(None)
+        raise ValueError(msg)
 
-    value_raw = ""
-    unit = None
     match = H2MB_RE.search(value)
-    if match is not None:
-        value_raw = match.group(1)
-        unit = match.group(2)
-    else:
+    if match is None:
         msg = _("Could not determine bytes in {!r}.").format(value)
         raise ValueError(msg)
+    value_raw = match.group(1)
+    unit = match.group(2)
 
     if CUR_THOUSEP:
         value_raw = THOUSEP_RE.sub("", value_raw)
@@ -654,10 +843,6 @@ def human2mbytes(value, si_conform=False, as_float=False):
     if not si_conform:
         factor_si = factor_bin
 
-    # LOG.debug("factor_bin: {b!r}, factor_si: {s!r}".format(b=factor_bin, s=factor_si))
-
-    factor = 1
-
     final_factor = 1024 * 1024
 
     while int(value_float) != value_float:
@@ -667,67 +852,46 @@ def human2mbytes(value, si_conform=False, as_float=False):
 
     factor = _get_factor_human2bytes(unit, factor_bin, factor_si)
 
-    # LOG.debug("Using factor {fa!r}, final factor: {fi!r}.".format(fa=factor, fi=final_factor))
-    # LOG.debug("Cur value_long = {!r}.".format(value_long))
-
     lbytes = factor * value_long
-    # LOG.debug("Cur long bytes: {!r}.".format(lbytes))
     mbytes = lbytes / final_factor
     if as_float:
         return float(mbytes)
     if mbytes <= sys.maxsize:
         return int(mbytes)
     return mbytes
-    if mbytes != int(mbytes):
-        raise ValueError(
-            "int {integer!r} != long {long!r}.".format(integer=int(mbytes), long=mbytes)
-        )
 
-    mbytes = int(mbytes)
 
-    return mbytes
+# =============================================================================
+def _get_factor_human2bytes(unit, factor_bin, factor_si):
+
+    (exponent, binary) = _get_unit_human2bytes(unit)
+    if binary:
+        return factor_bin**exponent
+    return factor_si**exponent
 
 
 # =============================================================================
-def _get_factor_human2bytes(unit, factor_bin, factor_si):
+@lru_cache(maxsize=256)
+def _get_unit_human2bytes(unit):
+    """Return the exponent of the factor of the given unit and whether it is binary.
 
-    factor = 1
-
-    if RE_UNIT_BYTES.search(unit):
-        factor = 1
-    elif RE_UNIT_KBYTES.search(unit):
-        factor = factor_si
-    elif RE_UNIT_KIBYTES.search(unit):
-        factor = factor_bin
-    elif RE_UNIT_MBYTES.search(unit):
-        factor = factor_si * factor_si
-    elif RE_UNIT_MIBYTES.search(unit):
-        factor = factor_bin * factor_bin
-    elif RE_UNIT_GBYTES.search(unit):
-        factor = factor_si**3
-    elif RE_UNIT_GIBYTES.search(unit):
-        factor = factor_bin**3
-    elif RE_UNIT_TBYTES.search(unit):
-        factor = factor_si**4
-    elif RE_UNIT_TIBYTES.search(unit):
-        factor = factor_bin**4
-    elif RE_UNIT_PBYTES.search(unit):
-        factor = factor_si**5
-    elif RE_UNIT_PIBYTES.search(unit):
-        factor = factor_bin**5
-    elif RE_UNIT_EBYTES.search(unit):
-        factor = factor_si**6
-    elif RE_UNIT_EIBYTES.search(unit):
-        factor = factor_bin**6
-    elif RE_UNIT_ZBYTES.search(unit):
-        factor = factor_si**7
-    elif RE_UNIT_ZIBYTES.search(unit):
-        factor = factor_bin**7
-    else:
-        msg = _("Couldn't detect unit {!r}.").format(unit)
-        raise ValueError(msg)
+    The units are the same as of the patterns RE_UNIT_BYTES to RE_UNIT_ZIBYTES,
+    but they are evaluated by one pattern and a lookup in H2MB_UNIT_EXPONENTS.
+    """
+    match = RE_UNIT_HUMAN.search(unit)
+    if match:
+        (prefix, binary) = match.groups()
+        if prefix is None:
+            if not binary:
+                return (0, False)
+        elif prefix == "K":
+            # 'K', 'KB' and 'KiB' are all binary
+            return (1, True)
+        elif prefix != "k" or not binary:
+            return (H2MB_UNIT_EXPONENTS[prefix.lower()], bool(binary))
 
-    return factor
+    msg = _("Couldn't detect unit {!r}.").format(unit)
+    raise ValueError(msg)
 
 
 # =============================================================================
@@ -753,6 +917,47 @@ def bytes2human(value, si_conform=False, precision=None, format_str="{value} {un
     @return: the value in a human readable format together with the unit
     @rtype: str
 
+    """
+    _update_locale_data()
+    return _bytes2human(value, si_conform=si_conform, precision=precision, format_str=format_str)
+
+
+# =============================================================================
+def bytes2human_many(values, si_conform=False, precision=None, format_str="{value} {unit}"):
+    """
+    Convert all given values in bytes into a human readable format.
+
+    It's the same like bytes2human() for every value, but the locale settings are
+    evaluated only once.
+
+    @param values: the values to convert, it may be also a numpy array
+    @type values: iterable of int
+    @param si_conform: use factor 1000 instead of 1024 for kB a.s.o.,
+                       if do so, than the units are for example MB instead MiB.
+    @type si_conform: bool
+    @param precision: how many digits after the decimal point have to stay
+                      in the result
+    @type precision: int
+    @param format_str: a format string to format the results.
+    @type format_str: str
+
+    @return: the values in a human readable format together with the unit
+    @rtype: list of str
+
+    """
+    _update_locale_data()
+    return [
+        _bytes2human(value, si_conform=si_conform, precision=precision, format_str=format_str)
+        for value in values
+    ]
+
+
+# =============================================================================
+def _bytes2human(value, si_conform=False, precision=None, format_str="{value} {unit}"):
+    """Convert the given value in bytes with the current decimal radix CUR_RADIX.
+
+    The formatting is the same like by locale.format_string() without grouping,
+    but without evaluating the locale settings again.
     """
     val = int(value)
 
@@ -760,28 +965,10 @@ def bytes2human(value, si_conform=False, precision=None, format_str="{value} {un
         return format_str.format(value="0", unit="Bytes")
 
     base = 1024
-    prefixes = {
-        1: "KiB",
-        2: "MiB",
-        3: "GiB",
-        4: "TiB",
-        5: "PiB",
-        6: "EiB",
-        7: "ZiB",
-        8: "YiB",
-    }
+    prefixes = B2H_PREFIXES_BIN
     if si_conform:
         base = 1000
-        prefixes = {
-            1: "kB",
-            2: "MB",
-            3: "GB",
-            4: "TB",
-            5: "PB",
-            6: "EB",
-            7: "ZB",
-            8: "YB",
-        }
+        prefixes = B2H_PREFIXES_SI
 
     exponent = 0
 
@@ -790,26 +977,21 @@ def bytes2human(value, si_conform=False, precision=None, format_str="{value} {un
         float_val /= base
         exponent += 1
 
-    unit = ""
     if not exponent:
-        precision = None
         unit = "Bytes"
         if val == 1:
             unit = "Byte"
-        value_str = locale.format_string("%d", val)
-        return format_str.format(value=value_str, unit=unit)
+        return format_str.format(value="%d" % val, unit=unit)
 
-    unit = prefixes[exponent]
-    value_str = ""
+    unit = prefixes[exponent - 1]
     if precision is None:
-        value_str = locale.format_string("%f", float_val)
+        value_str = "%f" % float_val
         value_str = RE_B2H_FINAL_ZEROES.sub("", value_str)
         value_str = RE_B2H_FINAL_SIGNS.sub("", value_str)
     else:
-        value_str = locale.format_string("%.*f", (precision, float_val))
-
-    if not exponent:
-        return value_str
+        value_str = "%.*f" % (precision, float_val)
+    if CUR_RADIX != ".":
+        value_str = value_str.replace(".", CUR_RADIX)
 
     return format_str.format(value=value_str, unit=unit)
 
@@ -912,6 +1094,7 @@ def timeinterval2delta(interval):
 
     The interval may consists of tokens of float values with a measurement unit.
     If a token is a float value without a measurement unit, then seconds are assumed.
+    Every measurement unit may be used only once.
     Valid measurement units (as regular expressions) are:
     * 's(ec(onds?)?)?'
     * 'm(in(utes?)?)?' == 60 seconds
@@ -921,6 +1104,9 @@ def timeinterval2delta(interval):
     * 'mon(ths?)?' == 3600 * 24 * 30 seconds
     * 'y(ears?)?' == 3600 * 24 * 365 seconds
 
+    The interval is parsed in one pass by RE_TIME_INTERVAL_TOKEN, the results of the
+    last TIME_INTERVAL_CACHE_SIZE different intervals are memoised.
+
     @raise InvalidTimeIntervalError: if the interval could not be interpreted
     """
     if interval is None:
@@ -929,99 +1115,72 @@ def timeinterval2delta(interval):
     if intrvl == "":
         raise InvalidTimeIntervalError(interval)
 
-    seconds = 0
-
     if DEBUG_TIMEINTERVAL2DELTA:
-        LOG.debug("Start value: {!r}".format(intrvl))
+        # Not memoised to get the debug messages
+        delta = _parse_time_interval.__wrapped__(intrvl)
+    else:
+        delta = _parse_time_interval(intrvl)
+    if delta is None:
+        raise InvalidTimeIntervalError(interval)
+    return delta
 
-    m = RE_UNIT_TIME_YEAR.search(intrvl)
-    if m:
-        years = float(m[1])
-        intrvl = RE_UNIT_TIME_YEAR.sub("", intrvl, 1)
-        seconds += years * 3600 * 24 * 365
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After year: match {m!r}, years {y!r}, new value {i!r}, new secs {s}.".format(
-                    m=m[1], y=years, i=intrvl, s=seconds
-                )
-            )
 
-    m = RE_UNIT_TIME_MONTH.search(intrvl)
-    if m:
-        months = float(m[1])
-        intrvl = RE_UNIT_TIME_MONTH.sub("", intrvl, 1)
-        seconds += months * 3600 * 24 * 30
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After months: match {m!r}, months {mo!r}, new value {i!r}, new secs {s}.".format(
-                    m=m[1], mo=months, i=intrvl, s=seconds
-                )
-            )
+# =============================================================================
+def timeintervals2deltas(intervals):
+    """
+    Convert all given textual time intervals into datetime.timeinterval objects.
 
-    m = RE_UNIT_TIME_WEEK.search(intrvl)
-    if m:
-        weeks = float(m[1])
-        intrvl = RE_UNIT_TIME_WEEK.sub("", intrvl, 1)
-        seconds += weeks * 3600 * 24 * 7
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After weeks: match {m!r}, weeks {w!r}, new value {i!r}, new secs {s}.".format(
-                    m=m[1], w=weeks, i=intrvl, s=seconds
-                )
-            )
+    See timeinterval2delta() for the format of the intervals.
 
-    m = RE_UNIT_TIME_DAY.search(intrvl)
-    if m:
-        days = float(m[1])
-        intrvl = RE_UNIT_TIME_DAY.sub("", intrvl, 1)
-        seconds += days * 3600 * 24
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After days: match {m!r}, days {d!r}, new value {i!r}, new secs {s}.".format(
-                    m=m[1], d=days, i=intrvl, s=seconds
-                )
-            )
+    @raise InvalidTimeIntervalError: if an interval could not be interpreted
 
-    m = RE_UNIT_TIME_HOUR.search(intrvl)
-    if m:
-        hours = float(m[1])
-        intrvl = RE_UNIT_TIME_HOUR.sub("", intrvl, 1)
-        seconds += hours * 3600
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After hours: match {m!r}, hours {h!r}, new value {i!r}, new secs {s}.".format(
-                    m=m[1], h=hours, i=intrvl, s=seconds
-                )
-            )
+    @param intervals: the time intervals to convert
+    @type intervals: iterable
 
-    m = RE_UNIT_TIME_MINUTE.search(intrvl)
-    if m:
-        minutes = float(m[1])
-        intrvl = RE_UNIT_TIME_MINUTE.sub("", intrvl, 1)
-        seconds += minutes * 60
-        if DEBUG_TIMEINTERVAL2DELTA:
-            LOG.debug(
-                "After minutes: match {m!r}, minutes {mi!r}, new value {i!r}, "
-                "new secs {s}.".format(m=m[1], mi=minutes, i=intrvl, s=seconds)
-            )
+    @return: the converted time intervals
+    @rtype: list of datetime.timedelta
+    """
+    return [timeinterval2delta(interval) for interval in intervals]
+
+
+# =============================================================================
+@lru_cache(maxsize=TIME_INTERVAL_CACHE_SIZE)
+def _parse_time_interval(intrvl):
+    """Convert the given stripped textual time interval into a datetime.timedelta object.
+
+    @return: the time interval or None, if it is invalid
+    @rtype: datetime.timedelta or None
+    """
+    if DEBUG_TIMEINTERVAL2DELTA:
+        LOG.debug("Start value: {!r}".format(intrvl))
 
-    m = RE_UNIT_TIME_SECOND.search(intrvl)
-    if m:
-        secs = float(m[1])
-        intrvl = RE_UNIT_TIME_SECOND.sub("", intrvl, 1)
-        seconds += secs
+    values = [None] * len(TIME_INTERVAL_UNITS)
+    pos = 0
+    length = len(intrvl)
+    while pos < length:
+        m = RE_TIME_INTERVAL_TOKEN.match(intrvl, pos)
+        if not m:
+            return None
+        index = m.lastindex - 2 if m.lastindex > 1 else len(TIME_INTERVAL_UNITS) - 1
+        if values[index] is not None:
+            # Every unit only once
+            return None
+        values[index] = float(m[1])
+        pos = m.end()
         if DEBUG_TIMEINTERVAL2DELTA:
             LOG.debug(
-                "After seconds: match {m!r}, seconds {se!r}, new value {i!r}, "
-                "new secs {s}.".format(m=m[1], se=secs, i=intrvl, s=seconds)
+                "Found {u}: match {m!r}, rest of value {i!r}.".format(
+                    u=TIME_INTERVAL_UNITS[index][0], m=m[0], i=intrvl[pos:]
+                )
             )
 
-    intrvl = intrvl.strip()
-    if DEBUG_TIMEINTERVAL2DELTA:
-        LOG.debug("Final value: {i!r}, seconds at last: {s}".format(i=intrvl, s=seconds))
-    if intrvl != "":
-        raise InvalidTimeIntervalError(interval)
+    seconds = 0
+    for (value, (_unit, factor)) in zip(values, TIME_INTERVAL_UNITS):
+        if value is not None:
+            seconds += value * factor
 
+    if DEBUG_TIMEINTERVAL2DELTA:
+        LOG.debug("Seconds at last: {}".format(seconds))
     return datetime.timedelta(seconds=seconds)
 
 
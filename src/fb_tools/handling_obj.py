@@ -11,7 +11,6 @@
 from __future__ import absolute_import
 
 # Standard modules
-import copy
 import datetime
 import errno
 import getpass
@@ -58,7 +57,7 @@ import six
 # Own modules
 from . import DEFAULT_TERMINAL_HEIGHT, DEFAULT_TERMINAL_WIDTH
 from .common import caller_search_path, encode_or_bust, pp, to_bool, to_str
-from .common import indent, is_sequence
+from .common import indent, is_sequence, search_path_candidates
 from .errors import AbortAppError
 from .errors import ExitAppError
 from .errors import InterruptError
@@ -69,7 +68,7 @@ from .errors import WriteTimeoutError
 from .obj import FbBaseObject
 from .xlate import XLATOR, format_list
 
-__version__ = "2.4.8"
+__version__ = "2.5.0"
 LOG = logging.getLogger(__name__)
 
 _ = XLATOR.gettext
@@ -79,6 +78,72 @@ DEFAULT_FILEIO_TIMEOUT = 2
 DEFAULT_PROMPT_TIMEOUT = 30
 DEFAULT_MAX_PROMPT_TIMEOUT = 600
 
+# Process-wide caches of HandlingObject.get_command(), see clear_command_cache()
+SEARCH_PATH_CACHE_SIZE = 32
+COMMAND_CACHE_SIZE = 1024
+_SEARCH_PATH_CACHE = {}
+_COMMAND_CACHE = {}
+
+
+# =============================================================================
+def clear_command_cache():
+    """Clear the process-wide cache of the commands found by HandlingObject.get_command().
+
+    The cached results are invalidated automatically, if $PATH, the existence or the
+    modification time of a candidate directory of the search path is changed. It must be
+    cleared only, if e.g. a command was replaced on a file system with a coarse resolution
+    of modification times.
+    """
+    _SEARCH_PATH_CACHE.clear()
+    _COMMAND_CACHE.clear()
+
+
+# =============================================================================
+def _cache_store(cache, key, value, max_size):
+    """Store the value in the given cache, evicting the oldest entries, if it is full."""
+    cache.pop(key, None)
+    while len(cache) >= max_size:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+# =============================================================================
+def _get_search_path(additional_paths):
+    """Return the cached result of caller_search_path() for the current $PATH.
+
+    The cache key consists of all candidate directories of the search path, including
+    the missing ones, and of the current working directory, if one of them is relative.
+    The search path is rebuilt, if a candidate directory was created, removed or
+    modified since then.
+
+    @return: the cache key, the search path and the modification times of all
+             candidate directories (None for missing ones)
+    @rtype: tuple
+    """
+    candidates = tuple(search_path_candidates(*additional_paths))
+    key = candidates
+    if not all(d.is_absolute() for d in candidates):
+        key += (os.getcwd(),)
+    dir_mtimes = _get_dir_mtimes(candidates)
+    cached = _SEARCH_PATH_CACHE.get(key)
+    if cached is not None and cached[0] == dir_mtimes:
+        return (key, cached[1], dir_mtimes)
+    search_path = tuple(caller_search_path(*additional_paths))
+    _cache_store(_SEARCH_PATH_CACHE, key, (dir_mtimes, search_path), SEARCH_PATH_CACHE_SIZE)
+    return (key, search_path, dir_mtimes)
+
+
+# =============================================================================
+def _get_dir_mtimes(search_path):
+    """Return the modification times of the given directories, None for missing ones."""
+    mtimes = []
+    for d in search_path:
+        try:
+            mtimes.append(os.stat(str(d)).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
 
 # =============================================================================
 class ProcessCommunicationTimeout(IoTimeoutError, SubprocessError):
@@ -624,6 +689,10 @@ class HandlingObject(FbBaseObject):
         If the command is given as an absolute path, it check the existence
         of this command.
 
+        The results of relative commands are kept in a process-wide cache until $PATH,
+        the existence or the modification time of a candidate directory of the search path
+        is changed (see clear_command_cache()).
+
         @param cmd: the command to search
         @type cmd: str
         @param quiet: No warning message, if the command could not be found, only a debug message
@@ -655,12 +724,39 @@ class HandlingObject(FbBaseObject):
                 return cmd.resolve()
             return cmd
 
-        additional_paths = []
+        additional_paths = ()
         if self.add_search_paths and is_sequence(self.add_search_paths):
-            additional_paths = copy.copy(self.add_search_paths)
+            additional_paths = tuple(str(d) for d in self.add_search_paths)
 
         # Checking a relative path
-        for d in caller_search_path(*additional_paths):
+        (search_key, search_path, dir_mtimes) = _get_search_path(additional_paths)
+        cache_key = (str(cmd), search_key, bool(resolve))
+        cached = _COMMAND_CACHE.get(cache_key)
+        if cached is not None and cached[0] == dir_mtimes:
+            found = cached[1]
+            if self.verbose > 2:
+                LOG.debug("Found {c!r} in cache: {p!r}.".format(c=str(cmd), p=str(found)))
+        else:
+            found = self._search_command(cmd, search_path, resolve)
+            _cache_store(_COMMAND_CACHE, cache_key, (dir_mtimes, found), COMMAND_CACHE_SIZE)
+
+        if found is not None:
+            return found
+
+        # command not found, sorry
+        msg = _("Command {!r} not found.").format(str(cmd))
+        if quiet:
+            if self.verbose > 2:
+                LOG.debug(msg)
+        else:
+            LOG.warning(msg)
+
+        return None
+
+    # -------------------------------------------------------------------------
+    def _search_command(self, cmd, search_path, resolve=False):
+        """Search the given relative command in the directories of the given search path."""
+        for d in search_path:
             if self.verbose > 3:
                 LOG.debug(_("Searching command in {!r} ...").format(str(d)))
             p = d / cmd
@@ -674,16 +770,28 @@ class HandlingObject(FbBaseObject):
                 else:
                     LOG.debug(_("Command {!r} is not executable.").format(str(p)))
 
-        # command not found, sorry
-        msg = _("Command {!r} not found.").format(str(cmd))
-        if quiet:
-            if self.verbose > 2:
-                LOG.debug(msg)
-        else:
-            LOG.warning(msg)
-
         return None
 
+    # -------------------------------------------------------------------------
+    def prewarm_commands(self, commands, resolve=False):
+        """
+        Search the given commands upfront to fill the process-wide cache of get_command().
+
+        Commands, which could not be found, are logged only as debug messages.
+
+        @param commands: the commands to search
+        @type commands: iterable of str
+        @param resolve: Resolving the paths to the executables by resolving any symlinks.
+        @type resolve: bool
+
+        @return: the found paths of the commands, None for not found commands
+        @rtype: dict
+        """
+        result = {}
+        for cmd in commands:
+            result[cmd] = self.get_command(cmd, quiet=True, resolve=resolve)
+        return result
+
     # -------------------------------------------------------------------------
     def run(self, *popenargs, **kwargs):
         """
@@ -12,29 +12,59 @@ from __future__ import absolute_import
 
 # Standard modules
 import copy
+import io
 import logging
 import re
+import sys
+import weakref
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
+from types import MappingProxyType
 
 try:
-    from collections.abc import MutableSequence
+    from collections.abc import Mapping, MutableSequence
 except ImportError:
-    from collections import MutableSequence
+    from collections import Mapping, MutableSequence
 
 # Third party modules
 import six
 
 # Own modules
+from .colcts import idna_key
 from .common import is_sequence, pp, to_bool, to_str
 from .errors import EmptyMailAddressError
 from .errors import InvalidMailAddressError
 from .obj import FbBaseObject, FbGenericBaseObject
 from .xlate import XLATOR, format_list
 
-__version__ = "2.1.3"
+__version__ = "2.3.0"
 LOG = logging.getLogger(__name__)
 
 _ = XLATOR.gettext
 
+# Maximum number of memoised results of parsing raw address strings
+ADDRESS_CACHE_SIZE = 2**18
+
+# All interned address objects, see MailAddress.intern()
+_INTERNED_ADDRESSES = weakref.WeakValueDictionary()
+
+# Length limits of RFC 5321 for the pre-filter of MailAddress.validate_many()
+MAX_ADDRESS_LENGTH = 254
+MAX_LOCAL_PART_LENGTH = 64
+
+# Number of addresses validated at once by a worker process of MailAddress.validate_many()
+VALIDATE_CHUNK_SIZE = 10000
+
+# Number of characters read at once from a stream by parse_address_list()
+READ_CHUNK_SIZE = 2**16
+
+# Maximum length of a single address (with its name) in an address list of a stream
+MAX_ADDRESS_TOKEN_LENGTH = 2048
+
 
 # =============================================================================
 def convert_attr(value):
@@ -44,10 +74,98 @@ def convert_attr(value):
     return value
 
 
+# =============================================================================
+def _ascii_domain(domain):
+    """Return the given domain in its ASCII compatible IDNA encoding (e.g. 'xn--...').
+
+    The conversion is done and memoised by fb_tools.colcts.idna_key(), so the cache is shared
+    with the case insensitive collections. Invalid domains are not converted into ASCII.
+    """
+    if not isinstance(domain, str) or domain.isascii():
+        return domain
+    return idna_key(domain)
+
+
+# =============================================================================
+def _ascii_address(address):
+    """Return the given raw address with its domain converted by _ascii_domain().
+
+    The domain is taken from the last '@' up to the next whitespace or angle bracket, so
+    a raw full qualified address with a name may be given.
+    """
+    if not isinstance(address, str) or address.isascii():
+        return address
+    pos = address.rfind("@") + 1
+    if not pos:
+        return address
+    end = pos
+    while end < len(address) and address[end] not in " \t\r\n<>":
+        end += 1
+    return address[:pos] + _ascii_domain(address[pos:end]) + address[end:]
+
+
+# =============================================================================
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _unicode_domain(domain):
+    """Return the given ASCII domain with all IDNA encoded labels decoded to Unicode."""
+    if "xn--" not in domain:
+        return domain
+    try:
+        return domain.encode("ascii").decode("idna")
+    except UnicodeError:
+        return domain
+
+
+# =============================================================================
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _parse_simple_address(cls, address):
+    """Return the memoised result of cls._parse_address() for the given raw string."""
+    return cls._parse_address(address)
+
+
+# =============================================================================
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _parse_qualified_address(cls, address):
+    """Return the memoised result of cls._parse_full_address() for the given raw string."""
+    return cls._parse_full_address(address)
+
+
+# =============================================================================
+@lru_cache(maxsize=2**16)
+def _domain_sort_key(domain):
+    """Return the labels of the given domain in reversed order, the TLD first."""
+    if not domain:
+        return ()
+    return tuple(reversed(domain.lower().split(".")))
+
+
+# =============================================================================
+def _validate_chunk(cls, chunk, no_user_ok):
+    """Return the results of cls.check_address() for all addresses of the chunk.
+
+    This is executed by a worker process of MailAddress.validate_many().
+    """
+    return [cls.check_address(address, no_user_ok=no_user_ok) for address in chunk]
+
+
+# =============================================================================
+def clear_address_cache():
+    """Clear the caches of parsed raw address strings."""
+    _parse_simple_address.cache_clear()
+    _parse_qualified_address.cache_clear()
+    _domain_sort_key.cache_clear()
+    _unicode_domain.cache_clear()
+
+
 # =============================================================================
 class MailAddress(FbGenericBaseObject):
     """Class for encapsulating a mail simple address."""
 
+    # Millions of addresses may be created, so they are stored compact without a __dict__.
+    __slots__ = (
+        "_user", "_domain", "_verbose", "_empty_ok", "_sort_key", "_interned", "__weakref__")
+    transient_slots = ("_sort_key", "_interned")
+
     pat_tld = r"(?:(?:[a-z][a-z]+)|(?:xn--[a-z0-9]+))"
     pat_valid_domain = r"@((?:[a-z0-9](?:[a-z0-9\-]*[a-z0-9])?\.)*" + pat_tld + ")"
 
@@ -59,6 +177,7 @@ class MailAddress(FbGenericBaseObject):
     re_valid_user = re.compile(r"^" + pat_valid_user + r"$", re.IGNORECASE)
     re_valid_domain = re.compile(r"^" + pat_valid_domain + r"$", re.IGNORECASE)
     re_valid_address = re.compile(r"^" + pat_valid_address + r"$", re.IGNORECASE)
+    re_invalid_address_chars = re.compile(r"[^a-z0-9_\-\.\+=/@]", re.IGNORECASE)
 
     # -------------------------------------------------------------------------
     @classmethod
@@ -81,6 +200,7 @@ class MailAddress(FbGenericBaseObject):
                 LOG.debug(str(e))
             return False
 
+        addr = _ascii_address(addr)
         if cls.re_valid_address.search(addr):
             return True
 
@@ -95,11 +215,103 @@ class MailAddress(FbGenericBaseObject):
             LOG.debug(str(e))
         return False
 
+    # -------------------------------------------------------------------------
+    @classmethod
+    def check_address(cls, address, no_user_ok=False):
+        """Check the validity of a mail address and return the reason of a failure.
+
+        In contrast to valid_address() leading and trailing whitespace is ignored and
+        the length limits of RFC 5321 are checked. Obvious garbage is rejected by a cheap
+        pre-filter before the address is matched against re_valid_address.
+
+        @param address: the address to check
+        @type address: str or bytes
+        @param no_user_ok: is an address without a user part (e.g. '@example.com') valid
+        @type no_user_ok: bool
+
+        @return: a tuple of the validity and the reason of a failure (None on success)
+        @rtype: tuple
+        """
+        if not address:
+            return (False, _("Empty address."))
+
+        addr = address if isinstance(address, str) else to_str(address)
+        if not isinstance(addr, str):
+            return (False, _("Wrong type."))
+        addr = _ascii_address(addr.strip())
+
+        if len(addr) > MAX_ADDRESS_LENGTH:
+            return (False, _("Address too long."))
+        if addr.count("@") != 1:
+            return (False, _("Wrong number of '@'."))
+        if addr.index("@") > MAX_LOCAL_PART_LENGTH:
+            return (False, _("Local part too long."))
+        if cls.re_invalid_address_chars.search(addr):
+            return (False, _("Invalid characters."))
+
+        if cls.re_valid_address.search(addr):
+            return (True, None)
+        if no_user_ok and cls.re_valid_domain.search(addr):
+            return (True, None)
+        return (False, _("Invalid address."))
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def validate_many(
+        cls, iterable, workers=None, chunk_size=VALIDATE_CHUNK_SIZE, no_user_ok=False
+    ):
+        """Validate all addresses of the given iterable (e.g. the lines of an export file).
+
+        This is a generator, the addresses are taken from the iterable on demand. If more than
+        one worker is given, the addresses are validated in chunks by a pool of worker
+        processes. There are never more than two chunks per worker pending at the same time.
+
+        @param iterable: the addresses to validate
+        @type iterable: iterable
+        @param workers: the number of worker processes, no pool is used, if not greater than 1
+        @type workers: int or None
+        @param chunk_size: the number of addresses validated at once by a worker process
+        @type chunk_size: int
+        @param no_user_ok: is an address without a user part (e.g. '@example.com') valid
+        @type no_user_ok: bool
+
+        @return: tuples of the address, its validity and the reason of a failure,
+                 see check_address(), in the order of the iterable
+        @rtype: iterator
+        """
+        if not workers or workers < 2:
+            for address in iterable:
+                (ok, reason) = cls.check_address(address, no_user_ok=no_user_ok)
+                yield (address, ok, reason)
+            return
+
+        iterator = iter(iterable)
+        pending = deque()
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if chunk:
+                    future = executor.submit(_validate_chunk, cls, chunk, no_user_ok)
+                    pending.append((chunk, future))
+                    if len(pending) < 2 * workers:
+                        continue
+                if not pending:
+                    break
+                (done_chunk, future) = pending.popleft()
+                for address, (ok, reason) in zip(done_chunk, future.result()):
+                    yield (address, ok, reason)
+        finally:
+            for (_chunk, future) in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
     # -------------------------------------------------------------------------
     def __init__(self, user=None, domain=None, verbose=0, empty_ok=False, no_user_ok=False):
         """Initialise a MailAddress object."""
         self._user = ""
         self._domain = ""
+        self._sort_key = None
         self._verbose = 0
         self.verbose = verbose
         self._empty_ok = False
@@ -117,24 +329,18 @@ class MailAddress(FbGenericBaseObject):
 
         if not domain:
             if user:
-                addr = convert_attr(user)
-                if self.valid_address(addr, verbose=self.verbose, no_user_ok=no_user_ok):
-                    match = self.re_valid_address.search(addr)
-                    if match:
-                        self._user = match.group(1)
-                        self._domain = match.group(2)
-                        return
-                    match = self.re_valid_domain.search(addr)
-                    self._domain = match.group(1)
-                    return
-                match = self.re_valid_domain.search(addr)
-                if match:
-                    self._domain = match.group(1)
-                    return
-                if not self.re_valid_user.search(user):
+                if self.verbose > 2:
+                    # Not memoised to get the debug messages of the validation
+                    self.valid_address(
+                        convert_attr(user), verbose=self.verbose, no_user_ok=no_user_ok
+                    )
+                    parsed = self._parse_address(user)
+                else:
+                    parsed = _parse_simple_address(self.__class__, user)
+                if parsed is None:
                     msg = _("Invalid user/mailbox name.")
                     raise InvalidMailAddressError(user, msg)
-                self._user = addr
+                (self._user, self._domain) = parsed
                 return
 
             e = EmptyMailAddressError()
@@ -152,19 +358,75 @@ class MailAddress(FbGenericBaseObject):
         else:
             c_user = None
 
-        c_domain = convert_attr(domain)
+        c_domain = _ascii_domain(convert_attr(domain))
         if not self.re_valid_domain.search("@" + c_domain):
             msg = _("Invalid domain.")
             raise InvalidMailAddressError(domain, msg)
 
         self._user = c_user
-        self._domain = c_domain
+        self._domain = sys.intern(c_domain)
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def _parse_address(cls, address):
+        """Parse the given raw address string without a separate domain.
+
+        It may be a complete address, a domain with a leading '@' or a single user name.
+        The result depends only on the given string, so it is memoised by the constructor.
+
+        @param address: the raw address string
+        @type address: str
+
+        @return: a tuple of the lowercased user and domain (which may be empty),
+                 or None, if the address is invalid
+        @rtype: tuple or None
+        """
+        addr = _ascii_address(convert_attr(address))
+
+        match = cls.re_valid_address.search(addr)
+        if match:
+            return (match.group(1), sys.intern(match.group(2)))
+
+        match = cls.re_valid_domain.search(addr)
+        if match:
+            return ("", sys.intern(match.group(1)))
+
+        if not cls.re_valid_user.search(address):
+            return None
+        return (addr, "")
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def intern(cls, *args, **kwargs):
+        """Return a shared instance of the address with the given parameters.
+
+        The parameters are the same as for creating a new object. If there is already
+        an interned object with the same properties, this is returned, else the new
+        object is interned. Interned objects are shared, so changing their properties
+        raises an AttributeError, a copy of them may be changed.
+
+        @return: the interned address
+        @rtype: MailAddress
+        """
+        addr = cls(*args, **kwargs)
+        key = (cls,) + addr.as_tuple()
+        addr = _INTERNED_ADDRESSES.setdefault(key, addr)
+        addr._interned = True
+        return addr
+
+    # -------------------------------------------------------------------------
+    def _check_not_interned(self, attribute):
+        """Raise an AttributeError, if the current address is interned by intern()."""
+        if getattr(self, "_interned", False):
+            msg = _("The property {p!r} of the interned address {a!r} may not be changed.")
+            raise AttributeError(msg.format(p=attribute, a=str(self)))
 
     # -------------------------------------------------------------------------
     def _short_init(self, user, domain, verbose=0, empty_ok=False):
 
         self._user = ""
         self._domain = ""
+        self._sort_key = None
         self._verbose = 0
         self.verbose = verbose
         self._empty_ok = False
@@ -178,7 +440,7 @@ class MailAddress(FbGenericBaseObject):
             self._user = str(user).lower().strip()
 
         if domain:
-            self._domain = str(domain).lower().strip()
+            self._domain = sys.intern(_ascii_domain(str(domain).lower().strip()))
 
     # -----------------------------------------------------------
     @property
@@ -196,6 +458,29 @@ class MailAddress(FbGenericBaseObject):
             return ""
         return self._domain
 
+    # -----------------------------------------------------------
+    @property
+    def sort_key(self):
+        """Return the key for sorting addresses by domain (TLD first), user and name.
+
+        It is computed once and cached, so sorting by it avoids the comparisons of
+        the addresses in Python by __lt__().
+        """
+        if self._sort_key is None:
+            self._sort_key = self._get_sort_key()
+        return self._sort_key
+
+    # -------------------------------------------------------------------------
+    def _get_sort_key(self):
+        """Compute the key for sorting, see property sort_key."""
+        return (_domain_sort_key(self.domain), self.user.lower(), "", "")
+
+    # -----------------------------------------------------------
+    @property
+    def unicode_domain(self):
+        """Return the domain part of the address for displaying, IDNA labels are decoded."""
+        return _unicode_domain(self.domain)
+
     # -----------------------------------------------------------
     @property
     def verbose(self):
@@ -204,6 +489,7 @@ class MailAddress(FbGenericBaseObject):
 
     @verbose.setter
     def verbose(self, value):
+        self._check_not_interned("verbose")
         v = int(value)
         if v >= 0:
             self._verbose = v
@@ -219,6 +505,7 @@ class MailAddress(FbGenericBaseObject):
 
     @empty_ok.setter
     def empty_ok(self, value):
+        self._check_not_interned("empty_ok")
         self._empty_ok = to_bool(value)
 
     # -------------------------------------------------------------------------
@@ -265,6 +552,15 @@ class MailAddress(FbGenericBaseObject):
 
         return self.user + "@" + self.domain
 
+    # -------------------------------------------------------------------------
+    def str_for_display(self):
+        """Typecast into a string for displaying with the Unicode form of the domain."""
+        if not self.domain:
+            return self.user
+        if not self.user:
+            return "@" + self.unicode_domain
+        return self.user + "@" + self.unicode_domain
+
     # -------------------------------------------------------------------------
     def str_for_access(self):
         """Typecast into a string for access mappings."""
@@ -444,13 +740,17 @@ class MailAddress(FbGenericBaseObject):
 
     # -------------------------------------------------------------------------
     def __copy__(self):
-        """Return a copy of the current address."""
-        addr = MailAddress(empty_ok=True)
+        """Return a copy of the current address.
+
+        The attributes are already validated, so they are taken without calling __init__().
+        """
+        addr = MailAddress.__new__(MailAddress)
 
         addr._user = self.user
         addr._domain = self.domain
-        addr.verbose = self.verbose
-        addr.empty_ok = self.empty_ok
+        addr._verbose = self.verbose
+        addr._empty_ok = self.empty_ok
+        addr._sort_key = None
 
         return addr
 
@@ -459,6 +759,8 @@ class MailAddress(FbGenericBaseObject):
 class QualifiedMailAddress(MailAddress):
     """Class for encapsulating a mail address with an optional Name."""
 
+    __slots__ = ("_name",)
+
     pat_valid_name = r'("[^"]*"|[^",;<>@|]*)'
     pat_valid_full_address = r"^\s*" + pat_valid_name + r"\s*<"
     pat_valid_full_address += MailAddress.pat_valid_address + r">\s*$"
@@ -489,6 +791,7 @@ class QualifiedMailAddress(MailAddress):
                 LOG.debug(str(e))
             return False
 
+        addr = _ascii_address(addr)
         if verbose > 4:
             LOG.debug(_("Evaluating address {!r} ...").format(addr))
             LOG.debug(_("Search pattern simple: {}").format(cls.re_valid_address))
@@ -542,38 +845,57 @@ class QualifiedMailAddress(MailAddress):
     # -------------------------------------------------------------------------
     def _init_from_address(self, address, verbose=0, empty_ok=False):
 
-        if not self.valid_full_address(address, raise_on_failure=True, verbose=verbose):
+        if verbose > 2 or not isinstance(address, str):
+            # Not memoised to get the debug messages and exceptions of the validation
+            if not self.valid_full_address(address, raise_on_failure=True, verbose=verbose):
+                raise InvalidMailAddressError(address, _("Invalid address."))
+            parsed = self._parse_full_address(address)
+        else:
+            parsed = _parse_qualified_address(self.__class__, address)
+
+        if parsed is None:
             raise InvalidMailAddressError(address, _("Invalid address."))
 
-        user = None
-        domain = None
-        name = None
+        (user, domain, name) = parsed
+        super(QualifiedMailAddress, self)._short_init(
+            user=user, domain=domain, verbose=verbose, empty_ok=empty_ok
+        )
+        if name is not None:
+            self._name = name
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def _parse_full_address(cls, address):
+        """Parse the given raw full qualified address string.
+
+        The result depends only on the given string, so it is memoised by the constructor.
+
+        @param address: the raw address string, e.g. '"Frank Brehm" <frank@brehm-online.com>'
+        @type address: str
 
-        match = self.re_valid_full_address.search(address)
+        @return: a tuple of the lowercased user and domain and the name (or None),
+                 or None, if the address is invalid
+        @rtype: tuple or None
+        """
+        address = _ascii_address(address)
+        match = cls.re_valid_full_address.search(address)
         if match:
             name = match.group(1).strip()
             user = match.group(2).strip().lower()
-            domain = match.group(3).strip().lower()
-            super(QualifiedMailAddress, self)._short_init(
-                user=user, domain=domain, verbose=verbose, empty_ok=empty_ok
-            )
-            if name:
-                match_quoting = self.re_qouting.match(name)
-                if match_quoting:
-                    self._name = match_quoting.group(1)
-                else:
-                    self._name = name
-            return
-
-        match = self.re_valid_address.search(address)
+            domain = sys.intern(match.group(3).strip().lower())
+            if not name:
+                return (user, domain, None)
+            match_quoting = cls.re_qouting.match(name)
+            if match_quoting:
+                # A quoted empty name is kept as an empty string
+                name = match_quoting.group(1)
+            return (user, domain, name)
+
+        match = cls.re_valid_address.search(address)
         if not match:
-            raise InvalidMailAddressError(address, _("Invalid address."))
+            return None
 
-        user = match.group(1).strip().lower()
-        domain = match.group(2).strip().lower()
-        super(QualifiedMailAddress, self)._short_init(
-            user=user, domain=domain, verbose=verbose, empty_ok=empty_ok
-        )
+        return (match.group(1).strip().lower(), sys.intern(match.group(2).strip().lower()), None)
 
     # -----------------------------------------------------------
     @property
@@ -598,6 +920,12 @@ class QualifiedMailAddress(MailAddress):
 
         return res
 
+    # -------------------------------------------------------------------------
+    def _get_sort_key(self):
+        """Compute the key for sorting, see property sort_key."""
+        name = self.name or ""
+        return (_domain_sort_key(self.domain), self.user.lower(), name.lower(), name)
+
     # -------------------------------------------------------------------------
     def as_tuple(self):
         """
@@ -615,23 +943,36 @@ class QualifiedMailAddress(MailAddress):
 
     # -------------------------------------------------------------------------
     def __copy__(self):
-        """Return a copy of the current address."""
-        addr = self.__class__(empty_ok=True)
+        """Return a copy of the current address.
+
+        The attributes are already validated, so they are taken without calling __init__().
+        """
+        addr = self.__class__.__new__(self.__class__)
 
         addr._user = self.user
         addr._domain = self.domain
         addr._name = self.name
-        addr.verbose = self.verbose
-        addr.empty_ok = self.empty_ok
+        addr._verbose = self.verbose
+        addr._empty_ok = self.empty_ok
+        addr._sort_key = self._sort_key
 
         return addr
 
     # -------------------------------------------------------------------------
     def __str__(self):
         """Typecast into a string."""
+        return self._format(super(QualifiedMailAddress, self).__str__())
+
+    # -------------------------------------------------------------------------
+    def str_for_display(self):
+        """Typecast into a string for displaying with the Unicode form of the domain."""
+        return self._format(super(QualifiedMailAddress, self).str_for_display())
+
+    # -------------------------------------------------------------------------
+    def _format(self, address):
+        """Return the given simple address string together with the name."""
         no_addr = "undisclosed recipient"
 
-        address = super(QualifiedMailAddress, self).__str__()
         show_addr = address
         if address:
             if self.name:
@@ -720,9 +1061,361 @@ class QualifiedMailAddress(MailAddress):
         return self_simple < other_simple
 
 
+# =============================================================================
+class _AddressListTokenizer(object):
+    """A state machine splitting an RFC 5322 address list into its single addresses.
+
+    The text is given piecewise by feed(), so a list of any length is splitted in constant
+    memory. Quoted strings, (nested) comments, angle brackets, groups and folded lines are
+    considered. An address longer than MAX_ADDRESS_TOKEN_LENGTH is not stored completely,
+    but returned as a too long one.
+    """
+
+    re_special_text = re.compile(r'["(),:;<>]')
+    re_special_quote = re.compile(r'["\\]')
+    re_special_comment = re.compile(r"[()\\]")
+
+    # -------------------------------------------------------------------------
+    def __init__(self):
+        """Initialise a _AddressListTokenizer object."""
+        self._state = "text"
+        self._depth = 0
+        self._escaped = False
+        self._in_group = False
+        self._reset()
+
+    # -------------------------------------------------------------------------
+    def _reset(self):
+
+        self._name = []
+        self._addr = []
+        self._in_angle = False
+        self._angle_seen = False
+        self._length = 0
+        self._too_long = False
+
+    # -------------------------------------------------------------------------
+    def _add(self, text):
+
+        if not text or self._too_long:
+            return
+        self._length += len(text)
+        if self._length > MAX_ADDRESS_TOKEN_LENGTH:
+            self._too_long = True
+            return
+        if self._in_angle:
+            self._addr.append(text)
+        elif not self._angle_seen:
+            self._name.append(text)
+
+    # -------------------------------------------------------------------------
+    def _finish(self):
+        """Return the current address as a tuple of the raw address, the name and an error.
+
+        Empty entries of the list are returned as None.
+        """
+        raw = " ".join("".join(self._name).split())
+        addr = "".join(self._addr).strip()
+        angle_seen = self._angle_seen
+        too_long = self._too_long
+        self._reset()
+
+        if too_long:
+            return (raw[:80], None, _("Address too long."))
+        if not angle_seen:
+            if not raw:
+                return None
+            return (raw, None, None)
+        return (addr, raw or None, None)
+
+    # -------------------------------------------------------------------------
+    def feed(self, text):
+        """Process the next piece of the address list.
+
+        @param text: the next piece of the address list
+        @type text: str
+
+        @return: the tuples of all addresses completed by this piece, see _finish()
+        @rtype: list
+        """
+        result = []
+        pos = 0
+        length = len(text)
+
+        while pos < length:
+            if self._escaped:
+                if self._state == "quote":
+                    self._add(text[pos])
+                self._escaped = False
+                pos += 1
+            elif self._state == "quote":
+                pos = self._feed_quote(text, pos)
+            elif self._state == "comment":
+                pos = self._feed_comment(text, pos)
+            else:
+                pos = self._feed_text(text, pos, result)
+
+        return result
+
+    # -------------------------------------------------------------------------
+    def _feed_quote(self, text, pos):
+        """Process the given text inside a quoted string and return the next position."""
+        match = self.re_special_quote.search(text, pos)
+        if not match:
+            self._add(text[pos:])
+            return len(text)
+        self._add(text[pos:match.start()])
+        if match.group(0) == "\\":
+            self._escaped = True
+        else:
+            self._state = "text"
+        return match.end()
+
+    # -------------------------------------------------------------------------
+    def _feed_comment(self, text, pos):
+        """Process the given text inside a comment and return the next position.
+
+        A comment is replaced by a space, but not inside angle brackets.
+        """
+        match = self.re_special_comment.search(text, pos)
+        if not match:
+            return len(text)
+        char = match.group(0)
+        if char == "\\":
+            self._escaped = True
+        elif char == "(":
+            self._depth += 1
+        else:
+            self._depth -= 1
+            if not self._depth:
+                self._state = "text"
+                if not self._in_angle:
+                    self._add(" ")
+        return match.end()
+
+    # -------------------------------------------------------------------------
+    def _feed_text(self, text, pos, result):
+        """Process the given text outside of quoted strings and comments.
+
+        Completed addresses are appended to result, see _finish().
+
+        @return: the next position in the text
+        @rtype: int
+        """
+        match = self.re_special_text.search(text, pos)
+        if not match:
+            self._add(text[pos:])
+            return len(text)
+        self._add(text[pos:match.start()])
+        char = match.group(0)
+
+        if char == '"':
+            self._state = "quote"
+        elif char == "(":
+            self._state = "comment"
+            self._depth = 1
+        elif char == "<":
+            self._in_angle = True
+            self._angle_seen = True
+        elif char == ">":
+            self._in_angle = False
+        elif char == ":" and not self._in_angle and not self._angle_seen:
+            # Start of a group, the display name of the group is discarded
+            self._reset()
+            self._in_group = True
+        elif char == "," or (char == ";" and self._in_group):
+            if char == ";":
+                self._in_group = False
+            entry = self._finish()
+            if entry is not None:
+                result.append(entry)
+        else:
+            self._add(char)
+
+        return match.end()
+
+    # -------------------------------------------------------------------------
+    def close(self):
+        """Finish the address list and return the tuple of its last address or None."""
+        self._state = "text"
+        self._escaped = False
+        self._in_group = False
+        return self._finish()
+
+
+# =============================================================================
+def _to_qualified_address(entry, verbose=0, skip_invalid=False):
+    """Create a QualifiedMailAddress object from a tuple returned by _AddressListTokenizer.
+
+    @return: the address or None, if it was invalid and should be skipped
+    @rtype: QualifiedMailAddress or None
+    """
+    (raw, name, error) = entry
+    if not error:
+        match = MailAddress.re_valid_address.search(_ascii_address(raw))
+        if match:
+            return QualifiedMailAddress(
+                user=match.group(1), domain=match.group(2), name=name, verbose=verbose
+            )
+        error = _("Invalid address.")
+
+    if skip_invalid:
+        if verbose > 1:
+            LOG.debug(str(InvalidMailAddressError(raw, error)))
+        return None
+    raise InvalidMailAddressError(raw, error)
+
+
+# =============================================================================
+def parse_address_list(stream, verbose=0, skip_invalid=False):
+    """Parse an RFC 5322 address list (e.g. the value of a To header) from a text stream.
+
+    This is a generator, the stream is read in pieces of READ_CHUNK_SIZE characters, so
+    address lists of any size are parsed in constant memory.
+
+    @param stream: the text stream to read from, or the address list as a string
+    @type stream: io.TextIOBase or str
+    @param verbose: the verbosity level
+    @type verbose: int
+    @param skip_invalid: skip invalid addresses instead of raising an InvalidMailAddressError
+    @type skip_invalid: bool
+
+    @return: all addresses of the address list
+    @rtype: iterator of QualifiedMailAddress
+    """
+    if isinstance(stream, six.string_types):
+        stream = io.StringIO(to_str(stream))
+
+    tokenizer = _AddressListTokenizer()
+    while True:
+        text = stream.read(READ_CHUNK_SIZE)
+        if not text:
+            break
+        for entry in tokenizer.feed(text):
+            addr = _to_qualified_address(entry, verbose=verbose, skip_invalid=skip_invalid)
+            if addr is not None:
+                yield addr
+
+    entry = tokenizer.close()
+    if entry is not None:
+        addr = _to_qualified_address(entry, verbose=verbose, skip_invalid=skip_invalid)
+        if addr is not None:
+            yield addr
+
+
+# =============================================================================
+def parse_address_headers(stream, headers=("to", "cc"), verbose=0, skip_invalid=False):
+    """Parse the addresses of the given headers of all messages in a mailbox text stream.
+
+    This is a generator. The stream may be an mbox archive or a single message (e.g. of a
+    maildir). It is read line by line (lines are truncated at READ_CHUNK_SIZE characters),
+    and the bodies of the messages are skipped, so archives of any size are parsed in
+    constant memory.
+
+    @param stream: the text stream to read from
+    @type stream: io.TextIOBase
+    @param headers: the names of the headers to parse (case insensitive)
+    @type headers: iterable of str
+    @param verbose: the verbosity level
+    @type verbose: int
+    @param skip_invalid: skip invalid addresses instead of raising an InvalidMailAddressError
+    @type skip_invalid: bool
+
+    @return: all addresses of the given headers
+    @rtype: iterator of QualifiedMailAddress
+    """
+    header_names = {x.lower() for x in headers}
+    in_headers = True
+    line_complete = True
+    tokenizer = None
+
+    while True:
+        line = stream.readline(READ_CHUNK_SIZE)
+        if not line:
+            break
+        line_start = line_complete
+        line_complete = line.endswith("\n")
+        entries = []
+
+        if not line_start:
+            # The rest of a very long line
+            if in_headers and tokenizer:
+                entries = tokenizer.feed(line)
+        elif not in_headers:
+            if line.startswith("From "):
+                in_headers = True
+        elif line[0] in " \t":
+            if tokenizer:
+                entries = tokenizer.feed(line)
+        else:
+            if tokenizer:
+                entries = [tokenizer.close()]
+                tokenizer = None
+            if not line.strip():
+                in_headers = False
+            else:
+                (name, sep, value) = line.partition(":")
+                if sep and name.strip().lower() in header_names:
+                    tokenizer = _AddressListTokenizer()
+                    entries += tokenizer.feed(value)
+
+        for entry in entries:
+            if entry is None:
+                continue
+            addr = _to_qualified_address(entry, verbose=verbose, skip_invalid=skip_invalid)
+            if addr is not None:
+                yield addr
+
+    if tokenizer:
+        entry = tokenizer.close()
+        if entry is not None:
+            addr = _to_qualified_address(entry, verbose=verbose, skip_invalid=skip_invalid)
+            if addr is not None:
+                yield addr
+
+
+# =============================================================================
+class _DomainCounts(Mapping):
+    """A read-only mapping of the domains to the number of their addresses.
+
+    It is a view of the domain index of a MailAddressList, see MailAddressList.domain_counts().
+    """
+
+    # -------------------------------------------------------------------------
+    def __init__(self, domains):
+        """Initialise a _DomainCounts object."""
+        self._domains = domains
+
+    # -------------------------------------------------------------------------
+    def __getitem__(self, domain):
+        """Return the number of addresses of the given domain."""
+        return len(self._domains[domain])
+
+    # -------------------------------------------------------------------------
+    def __iter__(self):
+        """Return an iterator over the domains."""
+        return iter(self._domains)
+
+    # -------------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of domains."""
+        return len(self._domains)
+
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """Typecast into a string for reproduction."""
+        return "{c}({d!r})".format(c=self.__class__.__name__, d=dict(self))
+
+
 # =============================================================================
 class MailAddressList(FbBaseObject, MutableSequence):
-    """A list containing MailAddress or QualifiedMailAddress objects."""
+    """A list containing MailAddress or QualifiedMailAddress objects.
+
+    The positions of all addresses are indexed by their (user, domain) tuple, so looking up
+    an address is done in O(1). The addresses are also indexed by their domain. The indexes
+    are maintained by appending and removing at the end of the list (the index of positions
+    also by replacing), they are rebuilt on demand after other changes.
+    """
 
     # -------------------------------------------------------------------------
     def __init__(
@@ -738,6 +1431,9 @@ class MailAddressList(FbBaseObject, MutableSequence):
     ):
         """Initialise a MailAddressList object."""
         self._addresses = []
+        self._positions = {}
+        self._domains = {}
+        self._domain_positions = {}
         self._empty_ok = False
         self._may_simple = True
 
@@ -844,6 +1540,8 @@ class MailAddressList(FbBaseObject, MutableSequence):
         if isinstance(address, MailAddress):
             if self.verbose > 5:
                 LOG.debug("Trying to use address {!r} ...".format(address))
+            if not self.empty_ok and not address.user and not address.domain:
+                raise EmptyMailAddressError()
             if not self.may_simple and not isinstance(address, QualifiedMailAddress):
                 addr = QualifiedMailAddress(
                     user=address.user,
@@ -863,36 +1561,179 @@ class MailAddressList(FbBaseObject, MutableSequence):
             return addr.simple()
         return addr
 
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _address_key(address):
+        """Return the key of the given address in the position index."""
+        return (address.user, address.domain)
+
+    # -------------------------------------------------------------------------
+    def _get_positions(self):
+        """Return the index of the positions of all addresses, it is rebuilt if necessary."""
+        if self._positions is None:
+            positions = {}
+            for index, addr in enumerate(self._addresses):
+                key = self._address_key(addr)
+                if key in positions:
+                    positions[key].append(index)
+                else:
+                    positions[key] = [index]
+            self._positions = positions
+        return self._positions
+
+    # -------------------------------------------------------------------------
+    def _get_domains(self):
+        """Return the index of the addresses by their domain, it is rebuilt if necessary.
+
+        The ascending positions of the addresses of every domain are kept in the parallel
+        index _domain_positions, so single addresses can be replaced in the right order.
+        """
+        if self._domains is None:
+            domains = {}
+            domain_positions = {}
+            for index, addr in enumerate(self._addresses):
+                domain = addr.domain
+                if domain in domains:
+                    domains[domain].append(addr)
+                    domain_positions[domain].append(index)
+                else:
+                    domains[domain] = [addr]
+                    domain_positions[domain] = [index]
+            self._domains = domains
+            self._domain_positions = domain_positions
+        return self._domains
+
+    # -------------------------------------------------------------------------
+    def _add_to_domains(self, addr, index):
+        """Add the given address on the given position of the list to the domain index."""
+        positions = self._domain_positions.get(addr.domain)
+        if positions is None:
+            self._domains[addr.domain] = [addr]
+            self._domain_positions[addr.domain] = [index]
+            return
+        rank = bisect_left(positions, index)
+        positions.insert(rank, index)
+        self._domains[addr.domain].insert(rank, addr)
+
+    # -------------------------------------------------------------------------
+    def _remove_from_domains(self, addr, index):
+        """Remove the given address on the given position of the list from the domain index."""
+        positions = self._domain_positions[addr.domain]
+        rank = bisect_left(positions, index)
+        del positions[rank]
+        del self._domains[addr.domain][rank]
+        if not positions:
+            del self._domains[addr.domain]
+            del self._domain_positions[addr.domain]
+
+    # -------------------------------------------------------------------------
+    def _reorder_domains(self):
+        """Restore the order of the domain index by the first occurrence of the domains.
+
+        The index is reordered in place, so existing views of it stay valid.
+        """
+        positions = self._domain_positions
+        order = sorted(positions, key=lambda domain: positions[domain][0])
+        if list(self._domains) == order:
+            return
+        domains = {domain: self._domains[domain] for domain in order}
+        self._domains.clear()
+        self._domains.update(domains)
+
+    # -------------------------------------------------------------------------
+    def _invalidate_indexes(self):
+        """Drop the indexes of the addresses after a change, they are rebuilt on demand."""
+        self._positions = None
+        self._domains = None
+        self._domain_positions = None
+
+    # -------------------------------------------------------------------------
+    def _positions_of(self, addr):
+        """Return the ascending positions of all addresses, which are equal to the given one."""
+        candidates = self._get_positions().get(self._address_key(addr), [])
+        return [index for index in candidates if self._addresses[index] == addr]
+
     # -------------------------------------------------------------------------
     def append(self, address):
         """Append the given address."""
         addr = self._to_address(address)
+        self._append_address(addr)
+
+    # -------------------------------------------------------------------------
+    def _append_address(self, addr):
+        """Append the given already converted address and update the index."""
         self._addresses.append(addr)
+        if self._positions is not None:
+            key = self._address_key(addr)
+            if key in self._positions:
+                self._positions[key].append(len(self._addresses) - 1)
+            else:
+                self._positions[key] = [len(self._addresses) - 1]
+        if self._domains is not None:
+            if addr.domain in self._domains:
+                self._domains[addr.domain].append(addr)
+                self._domain_positions[addr.domain].append(len(self._addresses) - 1)
+            else:
+                self._domains[addr.domain] = [addr]
+                self._domain_positions[addr.domain] = [len(self._addresses) - 1]
 
     # -------------------------------------------------------------------------
-    def __copy__(self):
-        """Return a copy of the current address list."""
-        if self.verbose > 1:
-            LOG.debug("Copying myself ...")
+    def extend(self, addresses, unique=False):
+        """Append all addresses of the given iterable.
 
-        new_list = self.__class__(
-            appname=self.appname,
-            verbose=self.verbose,
-            base_dir=self.base_dir,
-            empty_ok=self.empty_ok,
-            may_simple=self.may_simple,
-            initialized=False,
-        )
+        @param addresses: the addresses to append
+        @type addresses: iterable
+        @param unique: append only addresses, which are not already contained in the list
+        @type unique: bool
+        """
+        if addresses is self:
+            addresses = list(addresses)
+        for address in addresses:
+            addr = self._to_address(address)
+            if unique and self._positions_of(addr):
+                continue
+            self._append_address(addr)
+
+    # -------------------------------------------------------------------------
+    def dedupe(self):
+        """Remove all repeated occurrences of addresses, the first occurrence is kept.
 
-        for addr in self:
-            new_list.append(copy.copy(addr))
+        @return: the number of removed addresses
+        @rtype: int
+        """
+        removed = set()
+        for candidates in self._get_positions().values():
+            if len(candidates) < 2:
+                continue
+            kept = []
+            for index in candidates:
+                addr = self._addresses[index]
+                if any(addr == self._addresses[k] for k in kept):
+                    removed.add(index)
+                else:
+                    kept.append(index)
 
-        new_list.initialized = self.initialized
-        return new_list
+        if removed:
+            self._addresses = [
+                addr for index, addr in enumerate(self._addresses) if index not in removed
+            ]
+            self._invalidate_indexes()
+        return len(removed)
 
     # -------------------------------------------------------------------------
-    def __reversed__(self):
-        """Return a reversed copy of the current address list."""
+    def _new_with_addresses(self, addresses):
+        """Return a new list with the same properties and the given trusted addresses.
+
+        The addresses must be already converted by _to_address() of a list with the same
+        properties, they are taken without a further check. The indexes of the new list
+        are built on demand.
+
+        @param addresses: the already converted addresses of the new list
+        @type addresses: list
+
+        @return: the new address list
+        @rtype: MailAddressList
+        """
         new_list = self.__class__(
             appname=self.appname,
             verbose=self.verbose,
@@ -901,13 +1742,40 @@ class MailAddressList(FbBaseObject, MutableSequence):
             may_simple=self.may_simple,
             initialized=False,
         )
-
-        for addr in reversed(self._addresses):
-            new_list.append(copy.copy(addr))
+        new_list._addresses = addresses
+        new_list._invalidate_indexes()
 
         new_list.initialized = self.initialized
         return new_list
 
+    # -------------------------------------------------------------------------
+    def _is_trusted(self, other):
+        """Return, whether the addresses of the other list may be taken without conversion.
+
+        This is the case, if the other list is not more permissive than the current list
+        regarding simple and empty addresses.
+        """
+        if not isinstance(other, MailAddressList):
+            return False
+        if other.may_simple and not self.may_simple:
+            return False
+        if other.empty_ok and not self.empty_ok:
+            return False
+        return True
+
+    # -------------------------------------------------------------------------
+    def __copy__(self):
+        """Return a copy of the current address list."""
+        if self.verbose > 1:
+            LOG.debug("Copying myself ...")
+
+        return self._new_with_addresses([addr.__copy__() for addr in self._addresses])
+
+    # -------------------------------------------------------------------------
+    def __reversed__(self):
+        """Return a reversed copy of the current address list."""
+        return self._new_with_addresses([addr.__copy__() for addr in reversed(self._addresses)])
+
     # -------------------------------------------------------------------------
     def __add__(self, other):
         """Return a copy of the current address list with the other list appended."""
@@ -917,6 +1785,10 @@ class MailAddressList(FbBaseObject, MutableSequence):
 
         result = self.__copy__()
 
+        if self._is_trusted(other):
+            result._addresses.extend([addr.__copy__() for addr in other._addresses])
+            return result
+
         for addr in other:
             result.append(addr)
 
@@ -932,6 +1804,8 @@ class MailAddressList(FbBaseObject, MutableSequence):
         for addr in other:
             self.append(addr)
 
+        return self
+
     # -------------------------------------------------------------------------
     def index(self, address, *args):
         """Get the position of the first occurence of the given address."""
@@ -967,22 +1841,15 @@ class MailAddressList(FbBaseObject, MutableSequence):
             else:
                 end = j
 
-        for index in list(range(len(self))):
-            item = self._addresses[index]
+        for index in self._positions_of(addr):
             if index < start:
                 continue
             if index >= end and not wrap:
                 break
-            if item == addr:
-                return index
+            return index
 
-        if wrap:
-            for index in list(range(len(self))):
-                item = self._addresses[index]
-                if index >= end:
-                    break
-            if item == addr:
-                return index
+        if wrap and self._addresses and self._addresses[0] == addr:
+            return 0
 
         msg = _("Mail address {} is not in address list.").format(addr)
         raise ValueError(msg)
@@ -994,10 +1861,8 @@ class MailAddressList(FbBaseObject, MutableSequence):
             return False
 
         addr = self._to_address(address)
-        for my_addr in self:
-            if my_addr == addr:
-                return True
-
+        if self._positions_of(addr):
+            return True
         return False
 
     # -------------------------------------------------------------------------
@@ -1007,12 +1872,7 @@ class MailAddressList(FbBaseObject, MutableSequence):
             return 0
 
         addr = self._to_address(address)
-
-        num = 0
-        for my_addr in self:
-            if my_addr == addr:
-                num += 1
-        return num
+        return len(self._positions_of(addr))
 
     # -------------------------------------------------------------------------
     def __len__(self):
@@ -1028,12 +1888,42 @@ class MailAddressList(FbBaseObject, MutableSequence):
     def __setitem__(self, key, address):
         """Set the given mail address with given index."""
         addr = self._to_address(address)
-        self._addresses.__setitem__(key, addr)
+        if not isinstance(key, int):
+            self._addresses.__setitem__(key, addr)
+            self._invalidate_indexes()
+            return
+
+        index = range(len(self._addresses))[key]
+        old_addr = self._addresses[index]
+        self._addresses[index] = addr
+
+        if self._positions is not None:
+            self._positions[self._address_key(old_addr)].remove(index)
+            new_key = self._address_key(addr)
+            if new_key in self._positions:
+                insort(self._positions[new_key], index)
+            else:
+                self._positions[new_key] = [index]
+
+        if self._domains is not None:
+            was_first = self._domain_positions[old_addr.domain][0] == index
+            self._remove_from_domains(old_addr, index)
+            self._add_to_domains(addr, index)
+            if was_first or self._domain_positions[addr.domain][0] == index:
+                self._reorder_domains()
 
     # -------------------------------------------------------------------------
     def __delitem__(self, key):
         """Delete the mail address on given index."""
+        if isinstance(key, int) and self._positions is not None:
+            if key in (-1, len(self._addresses) - 1):
+                addr = self._addresses.pop()
+                self._positions[self._address_key(addr)].pop()
+                if self._domains is not None:
+                    self._remove_from_domains(addr, len(self._addresses))
+                return
         del self._addresses[key]
+        self._invalidate_indexes()
 
     # -------------------------------------------------------------------------
     def __iter__(self):
@@ -1045,12 +1935,93 @@ class MailAddressList(FbBaseObject, MutableSequence):
     def insert(self, index, address):
         """Insert given mail address in list on given index."""
         addr = self._to_address(address)
+        if index >= len(self._addresses):
+            self._append_address(addr)
+            return
         self._addresses.insert(index, addr)
+        self._invalidate_indexes()
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_stream(cls, stream, headers=None, skip_invalid=False, **kwargs):
+        """Create a new address list from the addresses read from a text stream.
+
+        @param stream: the text stream to read from, or an address list as a string
+        @type stream: io.TextIOBase or str
+        @param headers: if given, the stream is a mailbox and the addresses of these headers
+                        are taken, see parse_address_headers(), else the stream contains
+                        an address list, see parse_address_list()
+        @type headers: iterable of str or None
+        @param skip_invalid: skip invalid addresses instead of raising an exception
+        @type skip_invalid: bool
+
+        All other keyword arguments are given to the constructor of the new list.
+
+        @return: the new address list
+        @rtype: MailAddressList
+        """
+        address_list = cls(**kwargs)
+        if headers is None:
+            addresses = parse_address_list(
+                stream, verbose=address_list.verbose, skip_invalid=skip_invalid
+            )
+        else:
+            addresses = parse_address_headers(
+                stream, headers=headers, verbose=address_list.verbose, skip_invalid=skip_invalid
+            )
+        for addr in addresses:
+            address_list.append(addr)
+        return address_list
+
+    # -------------------------------------------------------------------------
+    def group_by_domain(self):
+        """Return the addresses of the list grouped by their domain.
+
+        The result is a read-only view of the domain index, it is valid until the list
+        is changed the next time. The lists of addresses may not be changed.
+
+        @return: the mapping of the domains to the lists of their addresses in the order
+                 of the list, the key of addresses without a domain is an empty string
+        @rtype: types.MappingProxyType
+        """
+        return MappingProxyType(self._get_domains())
+
+    # -------------------------------------------------------------------------
+    def domain_counts(self):
+        """Return the number of addresses of all domains of the list.
+
+        The result is a read-only view of the domain index, it is valid until the list
+        is changed the next time.
+
+        @return: the mapping of the domains to the number of their addresses
+        @rtype: collections.abc.Mapping
+        """
+        return _DomainCounts(self._get_domains())
+
+    # -------------------------------------------------------------------------
+    def sort(self, key=None, reverse=False):
+        """Sort the addresses of the list in place.
+
+        The key of every address is computed only once, the comparisons are done in C.
+
+        @param key: a function returning the key for sorting of an address,
+                    the property sort_key of the addresses is used, if not given
+        @type key: callable or None
+        @param reverse: sort in descending order
+        @type reverse: bool
+        """
+        if key is None:
+            key = attrgetter("sort_key")
+        self._addresses.sort(key=key, reverse=reverse)
+        self._invalidate_indexes()
 
     # -------------------------------------------------------------------------
     def clear(self):
         """Remove all items from the MailAddressList."""
         self._addresses = []
+        self._positions = {}
+        self._domains = {}
+        self._domain_positions = {}
 
 
 # =============================================================================
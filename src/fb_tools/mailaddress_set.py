@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@summary: The module for a disk-backed set of mail addresses, e.g. for suppression lists.
+
+@author: Frank Brehm
+@contact: frank@brehm-online.com
+@copyright: © 2018 - 2026 by Frank Brehm, Berlin
+"""
+
+from __future__ import absolute_import
+
+# Standard modules
+import heapq
+import logging
+import mmap
+import os
+import stat
+import tempfile
+
+try:
+    from collections.abc import Collection
+except ImportError:
+    from collections import Collection
+
+# Third party modules
+import six
+
+# Own modules
+from .errors import BaseMailAddressError, EmptyMailAddressError, InvalidMailAddressError
+from .mailaddress import MailAddress, QualifiedMailAddress
+from .obj import FbGenericBaseObject
+from .xlate import XLATOR
+
+__version__ = "0.1.0"
+LOG = logging.getLogger(__name__)
+
+_ = XLATOR.gettext
+
+# The first line of a file of a MailAddressSet, the field is the number of addresses
+SET_FILE_HEADER = "# fb_tools.MailAddressSet {:>20}\n"
+SET_FILE_HEADER_PREFIX = b"# fb_tools.MailAddressSet "
+SET_FILE_HEADER_LENGTH = len(SET_FILE_HEADER.format(0))
+
+# Number of addresses sorted in memory at once by MailAddressSet.build()
+BUILD_CHUNK_SIZE = 500000
+
+# The permissions of a new file of a MailAddressSet
+SET_FILE_MODE = 0o644
+
+
+# =============================================================================
+class MailAddressSetError(BaseMailAddressError):
+    """Exception in case of a wrong file of a MailAddressSet."""
+
+    # -------------------------------------------------------------------------
+    def __init__(self, filename, emesg):
+        """Initialise a MailAddressSetError exception."""
+        self.filename = filename
+        self.emesg = emesg
+        super(MailAddressSetError, self).__init__()
+
+    # -------------------------------------------------------------------------
+    def __str__(self):
+        """Typecast into str."""
+        msg = _("Wrong file {f!r} of a MailAddressSet: {m}")
+        return msg.format(f=str(self.filename), m=self.emesg)
+
+
+# =============================================================================
+class MailAddressSet(Collection, FbGenericBaseObject):
+    """A read-only set of mail addresses, which is backed by a memory mapped sorted file.
+
+    The file contains a header line with the number of addresses and then the normalised
+    addresses (see address_key()) in ascending order, one per line. The file is created by
+    MailAddressSet.build(). Looking up an address is done by a binary search in the file in
+    O(log n), so sets of many millions of addresses don't need to fit into the memory.
+    """
+
+    # -------------------------------------------------------------------------
+    def __init__(self, filename):
+        """Initialise a MailAddressSet object from the given file."""
+        self._filename = str(filename)
+        self._file = None
+        self._map = None
+        self._count = 0
+
+        self._file = open(self._filename, "rb")
+        try:
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise MailAddressSetError(self._filename, str(e))
+            header = self._map[:SET_FILE_HEADER_LENGTH]
+            if not header.startswith(SET_FILE_HEADER_PREFIX) or not header.endswith(b"\n"):
+                raise MailAddressSetError(self._filename, _("Invalid header."))
+            try:
+                self._count = int(header[len(SET_FILE_HEADER_PREFIX):])
+            except ValueError:
+                raise MailAddressSetError(self._filename, _("Invalid header."))
+        except Exception:
+            self.close()
+            raise
+
+    # -----------------------------------------------------------
+    @property
+    def filename(self):
+        """Return the name of the file of the set."""
+        return self._filename
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def address_key(cls, address):
+        """Return the normalised key of the given address, as it is stored in the file.
+
+        This is the simple notation of a MailAddress object (e.g. 'frank@brehm-online.com'),
+        names of qualified addresses are not considered. Addresses without a user or without
+        a domain part are invalid, regardless of whether they are given as strings or objects.
+
+        @raise EmptyMailAddressError: if the address is empty
+        @raise InvalidMailAddressError: if the address is invalid
+
+        @param address: the address, as a string it may also be a full qualified address
+        @type address: MailAddress or str
+
+        @return: the normalised key
+        @rtype: str
+        """
+        if not isinstance(address, MailAddress):
+            address = QualifiedMailAddress(address.strip())
+        elif not address.user or not address.domain:
+            if not address.user and not address.domain:
+                raise EmptyMailAddressError()
+            raise InvalidMailAddressError(str(address), _("Invalid address."))
+        return MailAddress.__str__(address)
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def build(cls, filename, addresses, chunk_size=BUILD_CHUNK_SIZE, skip_invalid=False):
+        """Create the file of a new set from the given addresses and return the set.
+
+        The addresses are taken from the iterable on demand (e.g. the lines of a file) and
+        sorted in chunks, which are merged afterwards, so the memory usage is independent
+        from the number of addresses. Empty lines are ignored, repeated addresses are stored
+        only once. The file is replaced atomically, if it is already existing, keeping its
+        permissions. A new file gets the permissions SET_FILE_MODE.
+
+        @param filename: the name of the file to create
+        @type filename: str or pathlib.Path
+        @param addresses: the addresses of the set
+        @type addresses: iterable of MailAddress or str
+        @param chunk_size: the number of addresses sorted in memory at once
+        @type chunk_size: int
+        @param skip_invalid: skip invalid addresses instead of raising an exception
+        @type skip_invalid: bool
+
+        @return: the new set
+        @rtype: MailAddressSet
+        """
+        filename = str(filename)
+        workdir = os.path.dirname(os.path.abspath(filename))
+        chunk_files = []
+        chunk = []
+
+        def write_chunk():
+            chunk.sort()
+            fh = tempfile.TemporaryFile(mode="w+", encoding="utf-8", dir=workdir)
+            fh.writelines(key + "\n" for key in chunk)
+            fh.seek(0)
+            chunk_files.append(fh)
+            del chunk[:]
+
+        tmp_name = None
+        replaced = False
+        try:
+            for address in addresses:
+                if isinstance(address, six.string_types) and not address.strip():
+                    continue
+                try:
+                    key = cls.address_key(address)
+                except BaseMailAddressError as e:
+                    if not skip_invalid:
+                        raise
+                    LOG.debug(str(e))
+                    continue
+                chunk.append(key)
+                if len(chunk) >= chunk_size:
+                    write_chunk()
+
+            if chunk_files:
+                if chunk:
+                    write_chunk()
+                keys = heapq.merge(*[(line.rstrip("\n") for line in fh) for fh in chunk_files])
+            else:
+                keys = sorted(chunk)
+
+            try:
+                mode = stat.S_IMODE(os.stat(filename).st_mode)
+            except FileNotFoundError:
+                mode = SET_FILE_MODE
+            (fd, tmp_name) = tempfile.mkstemp(
+                dir=workdir, prefix=os.path.basename(filename) + ".", suffix=".tmp")
+            count = 0
+            with open(fd, "w", encoding="utf-8") as fh:
+                fh.write(SET_FILE_HEADER.format(0))
+                last_key = None
+                for key in keys:
+                    if key == last_key:
+                        continue
+                    fh.write(key + "\n")
+                    last_key = key
+                    count += 1
+                fh.seek(0)
+                fh.write(SET_FILE_HEADER.format(count))
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, filename)
+            replaced = True
+
+        finally:
+            for fh in chunk_files:
+                fh.close()
+            if tmp_name is not None and not replaced:
+                os.remove(tmp_name)
+
+        LOG.debug(_("Created file {f!r} with {n} addresses.").format(f=filename, n=count))
+        return cls(filename)
+
+    # -------------------------------------------------------------------------
+    def close(self):
+        """Close the file of the set."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -------------------------------------------------------------------------
+    def __enter__(self):
+        """Enter the context of the set."""
+        return self
+
+    # -------------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit the context of the set by closing it."""
+        self.close()
+
+    # -------------------------------------------------------------------------
+    def __del__(self):
+        """Close the file before destroying the object."""
+        self.close()
+
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """Typecast into a string for reproduction."""
+        return "<{c}(filename={f!r})>".format(c=self.__class__.__name__, f=self.filename)
+
+    # -------------------------------------------------------------------------
+    def as_dict(self, short=True):
+        """
+        Transform the elements of the object into a dict.
+
+        @param short: don't include local properties in resulting dict.
+        @type short: bool
+
+        @return: structure as dict
+        @rtype:  dict
+        """
+        res = super(MailAddressSet, self).as_dict(short=short)
+        res["filename"] = self.filename
+        res["count"] = len(self)
+        return res
+
+    # -------------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of addresses in the set."""
+        return self._count
+
+    # -------------------------------------------------------------------------
+    def __iter__(self):
+        """Return an iterator over the normalised addresses in ascending order."""
+        if self._map is None:
+            raise ValueError(_("The set is already closed."))
+        pos = SET_FILE_HEADER_LENGTH
+        size = len(self._map)
+        while pos < size:
+            end = self._map.find(b"\n", pos)
+            if end < 0:
+                end = size
+            yield self._map[pos:end].decode("utf-8")
+            pos = end + 1
+
+    # -------------------------------------------------------------------------
+    def __contains__(self, address):
+        """Return, whether the given address is a member of the set.
+
+        It is looked up by a binary search over the lines of the file. Invalid addresses
+        are never members of the set.
+        """
+        if self._map is None:
+            raise ValueError(_("The set is already closed."))
+        try:
+            key = self.address_key(address).encode("utf-8")
+        except (BaseMailAddressError, AttributeError):
+            return False
+
+        mm = self._map
+        # Both borders are always at the beginning of a line
+        low = SET_FILE_HEADER_LENGTH
+        high = len(mm)
+        while low < high:
+            start = mm.rfind(b"\n", low, (low + high) // 2) + 1 or low
+            end = mm.find(b"\n", start, high)
+            if end < 0:
+                end = high
+            line = mm[start:end]
+            if line == key:
+                return True
+            if line < key:
+                low = end + 1
+            else:
+                high = start
+        return False
+
+
+# =============================================================================
+
+if __name__ == "__main__":
+
+    pass
+
+# =============================================================================
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4 list
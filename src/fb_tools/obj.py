@@ -31,7 +31,7 @@ from .common import pp, to_bytes
 from .errors import FbError
 from .xlate import XLATOR
 
-__version__ = "2.1.1"
+__version__ = "2.2.0"
 
 LOG = logging.getLogger(__name__)
 
@@ -71,6 +71,12 @@ class FbGenericBaseObject(object):
     42
     """
 
+    # No instance attributes here, so descendant classes may use __slots__.
+    __slots__ = ()
+
+    # Slots of internal caches and flags, which are not included by as_dict()
+    transient_slots = ()
+
     # -------------------------------------------------------------------------
     @classmethod
     def get_generic_appname(cls, appname=None):
@@ -109,10 +115,9 @@ class FbGenericBaseObject(object):
         @rtype:  dict
         """
         res = {}
-        for key in self.__dict__:
+        for (key, val) in self._instance_attributes():
             if short and key.startswith("_") and not key.startswith("__"):
                 continue
-            val = self.__dict__[key]
             if isinstance(val, FbGenericBaseObject):
                 res[key] = val.as_dict(short=short)
             else:
@@ -122,6 +127,28 @@ class FbGenericBaseObject(object):
 
         return res
 
+    # -------------------------------------------------------------------------
+    def _instance_attributes(self):
+        """Return a list of name and value of all instance attributes, also of __slots__.
+
+        Private slots are stored under their mangled name, slots mentioned in the class
+        property transient_slots are omitted.
+        """
+        attributes = list(getattr(self, "__dict__", {}).items())
+        for cls in self.__class__.__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name in ("__dict__", "__weakref__") or name in self.transient_slots:
+                    continue
+                if name.startswith("__") and not name.endswith("__"):
+                    name = "_" + cls.__name__.lstrip("_") + name
+                if not hasattr(self, name):
+                    continue
+                attributes.append((name, getattr(self, name)))
+        return attributes
+
     # -------------------------------------------------------------------------
     def handle_error(self, error_message=None, exception_name=None, do_traceback=False):
         """
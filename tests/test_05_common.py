@@ -9,9 +9,11 @@
 @license: GPL3
 """
 
+import datetime
 import locale
 import logging
 import os
+import random
 import sys
 
 try:
@@ -19,18 +21,126 @@ try:
 except ImportError:
     import unittest
 
-from general import FbToolsTestcase, get_arg_verbose, init_root_logger
-
-import six
-
 # Setting the user’s preferred locale settings
 locale.setlocale(locale.LC_ALL, "")
 
 libdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
 sys.path.insert(0, libdir)
 
+from fb_tools.common import to_bool
+
+from general import FbToolsTestcase, get_arg_verbose, init_root_logger
+
+import six
+
 LOG = logging.getLogger("test_common")
 
+EXEC_BENCHMARKS = False
+if "EXEC_BENCHMARKS" in os.environ and os.environ["EXEC_BENCHMARKS"] != "":
+    EXEC_BENCHMARKS = to_bool(os.environ["EXEC_BENCHMARKS"])
+
+
+# =============================================================================
+def legacy_timeinterval2delta(interval):
+    """Convert the given time interval by the former cascade of the RE_UNIT_TIME_* patterns."""
+    from fb_tools import common
+    from fb_tools.errors import InvalidTimeIntervalError
+
+    legacy_units = (
+        (common.RE_UNIT_TIME_YEAR, 3600 * 24 * 365),
+        (common.RE_UNIT_TIME_MONTH, 3600 * 24 * 30),
+        (common.RE_UNIT_TIME_WEEK, 3600 * 24 * 7),
+        (common.RE_UNIT_TIME_DAY, 3600 * 24),
+        (common.RE_UNIT_TIME_HOUR, 3600),
+        (common.RE_UNIT_TIME_MINUTE, 60),
+        (common.RE_UNIT_TIME_SECOND, 1),
+    )
+
+    intrvl = interval.strip()
+    seconds = 0
+    for (regex, factor) in legacy_units:
+        m = regex.search(intrvl)
+        if m:
+            seconds += float(m[1]) * factor
+            intrvl = regex.sub("", intrvl, 1)
+    if intrvl.strip() != "":
+        raise InvalidTimeIntervalError(interval)
+    return datetime.timedelta(seconds=seconds)
+
+
+# =============================================================================
+def random_timeintervals(number):
+    """Return the given number of reproducible random time intervals."""
+    unit_names = (
+        ("y", "Y", "year", "years"),
+        ("mon", "month", "Months"),
+        ("w", "week", "weeks"),
+        ("d", "day", "DAYS"),
+        ("h", "hour", "hours"),
+        ("m", "min", "minute", "minutes"),
+        ("", "s", "sec", "seconds"),
+    )
+    rand = random.Random(4711)
+    intervals = []
+    for _i in range(number):
+        tokens = []
+        for index in rand.sample(range(len(unit_names)), rand.randrange(1, 5)):
+            tokens.append("{v}{f}{s}{u}".format(
+                v=rand.randrange(0, 100), f=rand.choice(("", ".", ".5", ".25")),
+                s=rand.choice(("", " ")), u=rand.choice(unit_names[index])))
+        intervals.append(rand.choice((" ", ", ", ",")).join(tokens))
+    return intervals
+
+
+# =============================================================================
+def random_fqdns(number):
+    """Return the given number of reproducible random FQDNs and reverse zones."""
+    rand = random.Random(4711)
+    labels = ("www", "mail", "ns1", "_dmarc", "*", "-x", "xn--mller-kva", "0", "17", "255")
+    names = []
+    for _i in range(number):
+        kind = rand.random()
+        if kind < 0.2:
+            name = ".".join(str(rand.randrange(256)) for j in range(rand.randrange(1, 4)))
+            name += ".in-addr.arpa."
+        elif kind < 0.3:
+            name = ".".join(rand.choice("0123456789abcdef") for j in range(1, 8))
+            name += ".ip6.arpa"
+        else:
+            name = ".".join(rand.choice(labels) for j in range(rand.randrange(1, 4)))
+            name += rand.choice((".com", ".de", ".example.org.", ""))
+        names.append(name)
+    return names
+
+
+# =============================================================================
+def random_ldap_entry_pairs(number):
+    """Return the given number of reproducible random LDAP entries with a changed copy."""
+    rand = random.Random(4711)
+    names = ["attr{}".format(i) for i in range(20)]
+    pairs = []
+    for _i in range(number):
+        entry = {}
+        for name in names:
+            entry[name] = [
+                "value{}".format(rand.randrange(10)) for j in range(rand.randrange(1, 4))]
+        changed = dict(entry)
+        changed[rand.choice(names)] = "changed"
+        pairs.append((entry, changed))
+    return pairs
+
+
+# =============================================================================
+def diff_ldap_entries_pairwise(old, new):
+    """Compare the attributes of the given LDAP entries pairwise by compare_ldap_values()."""
+    from fb_tools.common import compare_ldap_values
+
+    changes = {}
+    for name in new:
+        if not compare_ldap_values(old[name], new[name]):
+            changes[name] = (old[name], new[name])
+    return changes
+
 
 # =============================================================================
 class TestFbCommon(FbToolsTestcase):
@@ -387,6 +497,85 @@ class TestFbCommon(FbToolsTestcase):
             LOG.debug("Switching back to saved locales {!r}.".format(loc))
             locale.setlocale(locale.LC_ALL, loc)  # restore saved locale
 
+    # -------------------------------------------------------------------------
+    def test_human2mbytes_many(self):
+        """Test the unit table and the bulk functions for human readable byte values."""
+        LOG.info(self.get_method_doc())
+
+        import importlib.util
+        import random
+
+        from fb_tools import common
+        from fb_tools.common import bytes2human, bytes2human_many
+        from fb_tools.common import human2mbytes, human2mbytes_many
+
+        # The units like they were detected by the cascade of the RE_UNIT_* patterns
+        legacy_units = (
+            (common.RE_UNIT_BYTES, 0, False),
+            (common.RE_UNIT_KBYTES, 1, False),
+            (common.RE_UNIT_KIBYTES, 1, True),
+            (common.RE_UNIT_MBYTES, 2, False),
+            (common.RE_UNIT_MIBYTES, 2, True),
+            (common.RE_UNIT_GBYTES, 3, False),
+            (common.RE_UNIT_GIBYTES, 3, True),
+            (common.RE_UNIT_TBYTES, 4, False),
+            (common.RE_UNIT_TIBYTES, 4, True),
+            (common.RE_UNIT_PBYTES, 5, False),
+            (common.RE_UNIT_PIBYTES, 5, True),
+            (common.RE_UNIT_EBYTES, 6, False),
+            (common.RE_UNIT_EIBYTES, 6, True),
+            (common.RE_UNIT_ZBYTES, 7, False),
+            (common.RE_UNIT_ZIBYTES, 7, True),
+        )
+
+        def legacy_factor(unit):
+            for (regex, exponent, binary) in legacy_units:
+                if regex.search(unit):
+                    return (1024 if binary else 1000) ** exponent
+            return None
+
+        for prefix in ("", "k", "K", "m", "M", "g", "G", "t", "P", "e", "z", "Z", "x"):
+            for infix in ("", "i", "I"):
+                for suffix in ("", "b", "B", "byte", "Byte", "BYTE", "bytes"):
+                    unit = prefix + infix + suffix
+                    value = "1048576 " + unit
+                    factor = legacy_factor(unit)
+                    if factor is None:
+                        with self.assertRaises(ValueError):
+                            human2mbytes(value, si_conform=True)
+                        continue
+                    self.assertEqual(
+                        human2mbytes(value, si_conform=True, as_float=True), float(factor),
+                        "Wrong result of unit {!r}.".format(unit))
+
+        rand = random.Random(4711)
+        units = ("", "B", "kB", "KiB", "MB", "MiB", "GB", "GiB", "TiB", "EB", "ZiB")
+        values = [
+            "{v}{f} {u}".format(
+                v=rand.randrange(1, 5000), f=rand.choice(("", ".5", ".25")), u=rand.choice(units))
+            for i in range(20000)]
+        numbers = [rand.randrange(-10, 2**70) for i in range(20000)]
+
+        for si_conform in (False, True):
+            for as_float in (False, True):
+                self.assertEqual(
+                    human2mbytes_many(values, si_conform=si_conform, as_float=as_float),
+                    [human2mbytes(x, si_conform=si_conform, as_float=as_float) for x in values])
+            for precision in (None, 0, 2):
+                self.assertEqual(
+                    bytes2human_many(numbers, si_conform=si_conform, precision=precision),
+                    [bytes2human(x, si_conform=si_conform, precision=precision) for x in numbers])
+
+        with self.assertRaises(ValueError):
+            human2mbytes_many(["1 MiB", "1 XB"])
+        self.assertNotIn("numpy", vars(common))
+        if importlib.util.find_spec("numpy") is not None:
+            result = human2mbytes_many(["1 GiB", "2 GiB"], as_array=True)
+            self.assertEqual(list(result), [1024, 2048])
+        else:
+            with self.assertRaises(RuntimeError):
+                human2mbytes_many(["1 GiB", "2 GiB"], as_array=True)
+
     # -------------------------------------------------------------------------
     def test_to_bool(self):
         """Test module function to_bool()."""
@@ -641,6 +830,8 @@ class TestFbCommon(FbToolsTestcase):
             (["a", "b"], ["a", "b"], True),
             (["a", "b"], ["b", "a"], True),
             (["a"], ["a", "b"], False),
+            ([[]], ["a", "b"], False),
+            ([[]], "a", False),
             (bin_a, text_a, True),
             (bin_a, text_a, True),
             (bin_a, bin_b, False),
@@ -666,6 +857,64 @@ class TestFbCommon(FbToolsTestcase):
             )
             self.assertEqual(result, expected)
 
+    # -------------------------------------------------------------------------
+    def test_diff_ldap_entries(self):
+        """Test module functions normalize_ldap_value() and diff_ldap_entries()."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools.common import diff_ldap_entries
+        from fb_tools.common import normalize_ldap_value
+
+        test_values = (
+            (1, ("1",)),
+            ([1], ("1",)),
+            ("Frank", ("frank",)),
+            (b"Frank", ("frank",)),
+            (["b", "A", b"c"], ("a", "b", "c")),
+            (["a", "a"], ("a", "a")),
+            ([], ()),
+        )
+        for (value, expected) in test_values:
+            result = normalize_ldap_value(value)
+            LOG.debug("Normalised {v!r} into {r!r}.".format(v=value, r=result))
+            self.assertEqual(result, expected)
+            self.assertEqual(hash(result), hash(expected))
+
+        old = {
+            "objectClass": ["top", "person", "posixAccount"],
+            "uid": "frank",
+            "cn": "Frank Brehm",
+            "mail": ["frank@brehm-online.com"],
+            "description": "Old entry",
+            "loginShell": [],
+        }
+        new = {
+            "objectclass": ["posixAccount", "Person", "top"],
+            "UID": b"frank",
+            "cn": "Frank A. Brehm",
+            "mail": ["frank@brehm-online.com", "frank.brehm@example.com"],
+            "telephoneNumber": None,
+            "homeDirectory": "/home/frank",
+        }
+        expected = {
+            "cn": ("Frank Brehm", "Frank A. Brehm"),
+            "mail": (
+                ["frank@brehm-online.com"],
+                ["frank@brehm-online.com", "frank.brehm@example.com"],
+            ),
+            "homeDirectory": (None, "/home/frank"),
+            "description": ("Old entry", None),
+        }
+        result = diff_ldap_entries(old, new)
+        LOG.debug("Changed attributes: {!r}".format(result))
+        self.assertEqual(result, expected)
+        self.assertEqual(diff_ldap_entries(new, new), {})
+        self.assertEqual(diff_ldap_entries(None, {"uid": "frank"}), {"uid": (None, "frank")})
+        self.assertEqual(diff_ldap_entries({"uid": "frank"}, None), {"uid": ("frank", None)})
+
+        for (old, new) in random_ldap_entry_pairs(100):
+            self.assertEqual(diff_ldap_entries(old, new), diff_ldap_entries_pairwise(old, new))
+
     # -------------------------------------------------------------------------
     def test_timeinterval2delta(self):
         """Test module function timeinterval2delta()."""
@@ -744,6 +993,85 @@ class TestFbCommon(FbToolsTestcase):
             e = cm.exception
             LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
 
+    # -------------------------------------------------------------------------
+    def test_timeintervals2deltas(self):
+        """Test the single pass parsing and the bulk function of time intervals."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools.common import timeinterval2delta, timeintervals2deltas
+        from fb_tools.errors import InvalidTimeIntervalError
+
+        intervals = random_timeintervals(5000)
+        expected = [legacy_timeinterval2delta(x) for x in intervals]
+        self.assertEqual([timeinterval2delta(x) for x in intervals], expected)
+        self.assertEqual(timeintervals2deltas(intervals), expected)
+        self.assertEqual(timeintervals2deltas([]), [])
+
+        for interval in ("2h 2h", "2s 2", "2h,, 4min", "bla", "3 days,,", None):
+            with self.assertRaises(InvalidTimeIntervalError):
+                timeintervals2deltas(["1h", interval])
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_timeintervals2deltas_benchmark(self):
+        """Benchmark the single pass parsing and the bulk function of time intervals."""
+        LOG.info(self.get_method_doc())
+
+        import timeit
+
+        from fb_tools import common
+        from fb_tools.common import timeintervals2deltas
+
+        intervals = random_timeintervals(5000)
+
+        def parse_cold():
+            common._parse_time_interval.cache_clear()
+            return timeintervals2deltas(intervals)
+
+        duration_legacy = min(timeit.repeat(
+            lambda: [legacy_timeinterval2delta(x) for x in intervals], number=1, repeat=3))
+        duration_cold = min(timeit.repeat(parse_cold, number=1, repeat=3))
+        # Typical for configurations: few different intervals, which are repeated often
+        repeated = intervals[:100] * 50
+        duration_warm = min(timeit.repeat(
+            lambda: timeintervals2deltas(repeated), number=1, repeat=3))
+        LOG.debug(
+            "Parsing {n} time intervals: legacy {l:0.3f} s, single pass {c:0.3f} s, "
+            "memoised {w:0.3f} s.".format(
+                n=len(intervals), l=duration_legacy, c=duration_cold, w=duration_warm))
+
+        # The single pass parsing is about 2.5 times faster, repeated intervals even more
+        self.assertLess(duration_cold, duration_legacy / 1.5)
+        self.assertLess(duration_warm, duration_cold / 4)
+
+    # -------------------------------------------------------------------------
+    def test_fqdn_sort_key(self):
+        """Test sorting FQDNs by module function fqdn_sort_key()."""
+        LOG.info(self.get_method_doc())
+
+        import functools
+
+        from fb_tools.common import compare_fqdn, fqdn_sort_key
+
+        names = [
+            "www.example.com", None, "1.168.192.in-addr.arpa", "example.com.", "",
+            "b.0.0.0.ip6.arpa.", "10.example.com", "9.example.com", "*.example.com",
+            "Mail.Example.com", "example.org", "2.10.in-addr.arpa.", "1.10.in-addr.arpa",
+        ]
+        expected = [
+            None, "", "1.10.in-addr.arpa", "2.10.in-addr.arpa.", "1.168.192.in-addr.arpa",
+            "b.0.0.0.ip6.arpa.", "example.com.", "*.example.com", "9.example.com",
+            "10.example.com", "Mail.Example.com", "www.example.com", "example.org",
+        ]
+        self.assertEqual(sorted(names, key=fqdn_sort_key), expected)
+        self.assertEqual(sorted(names, key=functools.cmp_to_key(compare_fqdn)), expected)
+        self.assertEqual(fqdn_sort_key(" WWW.Example.COM. "), fqdn_sort_key("www.example.com"))
+        self.assertLess(fqdn_sort_key("1a.example.com"), fqdn_sort_key("2.example.com"))
+
+        names = random_fqdns(5000)
+        cmp_key = functools.cmp_to_key(compare_fqdn)
+        self.assertEqual(sorted(names, key=fqdn_sort_key), sorted(names, key=cmp_key))
+
 
 # =============================================================================
 
@@ -765,10 +1093,15 @@ if __name__ == "__main__":
     suite.addTest(TestFbCommon("test_human2mbytes", verbose))
     suite.addTest(TestFbCommon("test_human2mbytes_l10n", verbose))
     suite.addTest(TestFbCommon("test_bytes2human", verbose))
+    suite.addTest(TestFbCommon("test_human2mbytes_many", verbose))
     suite.addTest(TestFbCommon("test_to_bool", verbose))
     suite.addTest(TestFbCommon("test_indent", verbose))
     suite.addTest(TestFbCommon("test_compare_ldap_values", verbose))
+    suite.addTest(TestFbCommon("test_diff_ldap_entries", verbose))
+    suite.addTest(TestFbCommon("test_fqdn_sort_key", verbose))
     suite.addTest(TestFbCommon("test_timeinterval2delta", verbose))
+    suite.addTest(TestFbCommon("test_timeintervals2deltas", verbose))
+    suite.addTest(TestFbCommon("test_timeintervals2deltas_benchmark", verbose))
 
     runner = unittest.TextTestRunner(verbosity=verbose)
 
@@ -164,6 +164,38 @@ class TestFbBaseObject(FbToolsTestcase):
         self.assertIsInstance(di, dict)
         self.assertIsInstance(obj.obj2.as_dict(), dict)
 
+    # -------------------------------------------------------------------------
+    def test_as_dict_slots(self):
+        """Test obj.as_dict() with attributes in __slots__."""
+        LOG.info("Testing obj.as_dict() #5 - attributes in __slots__.")
+
+        from fb_tools.obj import FbGenericBaseObject
+
+        class SlotObject(FbGenericBaseObject):
+
+            __slots__ = ("public", "_protected", "__private", "_cache", "unset")
+            transient_slots = ("_cache",)
+
+            def __init__(self):
+                self.public = 1
+                self._protected = 2
+                self.__private = 3
+                self._cache = 4
+
+            def __repr__(self):
+                return "SlotObject()"
+
+        obj = SlotObject()
+        di = obj.as_dict(short=False)
+        LOG.debug("Got SlotObject.as_dict(short=False): {!r}".format(di))
+        self.assertEqual(di, {
+            "public": 1,
+            "_protected": 2,
+            "_SlotObject__private": 3,
+            "__class_name__": "SlotObject",
+        })
+        self.assertEqual(obj.as_dict(), {"public": 1, "__class_name__": "SlotObject"})
+
 
 # =============================================================================
 if __name__ == "__main__":
@@ -185,6 +217,7 @@ if __name__ == "__main__":
     suite.addTest(TestFbBaseObject("test_as_dict2", verbose))
     suite.addTest(TestFbBaseObject("test_as_dict3", verbose))
     suite.addTest(TestFbBaseObject("test_as_dict_short", verbose))
+    suite.addTest(TestFbBaseObject("test_as_dict_slots", verbose))
 
     runner = unittest.TextTestRunner(verbosity=verbose)
 
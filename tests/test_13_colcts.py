@@ -21,12 +21,16 @@ except ImportError:
 libdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
 sys.path.insert(0, libdir)
 
-from fb_tools.common import pp
+from fb_tools.common import pp, to_bool
 
 from general import FbToolsTestcase, get_arg_verbose, init_root_logger
 
 LOG = logging.getLogger("test_colcts")
 
+EXEC_BENCHMARKS = False
+if "EXEC_BENCHMARKS" in os.environ and os.environ["EXEC_BENCHMARKS"] != "":
+    EXEC_BENCHMARKS = to_bool(os.environ["EXEC_BENCHMARKS"])
+
 
 # =============================================================================
 class TestFbCollections(FbToolsTestcase):
@@ -46,6 +50,54 @@ class TestFbCollections(FbToolsTestcase):
 
         LOG.debug("Version of fb_tools.colcts: {!r}".format(fb_tools.colcts.__version__))
 
+    # -------------------------------------------------------------------------
+    def test_collections_alias(self):
+        """Test the module fb_tools.collections as a lazy alias of fb_tools.colcts."""
+        LOG.info("Testing the module fb_tools.collections as an alias of fb_tools.colcts.")
+
+        import fb_tools.collections
+        import fb_tools.colcts
+
+        self.assertIs(fb_tools.collections.CIDict, fb_tools.colcts.CIDict)
+        self.assertIs(fb_tools.collections.FrozenCIStringSet, fb_tools.colcts.FrozenCIStringSet)
+        self.assertIs(fb_tools.collections.WrongKeyTypeError, fb_tools.colcts.WrongKeyTypeError)
+        self.assertEqual(fb_tools.collections.__version__, fb_tools.colcts.__version__)
+        self.assertIsInstance(
+            fb_tools.colcts.CIStringSet(), fb_tools.collections.FrozenCIStringSet)
+        self.assertIn("CIDict", dir(fb_tools.collections))
+        self.assertIn("CIDict", fb_tools.collections.__all__)
+        with self.assertRaises(AttributeError):
+            fb_tools.collections.NotExistingClass
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_collections_alias_benchmark(self):
+        """Benchmark the import time of fb_tools.colcts and its alias fb_tools.collections."""
+        LOG.info("Benchmarking the import time of fb_tools.colcts and fb_tools.collections.")
+
+        import subprocess
+
+        LOG.debug("Measuring the import time of both modules ...")
+        code = "import fb_tools.colcts, fb_tools.collections"
+        env = dict(os.environ, PYTHONPATH=libdir)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(proc.returncode, 0)
+        times = {}
+        for line in proc.stderr.splitlines():
+            fields = [x.strip() for x in line.split("|")]
+            if len(fields) == 3 and fields[2] in ("fb_tools.colcts", "fb_tools.collections"):
+                # A module already loaded as a dependency is listed again for the import
+                self_time = int(fields[0].split(":")[1])
+                times[fields[2]] = max(self_time, times.get(fields[2], 0))
+        LOG.debug(
+            "Self import time of fb_tools.colcts: {c} us, of the alias fb_tools.collections: "
+            "{a} us (before, the twin module took the same time as fb_tools.colcts).".format(
+                c=times.get("fb_tools.colcts"), a=times.get("fb_tools.collections")))
+        # The alias does not compile and execute the implementation a second time
+        self.assertLess(times["fb_tools.collections"], times["fb_tools.colcts"] / 4)
+
     # -------------------------------------------------------------------------
     def test_init_frozenset(self):
         """Test init of a FrozenCIStringSet object."""
@@ -704,6 +756,98 @@ class TestFbCollections(FbToolsTestcase):
                 res = True
             self.assertEqual(res, expected)
 
+    # -------------------------------------------------------------------------
+    def test_frozenset_set_algebra(self):
+        """Test set operations between FrozenCIStringSet objects against built-in sets."""
+        LOG.info("Testing set operations between FrozenCIStringSet objects against built-in sets.")
+
+        from fb_tools.colcts import CIStringSet, FrozenCIStringSet
+        from fb_tools.colcts import ORDER_INSERTION
+
+        set1 = FrozenCIStringSet(["a", "B", "c", "D"])
+        set2 = FrozenCIStringSet(["A", "b", "e"])
+        set3 = FrozenCIStringSet(["a", "c", "F"])
+
+        self.assertEqual(set1.union(set2, set3).as_list(), ["a", "b", "c", "D", "e", "F"])
+        self.assertEqual(set1.intersection(set2).as_list(), ["A", "b"])
+        self.assertEqual(set1.intersection(set2, set3).as_list(), ["a"])
+        self.assertEqual(set1.difference(set2, set3).as_list(), ["D"])
+        self.assertEqual(set1.symmetric_difference(set2).as_list(), ["c", "D", "e"])
+
+        LOG.debug("Testing in-place operations of CIStringSet ...")
+        my_set = CIStringSet(["a", "B", "c"])
+        my_set ^= CIStringSet(["b", "D"])
+        self.assertIsInstance(my_set, CIStringSet)
+        self.assertEqual(my_set.as_list(), ["a", "c", "D"])
+        my_set &= CIStringSet(["A", "c", "x"])
+        self.assertEqual(my_set.as_list(), ["A", "c"])
+        my_set -= CIStringSet(["C"])
+        self.assertEqual(my_set.as_list(), ["A"])
+        my_set |= CIStringSet(["y"])
+        self.assertEqual(my_set.as_list(), ["A", "y"])
+
+        LOG.debug("Testing set operations on sets in insertion order ...")
+        values = ["zeta", "alpha", "mid", "x2", "Beta", "x1", "omega"]
+        ordered = CIStringSet(values, order=ORDER_INSERTION)
+        other = CIStringSet(["x1", "X2", "new", "ALPHA"], order=ORDER_INSERTION)
+        self.assertEqual(
+            list(ordered - CIStringSet(["x1"])), ["zeta", "alpha", "mid", "x2", "Beta", "omega"])
+        self.assertEqual(list(ordered.difference(other)), ["zeta", "mid", "Beta", "omega"])
+        self.assertEqual(list(ordered.intersection(other)), ["ALPHA", "X2", "x1"])
+        self.assertEqual(
+            list(ordered.symmetric_difference(other)), ["zeta", "mid", "Beta", "omega", "new"])
+        self.assertEqual(
+            list(ordered.union(other)),
+            ["zeta", "ALPHA", "mid", "X2", "Beta", "x1", "omega", "new"])
+
+        my_set = CIStringSet(values, order=ORDER_INSERTION)
+        my_set.difference_update(CIStringSet(["mid", "omega"]))
+        self.assertEqual(list(my_set), ["zeta", "alpha", "x2", "Beta", "x1"])
+        my_set.intersection_update(CIStringSet(["x1", "BETA", "zeta", "alpha"]))
+        self.assertEqual(list(my_set), ["zeta", "alpha", "BETA", "x1"])
+        my_set.symmetric_difference_update(CIStringSet(["alpha", "y"]))
+        self.assertEqual(list(my_set), ["zeta", "BETA", "x1", "y"])
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_frozenset_set_algebra_benchmark(self):
+        """Benchmark set operations between FrozenCIStringSet objects against built-in sets."""
+        LOG.info("Benchmarking set operations of FrozenCIStringSet objects and built-in sets.")
+
+        import timeit
+
+        from fb_tools.colcts import FrozenCIStringSet
+
+        nr_items = 1000000
+        values1 = ["Host-{:07d}.example.com".format(i) for i in range(nr_items)]
+        values2 = [
+            "HOST-{:07d}.EXAMPLE.COM".format(i) for i in range(nr_items // 2, nr_items * 3 // 2)
+        ]
+        ci_set1 = FrozenCIStringSet(values1)
+        ci_set2 = FrozenCIStringSet(values2)
+        plain_set1 = {x.lower() for x in values1}
+        plain_set2 = {x.lower() for x in values2}
+
+        for operation in ("union", "intersection", "difference", "symmetric_difference"):
+            ci_result = getattr(ci_set1, operation)(ci_set2)
+            plain_result = getattr(plain_set1, operation)(plain_set2)
+            self.assertEqual(len(ci_result), len(plain_result))
+
+            time_plain = min(timeit.repeat(
+                lambda: getattr(plain_set1, operation)(plain_set2),  # noqa: B023
+                number=1, repeat=3))
+            time_ci = min(timeit.repeat(
+                lambda: getattr(ci_set1, operation)(ci_set2),  # noqa: B023
+                number=1, repeat=3))
+            LOG.debug(
+                "{op}() of two sets with {n} items - built-in set: {p:0.4f} s, "
+                "FrozenCIStringSet: {c:0.4f} s.".format(
+                    op=operation, n=nr_items, p=time_plain, c=time_ci
+                )
+            )
+            # Keeping the order of the set costs one pass over the items in Python
+            self.assertLess(time_ci, time_plain * 10)
+
     # -------------------------------------------------------------------------
     def test_init_set(self):
         """Test init of a CIStringSet object."""
@@ -853,6 +997,461 @@ class TestFbCollections(FbToolsTestcase):
             ).format(e)
             LOG.debug(msg)
 
+    # -------------------------------------------------------------------------
+    def test_set_order(self):
+        """Test the ordering policies of a CIStringSet object."""
+        LOG.info("Testing the ordering policies of a CIStringSet object.")
+
+        from fb_tools.colcts import CIStringSet, FrozenCIStringSet
+        from fb_tools.colcts import ORDER_INSERTION, ORDER_SORTED, ORDER_UNSORTED
+
+        src = ["c", "A", "b"]
+
+        LOG.debug("Testing default ordering policy.")
+        my_set = CIStringSet(src)
+        self.assertEqual(my_set.order, ORDER_SORTED)
+        self.assertEqual(my_set.as_list(), ["A", "b", "c"])
+
+        for order in (ORDER_INSERTION, ORDER_UNSORTED):
+            LOG.debug("Testing ordering policy {!r}.".format(order))
+            my_set = CIStringSet(src, order=order)
+            self.assertEqual(my_set.order, order)
+            self.assertEqual(my_set.as_list(), ["c", "A", "b"])
+            my_set.add("a")
+            self.assertEqual(my_set.as_list(), ["c", "a", "b"])
+            self.assertEqual(my_set.copy().order, order)
+            self.assertEqual((my_set | FrozenCIStringSet(["d"])).order, order)
+
+        LOG.debug("Testing invalidation of the cached sorted view.")
+        my_set = CIStringSet(src)
+        sorted_keys = my_set._get_sorted_keys()
+        my_set.add("B")
+        self.assertIs(my_set._get_sorted_keys(), sorted_keys)
+        self.assertEqual(my_set.as_list(), ["A", "B", "c"])
+        my_set.discard("x")
+        self.assertIs(my_set._get_sorted_keys(), sorted_keys)
+        my_set.add("aa")
+        self.assertEqual(my_set.as_list(), ["A", "aa", "B", "c"])
+        my_set.discard("AA")
+        self.assertEqual(my_set.as_list(), ["A", "B", "c"])
+        value = my_set.pop()
+        self.assertNotIn(value, my_set)
+        self.assertEqual(len(my_set.as_list()), 2)
+
+        LOG.debug("Testing invalid ordering policy.")
+        with self.assertRaises(ValueError) as cm:
+            my_set = CIStringSet(src, order="uhu")
+        e = cm.exception
+        LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
+    # -------------------------------------------------------------------------
+    def test_bulk_operations(self):
+        """Test bulk constructors and batch updates of CIStringSet and CIDict objects."""
+        LOG.info("Testing bulk constructors and batch updates of CIStringSet and CIDict objects.")
+
+        from fb_tools.colcts import CIDict, CIStringSet, FrozenCIDict, FrozenCIStringSet
+        from fb_tools.colcts import CIInitfromTupleError, WrongUpdateClassError
+        from fb_tools.colcts import WrongItemTypeError, WrongKeyTypeError
+
+        LOG.debug("Testing FrozenCIStringSet.from_iterable() ...")
+        my_set = FrozenCIStringSet.from_iterable(x for x in ("b", "A", "a", "C"))
+        self.assertIsInstance(my_set, FrozenCIStringSet)
+        self.assertEqual(my_set.as_list(), ["a", "b", "C"])
+        my_set = CIStringSet.from_iterable({"x", "Y"})
+        self.assertIsInstance(my_set, CIStringSet)
+        self.assertEqual(my_set.as_list(), ["x", "Y"])
+
+        for wrong_iterable in ("ab", 1, None):
+            with self.assertRaises(TypeError) as cm:
+                my_set = CIStringSet.from_iterable(wrong_iterable)
+            e = cm.exception
+            LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
+        with self.assertRaises(WrongItemTypeError) as cm:
+            my_set = CIStringSet.from_iterable(["a", 1])
+        e = cm.exception
+        LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
+        LOG.debug("Testing CIStringSet.update_many() ...")
+        my_set = CIStringSet(["a"])
+        my_set.update_many(["b", "B"], (x.upper() for x in ("c", "a")))
+        self.assertEqual(my_set.as_list(), ["A", "B", "C"])
+        with self.assertRaises(WrongItemTypeError):
+            my_set.update_many(["d", None])
+        self.assertNotIn("d", my_set)
+
+        LOG.debug("Testing FrozenCIDict.from_pairs() ...")
+        my_dict = FrozenCIDict.from_pairs((k, v) for k, v in (("a", 1), ("B", 2), ("A", 3)))
+        self.assertIsInstance(my_dict, FrozenCIDict)
+        self.assertEqual(my_dict.dict(), {"A": 3, "B": 2})
+        my_dict = CIDict.from_pairs(zip(["x", "Y"], [1, 2]))
+        self.assertIsInstance(my_dict, CIDict)
+        self.assertEqual(my_dict.dict(), {"x": 1, "Y": 2})
+        my_dict = CIDict.from_pairs({"u": 1})
+        self.assertEqual(my_dict.dict(), {"u": 1})
+
+        with self.assertRaises(WrongKeyTypeError) as cm:
+            my_dict = CIDict.from_pairs([("a", 1), (2, 2)])
+        e = cm.exception
+        LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
+        with self.assertRaises(CIInitfromTupleError) as cm:
+            my_dict = CIDict.from_pairs([("a", 1), ("b",)])
+        e = cm.exception
+        LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
+        LOG.debug("Testing CIDict.update_many() ...")
+        my_dict = CIDict({"a": 1})
+        my_dict.update_many({"B": 2}, (("c", 3), ("A", 4)))
+        self.assertEqual(my_dict.dict(), {"A": 4, "B": 2, "c": 3})
+
+        for wrong_object in ("ab", 1):
+            with self.assertRaises(WrongUpdateClassError) as cm:
+                my_dict.update_many(wrong_object)
+            e = cm.exception
+            LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+            with self.assertRaises(WrongUpdateClassError) as cm:
+                my_dict.update(wrong_object)
+
+    # -------------------------------------------------------------------------
+    def test_key_normalisers(self):
+        """Test the pluggable key normalisers of the case insensitive collections."""
+        LOG.info("Testing the pluggable key normalisers of the case insensitive collections.")
+
+        from fb_tools.colcts import CIDict, CIStringSet, FrozenCIStringSet
+        from fb_tools.colcts import KEY_NORMALISERS, WrongItemTypeError, WrongKeyTypeError
+        from fb_tools.colcts import idna_key, nfkc_casefold_key
+
+        class CasefoldSet(CIStringSet):
+            fold_key = staticmethod(KEY_NORMALISERS["casefold"])
+
+        class NfkcSet(CIStringSet):
+            fold_key = staticmethod(nfkc_casefold_key)
+
+        class FqdnSet(CIStringSet):
+            fold_key = staticmethod(idna_key)
+
+        class FqdnDict(CIDict):
+            fold_key = staticmethod(idna_key)
+
+        LOG.debug("Testing the default normaliser str.lower ...")
+        my_set = CIStringSet(["Straße"])
+        self.assertNotIn("STRASSE", my_set)
+
+        LOG.debug("Testing the casefold normaliser ...")
+        my_set = CasefoldSet(["Straße"])
+        self.assertIn("STRASSE", my_set)
+        self.assertEqual(my_set.real_value("strasse"), "Straße")
+
+        LOG.debug("Testing the NFKC casefold normaliser ...")
+        my_set = NfkcSet(["Ａbc", "K"])
+        self.assertIn("ABC", my_set)
+        self.assertIn("k", my_set)
+        self.assertIs(nfkc_casefold_key("ＡBC"), nfkc_casefold_key("abc"))
+
+        LOG.debug("Testing the IDNA normaliser ...")
+        my_set = FqdnSet(["Bücher.Example.COM"])
+        self.assertIn("xn--bcher-kva.example.com", my_set)
+        self.assertIn("BÜCHER.example.com", my_set)
+        self.assertEqual(idna_key("a..b"), "a..b")
+        my_dict = FqdnDict({"Müller.de": 1})
+        self.assertEqual(my_dict["XN--MLLER-KVA.DE"], 1)
+        self.assertEqual(my_dict.real_key("müller.DE"), "Müller.de")
+
+        for wrong_item in (1, None):
+            with self.assertRaises(WrongItemTypeError):
+                FqdnSet(["a", wrong_item])
+            with self.assertRaises(WrongKeyTypeError):
+                FqdnDict.from_pairs([("a", 1), (wrong_item, 2)])
+
+        LOG.debug("Testing set operations between different normalisers ...")
+        set_lower = FrozenCIStringSet(["Straße", "Bach"])
+        set_casefold = CasefoldSet(["STRASSE", "bach"])
+        self.assertEqual(set_casefold & set_lower, CasefoldSet(["strasse", "bach"]))
+        self.assertEqual(set_lower & set_casefold, FrozenCIStringSet(["BACH"]))
+        self.assertTrue(set_lower <= set_casefold.union(set_lower))
+        self.assertEqual((set_casefold - set_lower).as_list(), [])
+
+    # -------------------------------------------------------------------------
+    def test_snapshots(self):
+        """Test copy-on-write snapshots and frozen views of CIStringSet and CIDict objects."""
+        LOG.info("Testing copy-on-write snapshots of CIStringSet and CIDict objects.")
+
+        import copy
+
+        from fb_tools.colcts import CIDict, CIStringSet, FrozenCIDict, FrozenCIStringSet
+        from fb_tools.colcts import idna_key
+
+        LOG.debug("Testing snapshots of a CIStringSet ...")
+        my_set = CIStringSet(["a", "B", "c"])
+        snap = my_set.snapshot()
+        self.assertIsInstance(snap, CIStringSet)
+        self.assertIs(snap._items, my_set._items)
+        my_set.add("D")
+        snap.discard("a")
+        self.assertEqual(my_set.as_list(), ["a", "B", "c", "D"])
+        self.assertEqual(snap.as_list(), ["B", "c"])
+
+        snap = copy.copy(my_set)
+        my_set -= CIStringSet(["c"])
+        my_set.pop()
+        self.assertEqual(len(snap), 4)
+        self.assertEqual(len(my_set), 2)
+
+        LOG.debug("Testing CIStringSet.freeze() ...")
+        frozen = my_set.freeze()
+        self.assertIsInstance(frozen, FrozenCIStringSet)
+        self.assertNotIsInstance(frozen, CIStringSet)
+        self.assertIs(frozen._items, my_set._items)
+        old_list = frozen.as_list()
+        my_set.update_many(["x", "y"])
+        self.assertEqual(frozen.as_list(), old_list)
+
+        LOG.debug("Testing snapshots of a CIDict ...")
+        my_dict = CIDict({"a": 1, "B": 2})
+        snap = my_dict.snapshot()
+        self.assertIs(snap._map, my_dict._map)
+        my_dict["A"] = 3
+        del snap["b"]
+        self.assertEqual(my_dict.dict(), {"A": 3, "B": 2})
+        self.assertEqual(snap.dict(), {"a": 1})
+        for method, args in (("pop", ("a",)), ("popitem", ()), ("clear", ())):
+            snap = my_dict.copy()
+            getattr(my_dict, method)(*args)
+            self.assertEqual(snap.dict(), {"A": 3, "B": 2})
+            my_dict.update({"A": 3, "B": 2})
+
+        LOG.debug("Testing CIDict.freeze() ...")
+        frozen = my_dict.freeze()
+        self.assertIsInstance(frozen, FrozenCIDict)
+        self.assertNotIsInstance(frozen, CIDict)
+        self.assertIs(frozen._map, my_dict._map)
+        my_dict.update_many([("c", 4)])
+        self.assertEqual(frozen.dict(), {"A": 3, "B": 2})
+        self.assertEqual(my_dict.dict(), {"A": 3, "B": 2, "c": 4})
+
+        class FqdnDict(CIDict):
+            fold_key = staticmethod(idna_key)
+
+        frozen = FqdnDict({"Bücher.de": 1}).freeze()
+        self.assertEqual(frozen["bücher.DE"], 1)
+        self.assertNotIn("xn--bcher-kva.de", frozen)
+
+    # -------------------------------------------------------------------------
+    def test_serialisation(self):
+        """Test pickling and the binary format of the case insensitive collections."""
+        LOG.info("Testing pickling and the binary format of the case insensitive collections.")
+
+        import pickle
+
+        from fb_tools import colcts
+        from fb_tools.colcts import CIDict, CIStringSet, FrozenCIDict, FrozenCIStringSet
+        from fb_tools.colcts import CISerialisationError, ORDER_INSERTION
+
+        my_set = CIStringSet(["c", "A", "b"], order=ORDER_INSERTION)
+        my_dict = CIDict({"a": 1, "B": [2, "x"], "c": None})
+        for obj in (my_set, my_set.freeze(), my_dict, my_dict.freeze()):
+            cls = obj.__class__
+            LOG.debug("Testing pickling of a {} object ...".format(cls.__name__))
+            result = pickle.loads(pickle.dumps(obj))
+            self.assertIsInstance(result, cls)
+            self.assertEqual(result, obj)
+            self.assertEqual(list(result), list(obj))
+
+            LOG.debug("Testing the binary format of a {} object ...".format(cls.__name__))
+            result = cls.from_bytes(obj.to_bytes())
+            self.assertIsInstance(result, cls)
+            self.assertEqual(result, obj)
+            self.assertEqual(list(result), list(obj))
+
+        self.assertEqual(pickle.loads(pickle.dumps(my_set)).order, ORDER_INSERTION)
+        result = pickle.loads(pickle.dumps(my_dict))
+        self.assertEqual(result.real_key("b"), "B")
+        result["b"].append(3)
+        self.assertEqual(my_dict["b"], [2, "x"])
+
+        LOG.debug("Testing pickles of former versions with the plain instance dict ...")
+        old_pickle = (
+            b"\x80\x02cfb_tools.colcts\nFrozenCIStringSet\nq\x00)\x81q\x01}q\x02X\x06\x00\x00"
+            b"\x00_itemsq\x03}q\x04(X\x01\x00\x00\x00bq\x05X\x01\x00\x00\x00bq\x06X\x01\x00"
+            b"\x00\x00aq\x07X\x01\x00\x00\x00Aq\x08usb.")
+        result = pickle.loads(old_pickle)
+        self.assertIsInstance(result, FrozenCIStringSet)
+        self.assertEqual(list(result), ["A", "b"])
+        self.assertIn("a", result)
+        old_pickle = (
+            b"\x80\x02cfb_tools.colcts\nFrozenCIDict\nq\x00)\x81q\x01}q\x02X\x04\x00\x00\x00"
+            b"_mapq\x03}q\x04(X\x01\x00\x00\x00bq\x05}q\x06(X\x03\x00\x00\x00keyq\x07X\x01"
+            b"\x00\x00\x00Bq\x08X\x03\x00\x00\x00valq\tK\x02uX\x01\x00\x00\x00aq\n}q\x0b(h"
+            b"\x07X\x01\x00\x00\x00aq\x0ch\t]q\rK\x01auusb.")
+        result = pickle.loads(old_pickle)
+        self.assertIsInstance(result, FrozenCIDict)
+        self.assertEqual(result.dict(), {"B": 2, "a": [1]})
+        self.assertEqual(result["b"], 2)
+
+        LOG.debug("Testing wrong data for the binary format ...")
+        wrong_data = (
+            b"",
+            b"FBCI",
+            my_dict.to_bytes()[:5],
+            b"XXXX" + my_set.to_bytes()[4:],
+            my_set.to_bytes(),
+            my_dict.to_bytes()[:-2],
+            colcts._to_bytes(my_dict, colcts.CI_BYTES_KIND_DICT, (["a", "b"], [1])),
+            colcts._to_bytes(my_dict, colcts.CI_BYTES_KIND_DICT, (["a"], [1, 2])),
+        )
+        for data in wrong_data:
+            with self.assertRaises(CISerialisationError) as cm:
+                CIDict.from_bytes(data)
+            e = cm.exception
+            LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+        with self.assertRaises(CISerialisationError):
+            CIDict({"a": object()}).to_bytes()
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_serialisation_benchmark(self):
+        """Benchmark pickling and the binary format of the case insensitive collections."""
+        LOG.info("Benchmarking pickling and the binary format of the collections.")
+
+        import pickle
+        import timeit
+
+        from fb_tools.colcts import FrozenCIDict, FrozenCIStringSet
+
+        LOG.debug("Comparing size and round trip time of 100000 entries ...")
+        keys = ["Host{}.Example.COM".format(i) for i in range(100000)]
+        big_set = FrozenCIStringSet.from_iterable(keys)
+        big_dict = FrozenCIDict.from_pairs(zip(keys, range(100000)))
+        legacy_dict = {k.lower(): {"key": k, "val": i} for i, k in enumerate(keys)}
+        size_legacy = len(pickle.dumps(legacy_dict))
+        time_legacy = timeit.timeit(lambda: pickle.loads(pickle.dumps(legacy_dict)), number=1)
+        LOG.debug("Legacy dict layout: pickle {s} bytes in {t:.4f} s.".format(
+            s=size_legacy, t=time_legacy))
+        for obj in (big_set, big_dict):
+            cls = obj.__class__
+            size_pickle = len(pickle.dumps(obj))
+            size_bytes = len(obj.to_bytes())
+            time_pickle = timeit.timeit(lambda: pickle.loads(pickle.dumps(obj)), number=1)  # noqa
+            time_bytes = timeit.timeit(lambda: cls.from_bytes(obj.to_bytes()), number=1)  # noqa
+            msg = "{c}: pickle {sp} bytes in {tp:.4f} s, to_bytes {sb} bytes in {tb:.4f} s."
+            LOG.debug(msg.format(
+                c=cls.__name__, sp=size_pickle, tp=time_pickle, sb=size_bytes, tb=time_bytes))
+            # Both formats contain no folded keys, so they are much smaller and faster
+            for (size, duration) in ((size_pickle, time_pickle), (size_bytes, time_bytes)):
+                self.assertLess(size, size_legacy * 0.6)
+                self.assertLess(duration, time_legacy)
+
+    # -------------------------------------------------------------------------
+    def test_set_index(self):
+        """Test the prefix and suffix queries of FrozenCIStringSet and CIStringSet objects."""
+        LOG.info("Testing the prefix and suffix queries of CIStringSet objects.")
+
+        import random
+
+        from fb_tools.colcts import CIStringSet, FrozenCIStringSet, WrongItemTypeError
+
+        names = ["mail.Example.com", "www.example.COM", "Mail.example.org", "mx.example.org"]
+        my_set = FrozenCIStringSet(names)
+        self.assertEqual(my_set.startswith("MAIL."), ["mail.Example.com", "Mail.example.org"])
+        self.assertEqual(my_set.endswith(".EXAMPLE.com"), ["mail.Example.com", "www.example.COM"])
+        self.assertEqual(my_set.endswith("example.net"), [])
+        self.assertEqual(my_set.between("mail", "mx"), ["mail.Example.com", "Mail.example.org"])
+        self.assertEqual(my_set.between("mx"), ["mx.example.org", "www.example.COM"])
+        self.assertEqual(my_set.between(stop="m"), [])
+        for method in ("startswith", "endswith", "between"):
+            with self.assertRaises(WrongItemTypeError):
+                getattr(my_set, method)(1)
+
+        LOG.debug("Testing the maintenance of the indexes by changes of the set ...")
+        my_set = CIStringSet(names)
+        snap = my_set.snapshot()
+        self.assertEqual(len(my_set.endswith(".org")), 2)
+        my_set.add("smtp.Example.ORG")
+        my_set.discard("MX.example.org")
+        self.assertEqual(my_set.endswith(".org"), ["Mail.example.org", "smtp.Example.ORG"])
+        self.assertEqual(snap.endswith(".org"), ["Mail.example.org", "mx.example.org"])
+
+        rand = random.Random(42)
+        pool = ["h{}.d{}.example".format(i, i % 7) for i in range(300)]
+        my_set = CIStringSet()
+        for i in range(600):
+            action = rand.random()
+            if action < 0.5:
+                my_set.add(rand.choice(pool).upper())
+            elif action < 0.8:
+                my_set.discard(rand.choice(pool))
+            elif action < 0.9 and my_set:
+                my_set.pop()
+            elif action < 0.95:
+                my_set.update_many(rand.sample(pool, 10))
+            else:
+                my_set.remove(list(my_set)[:100])
+            if i % 20 == 0:
+                for word in ("h1", "h2", "H3"):
+                    expected = sorted(x for x in my_set if x.lower().startswith(word.lower()))
+                    self.assertEqual(sorted(my_set.startswith(word)), expected)
+                for word in (".d1.example", "D3.EXAMPLE"):
+                    expected = sorted(x for x in my_set if x.lower().endswith(word.lower()))
+                    self.assertEqual(sorted(my_set.endswith(word)), expected)
+
+    # -------------------------------------------------------------------------
+    def test_hashing(self):
+        """Test hashing and equality of FrozenCIStringSet and FrozenCIDict objects."""
+        LOG.info("Testing hashing and equality of FrozenCIStringSet and FrozenCIDict objects.")
+
+        from fb_tools.colcts import CIDict, CIStringSet, FrozenCIDict, FrozenCIStringSet
+
+        set1 = FrozenCIStringSet(["a", "B", "c"])
+        set2 = FrozenCIStringSet(["C", "b", "A"])
+        set3 = FrozenCIStringSet(["a", "b", "d"])
+        self.assertEqual(hash(set1), hash(set2))
+        self.assertEqual(set1, set2)
+        self.assertNotEqual(set1, set3)
+        self.assertEqual(set1, CIStringSet(["a", "b", "c"]).freeze())
+
+        dict1 = FrozenCIDict({"a": 1, "B": (2, 3)})
+        dict2 = FrozenCIDict({"A": 1, "b": (2, 3)})
+        dict3 = FrozenCIDict({"a": 1, "B": (2, 4)})
+        self.assertEqual(hash(dict1), hash(dict2))
+        self.assertEqual(dict1, dict2)
+        self.assertNotEqual(dict1, dict3)
+        self.assertEqual(hash(dict1.copy()), hash(dict1))
+
+        LOG.debug("Testing frozen collections as dict keys ...")
+        cache = {set1: "set1", dict1: "dict1"}
+        self.assertEqual(cache[set2], "set1")
+        self.assertEqual(cache[dict2], "dict1")
+        self.assertNotIn(set3, cache)
+        self.assertNotIn(dict3, cache)
+
+        LOG.debug("Testing collections with different key normalisers ...")
+
+        class CasefoldSet(FrozenCIStringSet):
+            fold_key = staticmethod(str.casefold)
+
+        class CasefoldDict(FrozenCIDict):
+            fold_key = staticmethod(str.casefold)
+
+        class LowerSet(FrozenCIStringSet):
+            pass
+
+        self.assertNotEqual(FrozenCIStringSet(["Straße"]), CasefoldSet(["Straße"]))
+        self.assertNotEqual(CasefoldSet(["Straße"]), FrozenCIStringSet(["Straße"]))
+        self.assertNotEqual(FrozenCIStringSet(["STRASSE"]), CasefoldSet(["Straße"]))
+        self.assertNotEqual(CasefoldSet(["Straße"]), FrozenCIStringSet(["STRASSE"]))
+        self.assertNotEqual(FrozenCIDict({"a": 1}), CasefoldDict({"a": 1}))
+        self.assertNotEqual(CasefoldDict({"a": 1}), FrozenCIDict({"a": 1}))
+        self.assertEqual(LowerSet(["a", "B"]), set1 - FrozenCIStringSet(["c"]))
+        self.assertEqual(hash(LowerSet(["a", "B"])), hash(set1 - FrozenCIStringSet(["c"])))
+
+        LOG.debug("Testing unhashable collections ...")
+        for obj in (CIStringSet(["a"]), CIDict({"a": 1}), FrozenCIDict({"a": [1]})):
+            with self.assertRaises(TypeError) as cm:
+                hash(obj)
+            e = cm.exception
+            LOG.debug("{c} raised: {e}".format(c=e.__class__.__name__, e=e))
+
     # -------------------------------------------------------------------------
     def test_init_frozendict(self):
         """Test init of a FrozenCIDict object."""
@@ -1300,6 +1899,86 @@ class TestFbCollections(FbToolsTestcase):
                     )
                 self.assertNotEqual(src_dict, comp_object)
 
+    # -------------------------------------------------------------------------
+    def test_frozendict_storage(self):
+        """Test the parallel key and value storage of FrozenCIDict objects."""
+        LOG.info("Testing the parallel key and value storage of FrozenCIDict objects.")
+
+        from fb_tools.colcts import FrozenCIDict
+
+        src = {}
+        for i in range(100):
+            src["Attribute-{:03d}".format(i)] = i
+        ci_dict = FrozenCIDict(src)
+
+        self.assertEqual(len(ci_dict), len(src))
+        self.assertEqual(ci_dict["ATTRIBUTE-050"], 50)
+        self.assertEqual(ci_dict.real_key("attribute-050"), "Attribute-050")
+        self.assertEqual(list(ci_dict.keys()), list(src.keys()))
+        self.assertEqual(list(ci_dict.values()), list(src.values()))
+        with self.assertRaises(KeyError):
+            ci_dict["Attribute-100"]
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_frozendict_storage_benchmark(self):
+        """Benchmark memory usage and lookup speed of the FrozenCIDict storage."""
+        LOG.info("Benchmarking memory usage and lookup speed of the FrozenCIDict storage.")
+
+        import timeit
+        import tracemalloc
+
+        from fb_tools.colcts import FrozenCIDict
+
+        nr_entries = 20000
+        src = {}
+        for i in range(nr_entries):
+            src["Attribute-{:06d}".format(i)] = i
+
+        def legacy_layout(mapping):
+            # The former layout: one small dict per entry.
+            ret = {}
+            for key in mapping.keys():
+                ret[key.lower()] = {"key": key, "val": mapping[key]}
+            return ret
+
+        tracemalloc.start()
+        try:
+            mem_start = tracemalloc.get_traced_memory()[0]
+            legacy_map = legacy_layout(src)
+            mem_legacy = tracemalloc.get_traced_memory()[0] - mem_start
+
+            mem_start = tracemalloc.get_traced_memory()[0]
+            ci_dict = FrozenCIDict(src)
+            mem_current = tracemalloc.get_traced_memory()[0] - mem_start
+        finally:
+            tracemalloc.stop()
+
+        LOG.debug(
+            "Memory usage for {n} entries - legacy layout: {lg} bytes, "
+            "current layout: {cur} bytes.".format(n=nr_entries, lg=mem_legacy, cur=mem_current)
+        )
+        self.assertLess(mem_current, mem_legacy)
+
+        def legacy_get(key):
+            lkey = key.lower()
+            if lkey in legacy_map:
+                return legacy_map[lkey]["val"]
+            raise KeyError(key)
+
+        key = "ATTRIBUTE-{:06d}".format(nr_entries // 2)
+        self.assertEqual(ci_dict[key], legacy_get(key))
+
+        nr_loops = 100000
+        time_legacy = timeit.timeit(lambda: legacy_get(key), number=nr_loops)
+        time_current = timeit.timeit(lambda: ci_dict[key], number=nr_loops)
+        LOG.debug(
+            "Time for {n} lookups - legacy layout: {lg:0.4f} s, "
+            "current layout: {cur:0.4f} s.".format(n=nr_loops, lg=time_legacy, cur=time_current)
+        )
+        # The compact layout may not make the lookups notably slower
+        self.assertLess(time_current, time_legacy * 2)
+
     # -------------------------------------------------------------------------
     def test_init_dict(self):
         """Test init of a CIDict object."""
@@ -1616,6 +2295,8 @@ if __name__ == "__main__":
     suite = unittest.TestSuite()
 
     suite.addTest(TestFbCollections("test_import", verbose))
+    suite.addTest(TestFbCollections("test_collections_alias", verbose))
+    suite.addTest(TestFbCollections("test_collections_alias_benchmark", verbose))
     suite.addTest(TestFbCollections("test_init_frozenset", verbose))
     suite.addTest(TestFbCollections("test_frozenset_real_value", verbose))
     suite.addTest(TestFbCollections("test_frozenset_len", verbose))
@@ -1632,8 +2313,18 @@ if __name__ == "__main__":
     suite.addTest(TestFbCollections("test_frozenset_operator_sub", verbose))
     suite.addTest(TestFbCollections("test_frozenset_operator_xor", verbose))
     suite.addTest(TestFbCollections("test_frozenset_method_isdisjoint", verbose))
+    suite.addTest(TestFbCollections("test_frozenset_set_algebra", verbose))
+    suite.addTest(TestFbCollections("test_frozenset_set_algebra_benchmark", verbose))
     suite.addTest(TestFbCollections("test_init_set", verbose))
     suite.addTest(TestFbCollections("test_set_add", verbose))
+    suite.addTest(TestFbCollections("test_set_order", verbose))
+    suite.addTest(TestFbCollections("test_bulk_operations", verbose))
+    suite.addTest(TestFbCollections("test_key_normalisers", verbose))
+    suite.addTest(TestFbCollections("test_snapshots", verbose))
+    suite.addTest(TestFbCollections("test_serialisation", verbose))
+    suite.addTest(TestFbCollections("test_serialisation_benchmark", verbose))
+    suite.addTest(TestFbCollections("test_set_index", verbose))
+    suite.addTest(TestFbCollections("test_hashing", verbose))
     suite.addTest(TestFbCollections("test_init_frozendict", verbose))
     suite.addTest(TestFbCollections("test_frozendict_copy", verbose))
     suite.addTest(TestFbCollections("test_frozendict_real_key", verbose))
@@ -1642,6 +2333,8 @@ if __name__ == "__main__":
     suite.addTest(TestFbCollections("test_frozendict_contains", verbose))
     suite.addTest(TestFbCollections("test_frozendict_items", verbose))
     suite.addTest(TestFbCollections("test_frozendict_operator_eq", verbose))
+    suite.addTest(TestFbCollections("test_frozendict_storage", verbose))
+    suite.addTest(TestFbCollections("test_frozendict_storage_benchmark", verbose))
     suite.addTest(TestFbCollections("test_init_dict", verbose))
     suite.addTest(TestFbCollections("test_dict_set", verbose))
     suite.addTest(TestFbCollections("test_dict_del", verbose))
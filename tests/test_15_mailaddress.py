@@ -23,12 +23,16 @@ except ImportError:
 libdir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
 sys.path.insert(0, libdir)
 
-from fb_tools.common import pp
+from fb_tools.common import pp, to_bool
 
 from general import FbToolsTestcase, get_arg_verbose, init_root_logger
 
 LOG = logging.getLogger("test_mailaddress")
 
+EXEC_BENCHMARKS = False
+if "EXEC_BENCHMARKS" in os.environ and os.environ["EXEC_BENCHMARKS"] != "":
+    EXEC_BENCHMARKS = to_bool(os.environ["EXEC_BENCHMARKS"])
+
 
 # =============================================================================
 class TestMailaddress(FbToolsTestcase):
@@ -190,6 +194,7 @@ class TestMailaddress(FbToolsTestcase):
             ("bla@uhu.xn--j1amh", "bla@uhu.xn--j1amh", False),
             ("uhu@xn--nschknstrt-dcbfe.de", "uhu@xn--nschknstrt-dcbfe.de", False),
             ("me@xn--fiqz9s", "me@xn--fiqz9s", False),
+            ("ich@Müller.de", "ich@xn--mller-kva.de", False),
             ("@localhost", "@localhost", True),
             ("@abc.de", "@abc.de", True),
             ("@xn--fiqz9s", "@xn--fiqz9s", True),
@@ -218,7 +223,6 @@ class TestMailaddress(FbToolsTestcase):
             "uhu!banane",
             "a@b@c",
             "müller.de",
-            "ich@Müller.de",
             "@uhu_banane.de",
             "frank@uhu_banane.de",
         )
@@ -524,6 +528,7 @@ class TestMailaddress(FbToolsTestcase):
             ('"Brehm@Frank" <frank.uwe@banane.de>', '"Brehm@Frank" <frank.uwe@banane.de>'),
             ('"Brehm|Frank" <frank.uwe@banane.de>', '"Brehm|Frank" <frank.uwe@banane.de>'),
             ("Jörg Schüßler <jsc@banane.de>", "Jörg Schüßler <jsc@banane.de>"),
+            ("ich@Müller.de", "ich@xn--mller-kva.de"),
         )
 
         for token in correct_addresses:
@@ -549,7 +554,6 @@ class TestMailaddress(FbToolsTestcase):
             "uhu!banane",
             "a@b@c",
             "müller.de",
-            "ich@Müller.de",
             "ich@müller",
             "@uhu_banane.de",
             "frank@uhu_banane.de",
@@ -1138,6 +1142,704 @@ class TestMailaddress(FbToolsTestcase):
         LOG.debug("Extended MailAddressList %r: {!r}".format(alist_extended))
         self.assertEqual(len(alist_extended), 3)
 
+    # -------------------------------------------------------------------------
+    def test_parse_cache(self):
+        """Test the memoised parsing and the interning of mail addresses."""
+        LOG.info(self.get_method_doc())
+
+        import gc
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools.errors import InvalidMailAddressError
+        from fb_tools.mailaddress import _parse_qualified_address, _parse_simple_address
+        from fb_tools.mailaddress import clear_address_cache
+
+        simple_addresses = (
+            "frank@brehm-online.com", " Frank@Brehm-Online.com ", "@brehm-online.com", "frank")
+        qual_addresses = (
+            "frank@brehm-online.com",
+            "<Frank@Brehm-online.com>",
+            '"Frank Brehm" <frank@brehm-online.com>',
+            "Frank Brehm <frank@brehm-online.com>",
+            '"" <frank@brehm-online.com>',
+        )
+
+        clear_address_cache()
+        LOG.debug("Comparing memoised and not memoised parsing ...")
+        for address in simple_addresses:
+            for _i in range(2):
+                cached = MailAddress(address)
+                uncached = MailAddress(address, verbose=3)
+                self.assertEqual(cached.as_tuple()[:2], uncached.as_tuple()[:2])
+        for address in qual_addresses:
+            for _i in range(2):
+                cached = QualifiedMailAddress(address)
+                uncached = QualifiedMailAddress(address, verbose=3)
+                self.assertEqual(
+                    (cached.user, cached.domain, cached.name),
+                    (uncached.user, uncached.domain, uncached.name))
+        info = _parse_simple_address.cache_info()
+        LOG.debug("Cache info simple addresses: {}".format(info))
+        self.assertEqual(info.hits, len(simple_addresses))
+        info = _parse_qualified_address.cache_info()
+        LOG.debug("Cache info qualified addresses: {}".format(info))
+        self.assertEqual(info.hits, len(qual_addresses))
+
+        LOG.debug("Testing invalid addresses twice ...")
+        for _i in range(2):
+            with self.assertRaises(InvalidMailAddressError):
+                MailAddress("uhu@@banane")
+            with self.assertRaises(InvalidMailAddressError):
+                QualifiedMailAddress("Uhu <uhu@banane")
+
+        LOG.debug("Testing interning of addresses ...")
+        addr1 = MailAddress.intern("frank@brehm-online.com")
+        addr2 = MailAddress.intern("Frank@Brehm-Online.com")
+        addr3 = MailAddress.intern(user="frank", domain="brehm-online.com")
+        self.assertIs(addr1, addr2)
+        self.assertIs(addr1, addr3)
+        self.assertIsNot(addr1, MailAddress("frank@brehm-online.com"))
+        qaddr1 = QualifiedMailAddress.intern('"Frank Brehm" <frank@brehm-online.com>')
+        qaddr2 = QualifiedMailAddress.intern("Frank Brehm <Frank@brehm-online.com>")
+        self.assertIs(qaddr1, qaddr2)
+        self.assertIsNot(qaddr1, QualifiedMailAddress.intern("frank@brehm-online.com"))
+        self.assertIsNot(addr1, QualifiedMailAddress.intern("frank@brehm-online.com"))
+
+        LOG.debug("Testing, that interned addresses may not be changed ...")
+        for (addr, attribute, value) in ((addr1, "verbose", 3), (qaddr1, "empty_ok", True)):
+            old_value = getattr(addr, attribute)
+            with self.assertRaises(AttributeError) as cm:
+                setattr(addr, attribute, value)
+            LOG.debug("AttributeError raised: {}".format(cm.exception))
+            self.assertEqual(getattr(addr, attribute), old_value)
+            addr_copy = copy.copy(addr)
+            setattr(addr_copy, attribute, value)
+            self.assertEqual(getattr(addr_copy, attribute), value)
+        self.assertIs(MailAddress.intern("frank@brehm-online.com"), addr1)
+        not_interned = MailAddress("frank@brehm-online.com")
+        not_interned.verbose = 3
+        self.assertEqual(not_interned.verbose, 3)
+
+        from fb_tools.mailaddress import _INTERNED_ADDRESSES
+        num_interned = len(_INTERNED_ADDRESSES)
+        MailAddress.intern("uhu@banane.de")
+        gc.collect()
+        self.assertEqual(len(_INTERNED_ADDRESSES), num_interned)
+
+    # -------------------------------------------------------------------------
+    def test_validate_many(self):
+        """Test the bulk validation of mail addresses."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools.mailaddress import _
+
+        test_data = (
+            ("frank@brehm-online.com", True, None),
+            (" Frank@Brehm-Online.com\n", True, None),
+            (b"frank@brehm-online.com", True, None),
+            ("", False, "Empty address."),
+            (None, False, "Empty address."),
+            (1, False, "Wrong type."),
+            ("x" * 250 + "@a.de", False, "Address too long."),
+            ("x" * 65 + "@a.de", False, "Local part too long."),
+            ("frank", False, "Wrong number of '@'."),
+            ("a@b@c.de", False, "Wrong number of '@'."),
+            ("frank brehm@brehm-online.com", False, "Invalid characters."),
+            ("frank@brehm-online", False, "Invalid address."),
+            ("@brehm-online.com", False, "Invalid address."),
+        )
+
+        LOG.debug("Testing MailAddress.validate_many() ...")
+        addresses = [x[0] for x in test_data]
+        results = list(MailAddress.validate_many(addresses))
+        for (address, ok, reason), (exp_address, exp_ok, exp_reason) in zip(results, test_data):
+            LOG.debug("Got for {a!r}: {o!r}, {r!r}.".format(a=address, o=ok, r=reason))
+            if exp_reason is not None:
+                exp_reason = _(exp_reason)
+            self.assertEqual((address, ok, reason), (exp_address, exp_ok, exp_reason))
+
+        result = list(MailAddress.validate_many(["@brehm-online.com"], no_user_ok=True))
+        self.assertEqual(result, [("@brehm-online.com", True, None)])
+
+        LOG.debug("Testing MailAddress.validate_many() with worker processes ...")
+        many = [x[0] for x in test_data if isinstance(x[0], (str, bytes))] * 50
+        results_pool = list(MailAddress.validate_many(iter(many), workers=2, chunk_size=7))
+        self.assertEqual(results_pool, list(MailAddress.validate_many(many)))
+
+        gen = MailAddress.validate_many(iter(many), workers=2, chunk_size=7)
+        self.assertEqual(next(gen), ("frank@brehm-online.com", True, None))
+        gen.close()
+
+    # -------------------------------------------------------------------------
+    def test_mailaddresslist_index(self):
+        """Test the indexed lookups, extending and deduplicating of a MailAddressList."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools import MailAddressList
+
+        pool = [
+            "a@test.com",
+            "A@Test.com",
+            "b@test.com",
+            '"Frank Brehm" <frank@brehm-online.com>',
+            "frank@brehm-online.com",
+            "Frank <frank@brehm-online.com>",
+        ]
+
+        def check(address_list):
+            for address in pool:
+                addr = address_list._to_address(address)
+                found = [i for i, x in enumerate(address_list._addresses) if x == addr]
+                self.assertEqual(address_list.count(address), len(found))
+                self.assertEqual(address in address_list, bool(found))
+                if found:
+                    self.assertEqual(address_list.index(address), found[0])
+                    self.assertEqual(address_list.index(address, found[0]), found[0])
+                    with self.assertRaises(ValueError):
+                        address_list.index(address, 0, found[0])
+                else:
+                    with self.assertRaises(ValueError):
+                        address_list.index(address)
+
+        LOG.debug("Testing the index after random changes ...")
+        rand = random.Random(4711)
+        address_list = MailAddressList(verbose=self.verbose)
+        for i in range(300):
+            action = rand.random()
+            if action < 0.4 or not address_list:
+                address_list.append(rand.choice(pool))
+            elif action < 0.55:
+                address_list[rand.randrange(len(address_list))] = rand.choice(pool)
+            elif action < 0.7:
+                address_list.pop()
+            elif action < 0.8:
+                del address_list[rand.randrange(len(address_list))]
+            elif action < 0.9:
+                address_list.insert(rand.randrange(len(address_list) + 1), rand.choice(pool))
+            elif action < 0.95:
+                address_list.remove(rand.choice(list(address_list)))
+            else:
+                address_list.reverse()
+            if i % 10 == 0:
+                check(address_list)
+        check(address_list)
+
+        LOG.debug("Testing MailAddressList.dedupe() and MailAddressList.extend() ...")
+        address_list = MailAddressList(*pool, verbose=self.verbose)
+        address_list.extend(pool)
+        self.assertEqual(len(address_list), 12)
+        self.assertEqual(address_list.dedupe(), 7)
+        self.assertEqual(
+            [str(x) for x in address_list],
+            ["a@test.com", "b@test.com", "Frank Brehm <frank@brehm-online.com>",
+             "frank@brehm-online.com", "Frank <frank@brehm-online.com>"])
+        self.assertEqual(address_list.dedupe(), 0)
+        check(address_list)
+
+        address_list.extend([MailAddress("c@test.com"), "B@test.com"], unique=True)
+        self.assertEqual(len(address_list), 6)
+        address_list.extend(address_list)
+        self.assertEqual(len(address_list), 12)
+        self.assertIsInstance(address_list[8], QualifiedMailAddress)
+
+        alist = address_list
+        alist += ["d@test.com"]
+        self.assertIs(alist, address_list)
+        self.assertEqual(len(address_list), 13)
+
+    # -------------------------------------------------------------------------
+    def test_slots_memory(self):
+        """Test the compact storage of MailAddress objects in __slots__."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+
+        self.assertFalse(hasattr(MailAddress("frank@brehm-online.com"), "__dict__"))
+        address = QualifiedMailAddress('"Frank Brehm" <frank@brehm-online.com>')
+        self.assertFalse(hasattr(address, "__dict__"))
+        with self.assertRaises(AttributeError):
+            address.uhu = "banane"
+        address.sort_key
+        got_dict = address.as_dict(short=False)
+        LOG.debug("QualifiedMailAddress.as_dict(short=False):\n" + pp(got_dict))
+        self.assertEqual(got_dict["_user"], "frank")
+        self.assertEqual(got_dict["_name"], "Frank Brehm")
+        self.assertNotIn("_sort_key", got_dict)
+        interned = QualifiedMailAddress.intern(str(address))
+        self.assertNotIn("_interned", interned.as_dict(short=False))
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_slots_memory_benchmark(self):
+        """Benchmark the memory usage of MailAddress objects with __slots__ and __dict__."""
+        LOG.info(self.get_method_doc())
+
+        import tracemalloc
+
+        from fb_tools import MailAddress
+
+        class DictMailAddress(MailAddress):
+            """A MailAddress with a __dict__ like before."""
+
+            pass
+
+        def measure(cls, number):
+            tracemalloc.start()
+            addresses = [cls(user="user{}".format(i), domain="example.com") for i in range(number)]
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del addresses
+            return current
+
+        number = 20000
+        LOG.debug("Measuring the memory of {} MailAddress objects ...".format(number))
+        mem_dict = measure(DictMailAddress, number)
+        mem_slots = measure(MailAddress, number)
+        LOG.debug(
+            "Memory usage with __dict__: {d} bytes ({dp:.0f} per address), with __slots__: "
+            "{s} bytes ({sp:.0f} per address).".format(
+                d=mem_dict, dp=mem_dict / number, s=mem_slots, sp=mem_slots / number))
+        # Without a __dict__ at least the pointer to it and its header are saved per address
+        self.assertGreaterEqual(mem_dict - mem_slots, number * 24)
+
+    # -------------------------------------------------------------------------
+    def test_sort_key(self):
+        """Test sorting a MailAddressList by the cached sort keys."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools import MailAddressList
+
+        addr = MailAddress("Frank@Mail.Brehm-Online.com")
+        self.assertEqual(addr.sort_key, (("com", "brehm-online", "mail"), "frank", "", ""))
+        self.assertIs(addr.sort_key, addr.sort_key)
+        addr = QualifiedMailAddress("Frank Brehm <frank@brehm-online.com>")
+        self.assertEqual(
+            addr.sort_key, (("com", "brehm-online"), "frank", "frank brehm", "Frank Brehm"))
+        self.assertEqual(MailAddress(domain="test.com").sort_key, (("com", "test"), "", "", ""))
+
+        address_list = MailAddressList(
+            "b@mail.test.com",
+            "Zorro <a@test.com>",
+            "a@test.org",
+            "a@test.com",
+            MailAddress(domain="test.com"),
+            "B@Test.com",
+            "Anton <a@test.com>",
+            verbose=self.verbose,
+        )
+        self.assertIn("b@mail.test.com", address_list)
+        address_list.sort()
+        self.assertEqual([str(x) for x in address_list], [
+            "@test.com",
+            "a@test.com",
+            "Anton <a@test.com>",
+            "Zorro <a@test.com>",
+            "b@test.com",
+            "b@mail.test.com",
+            "a@test.org",
+        ])
+        self.assertEqual(address_list.index("b@mail.test.com"), 5)
+        address_list.sort(reverse=True)
+        self.assertEqual(str(address_list[0]), "a@test.org")
+        self.assertEqual(address_list.index("a@test.org"), 0)
+        address_list.sort(key=str)
+        self.assertEqual(str(address_list[0]), "@test.com")
+        self.assertEqual(str(address_list[-1]), "b@test.com")
+
+        LOG.debug("Testing the order of random addresses ...")
+        rand = random.Random(4711)
+        addresses = [
+            MailAddress(
+                user="user{}".format(rand.randrange(10000)),
+                domain="{}.example.{}".format(rand.choice("abcdef"), rand.choice(("com", "net"))))
+            for i in range(200)]
+        address_list = MailAddressList(*addresses, verbose=self.verbose)
+        address_list.sort()
+        keys = [x.sort_key for x in address_list]
+        self.assertEqual(keys, sorted(keys))
+
+    # -------------------------------------------------------------------------
+    def test_parse_stream(self):
+        """Test the streaming parsers of address lists and mailbox headers."""
+        LOG.info(self.get_method_doc())
+
+        import io
+        from itertools import islice
+
+        from fb_tools.errors import InvalidMailAddressError
+        from fb_tools.mailaddress import MailAddressList
+        from fb_tools.mailaddress import parse_address_headers
+        from fb_tools.mailaddress import parse_address_list
+
+        address_list = (
+            '"Brehm, Frank" <Frank@Brehm-Online.com>, a@test.com (Comment, (nested) \\) ),\r\n'
+            ' team: b@test.com, "Quoted \\"Name\\"" <c@test.com>;, undisclosed-recipients:;, ,\n'
+            " Anton\n\t Berta <d@test.com>"
+        )
+        expected = [
+            ("frank", "brehm-online.com", "Brehm, Frank"),
+            ("a", "test.com", None),
+            ("b", "test.com", None),
+            ("c", "test.com", 'Quoted "Name"'),
+            ("d", "test.com", "Anton Berta"),
+        ]
+        got = [(x.user, x.domain, x.name) for x in parse_address_list(address_list)]
+        LOG.debug("Parsed address list: {}".format(pp(got)))
+        self.assertEqual(got, expected)
+
+        LOG.debug("Testing comments inside and outside of angle brackets ...")
+        got = [
+            (x.user, x.domain, x.name)
+            for x in parse_address_list("Frank <frank(comment)@b.de>, Frank(c)Brehm <f@b.de>")]
+        self.assertEqual(got, [("frank", "b.de", "Frank"), ("f", "b.de", "Frank Brehm")])
+
+        with self.assertRaises(InvalidMailAddressError) as cm:
+            list(parse_address_list("a@test.com, Anton Berta"))
+        LOG.debug("{c} raised: {e}".format(c=cm.exception.__class__.__name__, e=cm.exception))
+        got = parse_address_list(
+            "a@test.com, Anton Berta, " + "x" * 5000 + "@test.com, b@test.com", skip_invalid=True)
+        self.assertEqual([str(x) for x in got], ["a@test.com", "b@test.com"])
+
+        mbox = (
+            "From frank@brehm-online.com Mon Jan  1 00:00:00 2024\n"
+            "From: frank@brehm-online.com\n"
+            "To: a@test.com,\n"
+            '  "B, C" <b@test.com>\n'
+            "Subject: Test\n"
+            "CC: c@test.com\n"
+            "\n"
+            "To: body@test.com\n"
+            "\n"
+            "From frank@brehm-online.com Mon Jan  1 00:00:01 2024\n"
+            "to: d@test.com\n"
+        )
+        got = [str(x) for x in parse_address_headers(io.StringIO(mbox))]
+        self.assertEqual(got, ["a@test.com", '"B, C" <b@test.com>', "c@test.com", "d@test.com"])
+        got = MailAddressList.from_stream(io.StringIO(mbox), headers=["To"])
+        self.assertEqual(len(got), 3)
+        self.assertIsInstance(got, MailAddressList)
+        got = MailAddressList.from_stream(io.StringIO("a@test.com, b@test.com"), may_simple=False)
+        self.assertEqual(got.as_list(as_str=True), ["a@test.com", "b@test.com"])
+
+        class LazyStream(object):
+            """A text stream with an address list, which is generated on reading."""
+
+            def __init__(self, number):
+                self.pieces = ("user{i}@example.com, ".format(i=i) for i in range(number))
+
+            def read(self, size):
+                return "".join(islice(self.pieces, 7))
+
+        got = [str(x) for x in parse_address_list(LazyStream(100))]
+        self.assertEqual(got, ["user{}@example.com".format(i) for i in range(100)])
+
+    # -------------------------------------------------------------------------
+    def test_group_by_domain(self):
+        """Test grouping the addresses of a MailAddressList by their domain."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import MailAddressList
+
+        pool = [
+            "a@test.com",
+            "b@test.com",
+            "Frank Brehm <frank@brehm-online.com>",
+            "frank@brehm-online.com",
+            "x@test.org",
+            MailAddress(domain="test.net"),
+        ]
+
+        def check(address_list):
+            expected = {}
+            for addr in address_list:
+                expected.setdefault(addr.domain, []).append(addr)
+            got = address_list.group_by_domain()
+            self.assertEqual(list(got.keys()), list(expected.keys()))
+            for domain in expected:
+                self.assertEqual([id(x) for x in got[domain]], [id(x) for x in expected[domain]])
+            self.assertEqual(
+                dict(address_list.domain_counts()), {d: len(x) for d, x in expected.items()})
+
+        address_list = MailAddressList(*pool, verbose=self.verbose)
+        groups = address_list.group_by_domain()
+        LOG.debug("Grouped addresses: {}".format(pp(dict(groups))))
+        self.assertEqual(len(groups["test.com"]), 2)
+        with self.assertRaises(TypeError):
+            groups["test.com"] = []
+        counts = address_list.domain_counts()
+        LOG.debug("Domain counts: {!r}".format(counts))
+        self.assertEqual(counts["brehm-online.com"], 2)
+        self.assertEqual(counts["test.net"], 1)
+        self.assertNotIn("test.de", counts)
+
+        LOG.debug("Testing the maintenance of the domain index by replacing addresses ...")
+        domains = address_list._domains
+        address_list[0] = "c@test.org"
+        address_list[-1] = "y@test.org"
+        address_list[2] = "z@test.com"
+        self.assertIs(address_list._domains, domains)
+        self.assertEqual(
+            [str(x) for x in groups["test.org"]], ["c@test.org", "x@test.org", "y@test.org"])
+        self.assertNotIn("test.net", groups)
+        check(address_list)
+
+        LOG.debug("Testing the domain index after random changes ...")
+        rand = random.Random(4711)
+        address_list = MailAddressList(verbose=self.verbose)
+        for i in range(300):
+            action = rand.random()
+            if action < 0.4 or not address_list:
+                address_list.append(rand.choice(pool))
+            elif action < 0.55:
+                address_list[rand.randrange(len(address_list))] = rand.choice(pool)
+            elif action < 0.7:
+                address_list.pop()
+            elif action < 0.8:
+                del address_list[rand.randrange(len(address_list))]
+            elif action < 0.9:
+                address_list.insert(rand.randrange(len(address_list) + 1), rand.choice(pool))
+            elif action < 0.95:
+                address_list.sort()
+            else:
+                address_list.dedupe()
+            if i % 3 == 0:
+                check(address_list)
+        check(address_list)
+        address_list.clear()
+        self.assertEqual(len(address_list.domain_counts()), 0)
+
+    # -------------------------------------------------------------------------
+    def test_copy_list_fast(self):
+        """Test copying, reversing and adding of MailAddressList objects without conversion."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools import MailAddressList
+        from fb_tools.errors import EmptyMailAddressError
+
+        address_list = MailAddressList(
+            "a@test.com", "Frank Brehm <frank@brehm-online.com>", verbose=self.verbose)
+        address_list[1].sort_key
+        other_list = MailAddressList("b@test.com", verbose=self.verbose, may_simple=False)
+
+        for new_list in (copy.copy(address_list), reversed(reversed(address_list))):
+            self.assertEqual(list(new_list), list(address_list))
+            for (addr, new_addr) in zip(address_list, new_list):
+                self.assertIsNot(addr, new_addr)
+                self.assertIs(addr.__class__, new_addr.__class__)
+                self.assertEqual(addr.as_tuple(), new_addr.as_tuple())
+                self.assertEqual(addr.sort_key, new_addr.sort_key)
+            self.assertEqual(new_list.index("Frank Brehm <frank@brehm-online.com>"), 1)
+            self.assertEqual(new_list.domain_counts()["test.com"], 1)
+
+        new_list = address_list + other_list
+        self.assertEqual(new_list.as_list(as_str=True), [
+            "a@test.com", "Frank Brehm <frank@brehm-online.com>", "b@test.com"])
+        self.assertIsInstance(new_list[2], QualifiedMailAddress)
+        self.assertEqual(new_list.index("b@test.com"), 2)
+        new_list = other_list + address_list
+        self.assertIsInstance(new_list[1], QualifiedMailAddress)
+        self.assertEqual(new_list.index("a@test.com"), 1)
+        simple = new_list[0].simple()
+        self.assertIs(simple.__class__, MailAddress)
+        self.assertEqual(simple.sort_key, (("com", "test"), "b", "", ""))
+
+        LOG.debug("Testing, that added addresses are not shared ...")
+        new_list = address_list + address_list
+        for (addr, new_addr) in zip(address_list + address_list, new_list):
+            self.assertIsNot(addr, new_addr)
+            self.assertEqual(addr.as_tuple(), new_addr.as_tuple())
+
+        LOG.debug("Testing, that empty addresses are not taken from a more permissive list ...")
+        empty_list = MailAddressList(verbose=self.verbose, empty_ok=True)
+        empty_list.append(MailAddress(empty_ok=True))
+        self.assertEqual(len(empty_list), 1)
+        with self.assertRaises(EmptyMailAddressError):
+            address_list + empty_list
+        new_list = empty_list + address_list
+        self.assertEqual(len(new_list), 3)
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(EXEC_BENCHMARKS, "Benchmarks are not executed.")
+    def test_copy_list_fast_benchmark(self):
+        """Benchmark copying of a big MailAddressList without conversion."""
+        LOG.info(self.get_method_doc())
+
+        import timeit
+
+        from fb_tools import QualifiedMailAddress
+        from fb_tools import MailAddressList
+
+        number = 50000
+        address_list = MailAddressList(*[
+            QualifiedMailAddress(user="user{}".format(i), domain="example.com", name="User")
+            for i in range(number)], verbose=self.verbose)
+
+        def legacy_copy():
+            new_list = MailAddressList(verbose=self.verbose)
+            for addr in address_list:
+                new_list.append(copy.copy(addr))
+            return new_list
+
+        duration_legacy = min(timeit.repeat(legacy_copy, number=1, repeat=3))
+        duration_copy = min(timeit.repeat(lambda: copy.copy(address_list), number=1, repeat=3))
+        duration_reverse = min(timeit.repeat(lambda: reversed(address_list), number=1, repeat=3))
+        LOG.debug(
+            "Copying {n} addresses by appending: {l:.4f} s, by copy.copy(): {c:.4f} s, "
+            "by reversed(): {r:.4f} s.".format(
+                n=number, l=duration_legacy, c=duration_copy, r=duration_reverse))
+        # Without the conversion by append() copying takes at most the half time
+        self.assertLess(duration_copy, duration_legacy / 2)
+        self.assertLess(duration_reverse, duration_legacy / 2)
+
+    # -------------------------------------------------------------------------
+    def test_idna_domains(self):
+        """Test mail addresses with Unicode domains."""
+        LOG.info(self.get_method_doc())
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools.errors import InvalidMailAddressError
+        from fb_tools.mailaddress import _
+        from fb_tools.mailaddress import parse_address_list
+
+        addr = MailAddress("Frank@Bücher.Example")
+        LOG.debug("Address with a Unicode domain: {!r}".format(addr))
+        self.assertEqual(addr.domain, "xn--bcher-kva.example")
+        self.assertEqual(addr.unicode_domain, "bücher.example")
+        self.assertEqual(str(addr), "frank@xn--bcher-kva.example")
+        self.assertEqual(addr.str_for_display(), "frank@bücher.example")
+        self.assertEqual(addr, MailAddress("frank@xn--bcher-kva.example"))
+        self.assertEqual(addr, MailAddress(user="frank", domain="BÜCHER.example"))
+        self.assertEqual(MailAddress("frank@brehm-online.com").unicode_domain, "brehm-online.com")
+
+        qaddr = QualifiedMailAddress("Bücherwurm <frank@bücher.example>")
+        self.assertEqual(qaddr.simple(), addr)
+        self.assertEqual(qaddr.name, "Bücherwurm")
+        self.assertEqual(qaddr.str_for_display(), "Bücherwurm <frank@bücher.example>")
+        self.assertEqual(str(qaddr), "Bücherwurm <frank@xn--bcher-kva.example>")
+
+        self.assertTrue(MailAddress.valid_address("frank@bücher.example"))
+        self.assertEqual(MailAddress.check_address("frank@bücher.example"), (True, None))
+        self.assertEqual(
+            MailAddress.check_address("frank@bü cher.example"),
+            (False, _("Invalid characters.")))
+        self.assertFalse(MailAddress.valid_address("frank@bücher..example"))
+        with self.assertRaises(InvalidMailAddressError):
+            MailAddress("frank@bücher..example")
+        got = [x.domain for x in parse_address_list("a@bücher.example, B <b@müller.example>")]
+        self.assertEqual(got, ["xn--bcher-kva.example", "xn--mller-kva.example"])
+
+    # -------------------------------------------------------------------------
+    def test_mailaddress_set(self):
+        """Test the disk-backed MailAddressSet."""
+        LOG.info(self.get_method_doc())
+
+        import io
+        import shutil
+        import stat
+        import tempfile
+
+        from fb_tools import MailAddress
+        from fb_tools import QualifiedMailAddress
+        from fb_tools.errors import InvalidMailAddressError
+        from fb_tools.mailaddress_set import MailAddressSet
+        from fb_tools.mailaddress_set import MailAddressSetError
+
+        workdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(workdir, "suppressed.txt")
+            stream = io.StringIO(
+                "b@test.com\n\nA@Test.com\n  a@test.com  \nFrank Brehm <frank@brehm-online.com>\n"
+                "ich@müller.de\nb@test.com\n")
+            with MailAddressSet.build(filename, stream) as address_set:
+                LOG.debug("Created set {!r}: {}".format(address_set, address_set))
+                self.assertEqual(len(address_set), 4)
+                self.assertEqual(list(address_set), [
+                    "a@test.com", "b@test.com", "frank@brehm-online.com", "ich@xn--mller-kva.de"])
+                self.assertIn("a@test.com", address_set)
+                self.assertIn("B@TEST.COM", address_set)
+                self.assertIn(MailAddress("frank@brehm-online.com"), address_set)
+                self.assertIn(QualifiedMailAddress("Frank <frank@brehm-online.com>"), address_set)
+                self.assertIn("ich@Müller.de", address_set)
+                self.assertNotIn("c@test.com", address_set)
+                self.assertNotIn("0@test.com", address_set)
+                self.assertNotIn("zzz@test.com", address_set)
+                self.assertNotIn("uhu:banane", address_set)
+                self.assertNotIn("", address_set)
+
+            with self.assertRaises(InvalidMailAddressError):
+                MailAddressSet.build(filename, ["a@test.com", "uhu:banane"])
+            address_set = MailAddressSet.build(
+                filename, ["a@test.com", "uhu:banane"], skip_invalid=True)
+            self.assertEqual(list(address_set), ["a@test.com"])
+            address_set.close()
+            self.assertEqual(stat.S_IMODE(os.stat(filename).st_mode), 0o644)
+
+            LOG.debug("Testing, that addresses without user or domain are rejected ...")
+            for address in ("@test.com", MailAddress(domain="test.com"), "frank"):
+                LOG.debug("Testing address {!r} ...".format(address))
+                with self.assertRaises(InvalidMailAddressError):
+                    MailAddressSet.address_key(address)
+                address_set = MailAddressSet.build(
+                    filename, ["a@test.com", address], skip_invalid=True)
+                self.assertEqual(list(address_set), ["a@test.com"])
+                address_set.close()
+
+            address_set = MailAddressSet.build(filename, [])
+            self.assertEqual(len(address_set), 0)
+            self.assertNotIn("a@test.com", address_set)
+            address_set.close()
+
+            wrong_file = os.path.join(workdir, "wrong.txt")
+            for content in ("", "a@test.com\n"):
+                with open(wrong_file, "w") as fh:
+                    fh.write(content)
+                with self.assertRaises(MailAddressSetError) as cm:
+                    MailAddressSet(wrong_file)
+                LOG.debug("{c} raised: {e}".format(
+                    c=cm.exception.__class__.__name__, e=cm.exception))
+
+            LOG.debug("Testing, that no temporary file is left behind on failure ...")
+            blocked_file = os.path.join(workdir, "blocked.txt")
+            os.mkdir(blocked_file)
+            with open(os.path.join(blocked_file, "dummy"), "w") as fh:
+                fh.write("dummy\n")
+            with self.assertRaises(OSError):
+                MailAddressSet.build(blocked_file, ["a@test.com"])
+            with self.assertRaises(InvalidMailAddressError):
+                MailAddressSet.build(filename + ".new", ["a@test.com", "a@b@test.com"])
+            self.assertEqual(
+                sorted(os.listdir(workdir)), ["blocked.txt", "suppressed.txt", "wrong.txt"])
+
+            LOG.debug("Testing a set built from several sorted chunks ...")
+            rand = random.Random(4711)
+            addresses = [
+                "user{u}@example{d}.com".format(u=rand.randrange(20000), d=rand.randrange(10))
+                for i in range(20000)]
+            expected = set(addresses)
+            address_set = MailAddressSet.build(filename, addresses, chunk_size=3000)
+            self.assertEqual(len(address_set), len(expected))
+            self.assertEqual(list(address_set), sorted(expected))
+            probes = addresses[:2000] + ["user{}@example0.com".format(i) for i in range(2000)]
+            for address in probes:
+                self.assertEqual(address in address_set, address in expected)
+            address_set.close()
+            with self.assertRaises(ValueError):
+                "a@test.com" in address_set
+
+        finally:
+            shutil.rmtree(workdir)
+
 
 # =============================================================================
 if __name__ == "__main__":
@@ -1170,6 +1872,18 @@ if __name__ == "__main__":
     suite.addTest(TestMailaddress("test_le", verbose))
     suite.addTest(TestMailaddress("test_ge", verbose))
     suite.addTest(TestMailaddress("test_init_mailaddresslist", verbose))
+    suite.addTest(TestMailaddress("test_parse_cache", verbose))
+    suite.addTest(TestMailaddress("test_validate_many", verbose))
+    suite.addTest(TestMailaddress("test_mailaddresslist_index", verbose))
+    suite.addTest(TestMailaddress("test_slots_memory", verbose))
+    suite.addTest(TestMailaddress("test_slots_memory_benchmark", verbose))
+    suite.addTest(TestMailaddress("test_sort_key", verbose))
+    suite.addTest(TestMailaddress("test_parse_stream", verbose))
+    suite.addTest(TestMailaddress("test_group_by_domain", verbose))
+    suite.addTest(TestMailaddress("test_copy_list_fast", verbose))
+    suite.addTest(TestMailaddress("test_copy_list_fast_benchmark", verbose))
+    suite.addTest(TestMailaddress("test_idna_domains", verbose))
+    suite.addTest(TestMailaddress("test_mailaddress_set", verbose))
 
     runner = unittest.TextTestRunner(verbosity=verbose)
 
@@ -33,6 +33,10 @@ from general import FbToolsTestcase, get_arg_verbose, init_root_logger
 
 LOG = logging.getLogger("test_handling_object")
 
+EXEC_BENCHMARKS = False
+if "EXEC_BENCHMARKS" in os.environ and os.environ["EXEC_BENCHMARKS"] != "":
+    EXEC_BENCHMARKS = to_bool(os.environ["EXEC_BENCHMARKS"])
+
 EXEC_LONG_TESTS = False
 if "EXEC_LONG_TESTS" in os.environ and os.environ["EXEC_LONG_TESTS"] != "":
     EXEC_LONG_TESTS = to_bool(os.environ["EXEC_LONG_TESTS"])
@@ -521,6 +525,115 @@ class TestFbHandlingObject(FbToolsTestcase):
         self.assertIsInstance(p, Path)
         self.assertEqual(p.name, cmd)
 
+    # -------------------------------------------------------------------------
+    def test_command_cache(self):
+        """Test the process-wide cache of method get_command() of class HandlingObject."""
+        LOG.info(self.get_method_doc())
+
+        import shutil
+
+        from fb_tools import handling_obj
+        from fb_tools.handling_obj import HandlingObject, clear_command_cache
+
+        hdlr = HandlingObject(
+            appname=self.appname,
+            verbose=self.verbose,
+        )
+
+        cmd = "fb-tools-test-cmd"
+        bin_dir = Path(tempfile.mkdtemp(prefix="test-handling-obj."))
+        old_path = os.environ.get("PATH")
+        old_cwd = os.getcwd()
+
+        def touch_dir():
+            # Ensure a new modification time on file systems with a coarse resolution
+            mtime = os.stat(str(bin_dir)).st_mtime_ns + 10**9
+            os.utime(str(bin_dir), ns=(mtime, mtime))
+
+        try:
+            self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+
+            LOG.debug("Creating command {!r} in {!r}.".format(cmd, str(bin_dir)))
+            cmd_path = bin_dir / cmd
+            cmd_path.write_text("#!/bin/sh\nexit 0\n")
+            cmd_path.chmod(0o755)
+            touch_dir()
+
+            LOG.debug("Extending $PATH by {!r}.".format(str(bin_dir)))
+            os.environ["PATH"] = os.pathsep.join((old_path or os.defpath, str(bin_dir)))
+            p = hdlr.get_command(cmd)
+            self.assertEqual(p, bin_dir.resolve() / cmd)
+            self.assertIs(hdlr.get_command(cmd), p)
+
+            LOG.debug("Removing command {!r}.".format(str(cmd_path)))
+            cmd_path.unlink()
+            touch_dir()
+            self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+
+            cmd_path.write_text("#!/bin/sh\nexit 0\n")
+            cmd_path.chmod(0o755)
+            touch_dir()
+            self.assertEqual(hdlr.get_command(cmd), p)
+
+            LOG.debug("Restoring $PATH.")
+            if old_path is None:
+                del os.environ["PATH"]
+            else:
+                os.environ["PATH"] = old_path
+            self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+
+            hdlr.add_search_paths.append(bin_dir)
+            found = hdlr.prewarm_commands(["ls", cmd, "uhu-banane"])
+            LOG.debug("Prewarmed commands: {!r}".format(found))
+            self.assertEqual(list(found.keys()), ["ls", cmd, "uhu-banane"])
+            self.assertIsInstance(found["ls"], Path)
+            self.assertEqual(found[cmd], p)
+            self.assertIsNone(found["uhu-banane"])
+            hdlr.add_search_paths = []
+
+            LOG.debug("Testing a relative directory in $PATH.")
+            work_dir = bin_dir / "work"
+            (work_dir / "bin").mkdir(parents=True)
+            (bin_dir / "bin").mkdir()
+            cmd_path = work_dir / "bin" / cmd
+            cmd_path.write_text("#!/bin/sh\nexit 0\n")
+            cmd_path.chmod(0o755)
+            os.environ["PATH"] = os.pathsep.join((old_path or os.defpath, "bin"))
+            os.chdir(str(work_dir))
+            self.assertEqual(hdlr.get_command(cmd), cmd_path.resolve())
+            os.chdir(str(bin_dir))
+            self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+            os.chdir(str(work_dir))
+            self.assertEqual(hdlr.get_command(cmd), cmd_path.resolve())
+            os.chdir(old_cwd)
+
+            LOG.debug("Testing a directory in $PATH, which is created later.")
+            new_dir = bin_dir / "new" / "bin"
+            os.environ["PATH"] = os.pathsep.join((old_path or os.defpath, str(new_dir)))
+            self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+            new_dir.mkdir(parents=True)
+            cmd_path = new_dir / cmd
+            cmd_path.write_text("#!/bin/sh\nexit 0\n")
+            cmd_path.chmod(0o755)
+            self.assertEqual(hdlr.get_command(cmd), cmd_path.resolve())
+
+            LOG.debug("Testing the limits of the caches.")
+            for i in range(handling_obj.SEARCH_PATH_CACHE_SIZE + 10):
+                os.environ["PATH"] = os.pathsep.join(
+                    (old_path or os.defpath, str(bin_dir / "dir{}".format(i))))
+                self.assertIsNone(hdlr.get_command(cmd, quiet=True))
+            self.assertEqual(
+                len(handling_obj._SEARCH_PATH_CACHE), handling_obj.SEARCH_PATH_CACHE_SIZE)
+            self.assertLessEqual(
+                len(handling_obj._COMMAND_CACHE), handling_obj.COMMAND_CACHE_SIZE)
+
+        finally:
+            os.chdir(old_cwd)
+            if old_path is not None:
+                os.environ["PATH"] = old_path
+            shutil.rmtree(str(bin_dir))
+            clear_command_cache()
+
     # -------------------------------------------------------------------------
     def test_get_int_addressfamily(self):
         """Test property address_famlily and method get_address_famlily_int()."""
@@ -714,6 +827,7 @@ if __name__ == "__main__":
     suite.addTest(TestFbHandlingObject("test_read_file", verbose))
     suite.addTest(TestFbHandlingObject("test_write_file", verbose))
     suite.addTest(TestFbHandlingObject("test_get_command", verbose))
+    suite.addTest(TestFbHandlingObject("test_command_cache", verbose))
     suite.addTest(TestFbHandlingObject("test_get_int_addressfamily", verbose))
     suite.addTest(TestFbHandlingObject("test_get_address", verbose))
     suite.addTest(TestFbHandlingObject("test_get_password", verbose))